@@ -3,6 +3,7 @@ from flask_login import LoginManager
 from app.models.user import db
 from app.utils.filters import nl2br_filter, markdown_filter, html_filter
 from app.utils.logger import setup_app_logging, log_manager
+from app.utils.search import highlight_snippet
 import os
 
 def load_env_file():
@@ -33,6 +34,51 @@ def create_app():
     # 初始化扩展
     db.init_app(app)
     
+    # 初始化全文搜索索引（数据库不支持 FTS5 时自动回退）
+    with app.app_context():
+        from app.utils.search import is_available
+        is_available()
+    
+    # Markdown 渲染缓存内存上限
+    from app.utils.filters import markdown_cache
+    markdown_cache.max_bytes = app.config.get('MARKDOWN_CACHE_MAX_BYTES', markdown_cache.max_bytes)
+    
+    # 初始化写接口限流（最先注册，被拒绝的请求不经过其他钩子、不访问数据库）
+    from app.utils.rate_limit import rate_limiter
+    rate_limiter.init_app(app)
+    
+    # 初始化浏览量缓冲计数
+    from app.utils.view_counter import view_counter
+    view_counter.init_app(app)
+    
+    # 初始化未登录访客整页缓存
+    from app.utils.page_cache import page_cache
+    page_cache.init_app(app)
+    
+    # 初始化用户互动状态索引
+    from app.utils.interaction_index import interaction_index
+    interaction_index.init_app(app)
+    
+    # 初始化上传文件存储（按内容摘要寻址，对象 URL 永久缓存）
+    from app.utils.storage import content_store
+    content_store.init_app(app)
+    
+    # 初始化上传图片后台处理队列
+    from app.utils.upload_queue import upload_queue
+    upload_queue.init_app(app)
+    
+    # 初始化未读数推送（通知、留言提交后通知推送连接）
+    from app.utils.unread_events import unread_events
+    unread_events.init_app(app)
+    
+    # 初始化未读通知计数（随通知变化在同一事务中维护，短时间缓存）
+    from app.utils.unread_counter import unread_counter
+    unread_counter.init_app(app)
+    
+    # 初始化列表页大字段延迟加载检查
+    from app.utils.load_guard import deferred_load_guard
+    deferred_load_guard.init_app(app)
+    
     # 初始化登录管理器
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -47,6 +93,7 @@ def create_app():
     app.template_filter('nl2br')(nl2br_filter)
     app.template_filter('markdown')(markdown_filter)
     app.template_filter('html')(html_filter)
+    app.template_filter('highlight')(highlight_snippet)
     
     # 注册蓝图
     from app.routes import main_bp, admin_bp, auth_bp
@@ -62,6 +109,9 @@ def create_app():
     app.register_blueprint(version_bp)
     app.register_blueprint(notification_bp)
     
+    # 路由模块注册了上传任务类型后启动调度线程，继续处理重启前排队和中断的任务
+    upload_queue.start()
+    
     # 设置日志
     setup_app_logging(app)
     app.logger.info("应用初始化完成")
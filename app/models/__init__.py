@@ -1,12 +1,15 @@
 from .user import User
 from .post import Post
+from .tag import Tag
 from .project import Project
 from .message import Message
 from .message_reply import MessageReply
 from .about import AboutContent, AboutContact
-from .interaction import UserInteraction, Comment, CommentReply, CommentLike
+from .interaction import UserInteraction, RatingSummary, Comment, CommentReply, CommentLike
 from .version import Version
 from .skill import Skill
-from .notification import Notification
+from .notification import Notification, NotificationActor, NotificationCounter, NotificationArchive
+from .related import RelatedContent
+from .upload_job import UploadJob
 
-__all__ = ['User', 'Post', 'Project', 'Message', 'MessageReply', 'AboutContent', 'AboutContact', 'UserInteraction', 'Comment', 'CommentReply', 'CommentLike', 'Version', 'Skill', 'Notification'] 
\ No newline at end of file
+__all__ = ['User', 'Post', 'Tag', 'Project', 'Message', 'MessageReply', 'AboutContent', 'AboutContact', 'UserInteraction', 'RatingSummary', 'Comment', 'CommentReply', 'CommentLike', 'Version', 'Skill', 'Notification', 'NotificationActor', 'NotificationCounter', 'NotificationArchive', 'RelatedContent', 'UploadJob'] 
\ No newline at end of file
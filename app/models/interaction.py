@@ -15,9 +15,10 @@ class UserInteraction(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # 确保每个用户对同一内容只有一条互动记录
+    # 确保每个用户对同一内容只有一条互动记录；按内容统计评分
     __table_args__ = (
         db.UniqueConstraint('user_id', 'content_id', 'type', name='unique_user_content_interaction'),
+        db.Index('ix_user_interactions_content_rating', 'content_id', 'type', 'rating'),
     )
     
     # 关系
@@ -26,6 +27,134 @@ class UserInteraction(db.Model):
     def __repr__(self):
         return f'<UserInteraction {self.id}>'
 
+class RatingSummary(db.Model):
+    """评分汇总模型 - 每篇文章/每个项目的评分总和、人数和 1~5 分分布
+    
+    用户新增或修改评分时按差值增量更新，不再每次汇总全部评分记录。
+    """
+    __tablename__ = 'rating_summaries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    content_id = db.Column(db.Integer, nullable=False)  # 文章或项目ID
+    type = db.Column(db.Integer, nullable=False)  # 1-博客；2-项目
+    rating_sum = db.Column(db.Integer, default=0, nullable=False)  # 评分总和
+    rating_count = db.Column(db.Integer, default=0, nullable=False)  # 评分人数
+    rating_1 = db.Column(db.Integer, default=0, nullable=False)  # 各分值人数
+    rating_2 = db.Column(db.Integer, default=0, nullable=False)
+    rating_3 = db.Column(db.Integer, default=0, nullable=False)
+    rating_4 = db.Column(db.Integer, default=0, nullable=False)
+    rating_5 = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('content_id', 'type', name='unique_rating_summary'),
+    )
+    
+    def __repr__(self):
+        return f'<RatingSummary {self.type}:{self.content_id}>'
+    
+    @property
+    def average(self):
+        """平均评分（保留一位小数）"""
+        if not self.rating_count:
+            return 0.0
+        return round(self.rating_sum / self.rating_count, 1)
+    
+    @property
+    def histogram(self):
+        """评分分布 {分值: 人数}"""
+        return {score: getattr(self, f'rating_{score}') or 0 for score in range(1, 6)}
+    
+    def to_dict(self):
+        return {
+            'average_rating': self.average,
+            'rating_count': self.rating_count or 0,
+            'rating_sum': self.rating_sum or 0,
+            'histogram': self.histogram,
+        }
+    
+    @classmethod
+    def get_or_empty(cls, type_code, content_id):
+        """获取评分汇总，没有评分时返回未保存的空汇总"""
+        summary = cls.query.filter_by(type=type_code, content_id=content_id).first()
+        if summary is None:
+            summary = cls(type=type_code, content_id=content_id, rating_sum=0, rating_count=0,
+                          rating_1=0, rating_2=0, rating_3=0, rating_4=0, rating_5=0)
+        return summary
+    
+    @classmethod
+    def apply_change(cls, type_code, content_id, old_rating, new_rating):
+        """按评分变化增量更新汇总（old_rating / new_rating 为 0 表示没有评分），返回更新后的汇总
+        
+        使用 UPDATE ... SET x = x + delta，并发评分时不会互相覆盖。
+        汇总记录需已存在（由 app.utils.counters.apply_rating_change 先幂等创建）。
+        """
+        old_rating = old_rating or 0
+        new_rating = new_rating or 0
+        row = cls.query.filter_by(type=type_code, content_id=content_id)
+        
+        if old_rating == new_rating:
+            return row.first()
+        
+        values = {
+            cls.rating_sum: cls.rating_sum + (new_rating - old_rating),
+            cls.rating_count: cls.rating_count + (int(new_rating > 0) - int(old_rating > 0)),
+            cls.updated_at: datetime.utcnow(),
+        }
+        if old_rating:
+            column = getattr(cls, f'rating_{old_rating}')
+            values[column] = column - 1
+        if new_rating:
+            column = getattr(cls, f'rating_{new_rating}')
+            values[column] = column + 1
+        
+        row.update(values, synchronize_session=False)
+        summary = row.first()
+        db.session.refresh(summary)
+        return summary
+    
+    @classmethod
+    def rebuild(cls, type_code=None):
+        """根据用户互动记录重新统计评分汇总，返回与重新统计结果不一致的汇总数"""
+        query = db.session.query(
+            UserInteraction.type,
+            UserInteraction.content_id,
+            db.func.sum(UserInteraction.rating),
+            db.func.count(UserInteraction.id),
+            *[db.func.sum(db.case((UserInteraction.rating == score, 1), else_=0)) for score in range(1, 6)]
+        ).filter(UserInteraction.rating > 0).group_by(UserInteraction.type, UserInteraction.content_id)
+        existing_query = cls.query
+        if type_code is not None:
+            query = query.filter(UserInteraction.type == type_code)
+            existing_query = existing_query.filter_by(type=type_code)
+        
+        existing = {(summary.type, summary.content_id): summary for summary in existing_query}
+        drifted = 0
+        for row in query:
+            key = (row[0], row[1])
+            values = {
+                'rating_sum': int(row[2] or 0),
+                'rating_count': int(row[3] or 0),
+                **{f'rating_{score}': int(row[3 + score] or 0) for score in range(1, 6)},
+            }
+            summary = existing.pop(key, None)
+            if summary is None:
+                summary = cls(type=key[0], content_id=key[1])
+                db.session.add(summary)
+                drifted += 1
+            elif any(getattr(summary, name) != value for name, value in values.items()):
+                drifted += 1
+            for name, value in values.items():
+                setattr(summary, name, value)
+        
+        # 已没有任何评分的内容
+        for summary in existing.values():
+            if summary.rating_count:
+                drifted += 1
+            db.session.delete(summary)
+        
+        return drifted
+
 class CommentLike(db.Model):
     """评论点赞模型"""
     __tablename__ = 'comment_likes'
@@ -57,6 +186,12 @@ class Comment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # 按文章 / 项目取已审核的评论（游标翻页）
+    __table_args__ = (
+        db.Index('ix_comments_post_thread', 'post_id', 'is_approved', 'created_at', 'id'),
+        db.Index('ix_comments_project_thread', 'project_id', 'is_approved', 'created_at', 'id'),
+    )
+    
     # 关联关系
     user = db.relationship('User', backref=db.backref('comments', lazy='dynamic'))
     post = db.relationship('Post', backref=db.backref('comments', lazy='dynamic'))
@@ -102,6 +237,11 @@ class CommentReply(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # 按评论取已审核的回复线程（前几条 + 游标翻页）
+    __table_args__ = (
+        db.Index('ix_comment_replies_approved_thread', 'comment_id', 'is_approved', 'created_at', 'id'),
+    )
+    
     # 关联关系
     user = db.relationship('User', backref=db.backref('comment_replies', lazy='dynamic'))
     
@@ -14,6 +14,13 @@ class Message(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     read_at = db.Column(db.DateTime, nullable=True)  # 阅读时间
     replied_at = db.Column(db.DateTime, nullable=True)  # 回复时间
+    
+    # 后台留言列表（全部 / 按状态筛选）、统计未读留言；用户按邮箱查看自己的留言
+    __table_args__ = (
+        db.Index('ix_message_created', 'created_at'),
+        db.Index('ix_message_status_created', 'status', 'created_at'),
+        db.Index('ix_message_email_created', 'email', 'created_at'),
+    )
 
     def __repr__(self):
         return f'<Message {self.subject}>'
@@ -4,7 +4,7 @@ from datetime import datetime
 class MessageReply(db.Model):
     """消息回复模型"""
     id = db.Column(db.Integer, primary_key=True)
-    message_id = db.Column(db.Integer, db.ForeignKey('message.id'), nullable=False)
+    message_id = db.Column(db.Integer, db.ForeignKey('message.id'), nullable=False, index=True)
     reply_content = db.Column(db.Text, nullable=False)
     reply_type = db.Column(db.String(20), default='admin')  # admin, user
     sender_name = db.Column(db.String(100), nullable=True)  # 发送者姓名
@@ -1,5 +1,5 @@
 from datetime import datetime
-from app.models.user import db
+from app.models.user import db, User
 
 
 class Notification(db.Model):
@@ -27,6 +27,15 @@ class Notification(db.Model):
     # 关联关系
     user = db.relationship('User', foreign_keys=[user_id], backref=db.backref('notifications', lazy='dynamic'))
     sender = db.relationship('User', foreign_keys=[sender_id], backref=db.backref('sent_notifications', lazy='dynamic'))
+    # 合并通知的参与用户（点赞、收藏、评分）
+    actors = db.relationship('NotificationActor', backref='notification', lazy='dynamic',
+                             cascade='all, delete-orphan')
+    
+    # 通知列表（按时间倒序）、未读通知统计和全部标为已读
+    __table_args__ = (
+        db.Index('ix_notifications_user_created', 'user_id', 'created_at'),
+        db.Index('ix_notifications_user_unread', 'user_id', 'is_read', 'created_at'),
+    )
     
     def __repr__(self):
         return f'<Notification {self.id}>'
@@ -140,4 +149,78 @@ class Notification(db.Model):
             related_url=f'/contact',  # 跳转到联系页面
             sender_name=admin_name
         )
-        return notification
\ No newline at end of file
+        return notification
+
+
+class NotificationActor(db.Model):
+    """合并通知的参与用户 - 同一条点赞 / 收藏 / 评分通知中每个用户只记录一次"""
+    __tablename__ = 'notification_actors'
+
+    id = db.Column(db.Integer, primary_key=True)
+    notification_id = db.Column(db.Integer, db.ForeignKey('notifications.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('notification_id', 'user_id', name='unique_notification_actor'),
+    )
+
+    def __repr__(self):
+        return f'<NotificationActor {self.notification_id}:{self.user_id}>'
+
+
+class NotificationCounter(db.Model):
+    """用户未读通知计数 - 随通知的新增、已读、删除在同一事务中增减，查询未读数时不再统计通知表"""
+    __tablename__ = 'notification_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    unread = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<NotificationCounter {self.user_id}: {self.unread}>'
+
+    @classmethod
+    def rebuild(cls):
+        """根据通知表重新统计所有用户的未读数，返回与重新统计结果不一致的计数数"""
+        actual = dict(db.session.query(Notification.user_id, db.func.count(Notification.id)).filter(
+            Notification.is_read == False
+        ).group_by(Notification.user_id))
+
+        drifted = 0
+        for counter in cls.query:
+            unread = actual.pop(counter.user_id, 0)
+            if counter.unread != unread:
+                counter.unread = unread
+                drifted += 1
+        # 没有计数记录的用户（升级前注册）一并补齐，之后查询未读数都只需按主键读取
+        existing = {user_id for user_id, in db.session.query(cls.user_id)}
+        for user_id, in db.session.query(User.id):
+            if user_id not in existing:
+                unread = actual.pop(user_id, 0)
+                db.session.add(cls(user_id=user_id, unread=unread))
+                drifted += int(unread > 0)
+        return drifted
+
+
+class NotificationArchive(db.Model):
+    """归档的通知 - 超过保留期的已读通知移出通知表，只保留标题、类型、关联对象和时间"""
+    __tablename__ = 'notification_archive'
+
+    id = db.Column(db.Integer, primary_key=True)  # 原通知ID
+    user_id = db.Column(db.Integer, nullable=False)
+    type = db.Column(db.String(50), nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    related_id = db.Column(db.Integer, nullable=True)
+    related_type = db.Column(db.String(20), nullable=True)
+    sender_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=True)
+    read_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_notification_archive_user_created', 'user_id', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<NotificationArchive {self.id}>'
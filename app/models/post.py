@@ -1,4 +1,5 @@
 from .user import db
+from .tag import Tag, post_tags
 from datetime import datetime
 import re
 
@@ -22,8 +23,24 @@ class Post(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
+    # 已发布文章列表（按时间游标翻页）、热门文章和后台的全部文章列表
+    __table_args__ = (
+        db.Index('ix_post_created', 'created_at'),
+        db.Index('ix_post_status_created', 'status', 'created_at', 'id'),
+        db.Index('ix_post_status_views', 'status', 'view_count'),
+    )
+    
     # 关联关系
     author = db.relationship('User', backref=db.backref('posts', lazy=True))
+    tag_items = db.relationship('Tag', secondary=post_tags, order_by=post_tags.c.tag_id,
+                                backref=db.backref('posts', lazy='dynamic'))
+    
+    # 列表查询截取的正文开头（见 list_options），未截取时为 None
+    _preview = db.query_expression()
+    
+    # 列表页不加载的大字段
+    LARGE_COLUMNS = ('content',)
+    PREVIEW_LENGTH = 300
     
     def __repr__(self):
         return f'<Post {self.title}>'
@@ -49,8 +66,44 @@ class Post(db.Model):
             return self.slug
         return self.generate_slug()
     
+    @property
+    def preview(self):
+        """列表页显示用的正文开头，完整加载的文章返回全文"""
+        if self._preview is not None:
+            return self._preview
+        return self.content
+    
+    @classmethod
+    def list_options(cls, preview_length=PREVIEW_LENGTH, with_author=True):
+        """列表查询的加载选项
+        
+        正文延迟加载，只在数据库中截取前 preview_length 个字符作为预览（为 0 时不截取）；
+        with_author 为 True 时同时联表加载作者，避免逐条查询。
+        """
+        options = [db.defer(getattr(cls, name)) for name in cls.LARGE_COLUMNS]
+        if preview_length:
+            options.append(db.with_expression(cls._preview, db.func.substr(cls.content, 1, preview_length)))
+        if with_author:
+            options.append(db.joinedload(cls.author))
+        return options
+    
     def get_tags_list(self):
         """获取标签列表"""
-        if self.tags:
-            return [tag.strip() for tag in self.tags.split(',')]
-        return [] 
\ No newline at end of file
+        if self.tag_items:
+            return [tag.name for tag in self.tag_items]
+        # 尚未迁移到标签表的旧数据
+        return Tag.parse_names(self.tags)
+    
+    def sync_tags(self):
+        """根据 tags 字段同步标签关联，并刷新受影响标签的已发布文章数"""
+        affected_ids = {tag.id for tag in self.tag_items}
+        self.tag_items = Tag.get_or_create_many(Tag.parse_names(self.tags))
+        db.session.flush()
+        affected_ids.update(tag.id for tag in self.tag_items)
+        Tag.refresh_counts(affected_ids)
+    
+    def clear_tags(self):
+        """删除文章前移除标签关联，并刷新受影响标签的文章数"""
+        affected_ids = {tag.id for tag in self.tag_items}
+        self.tag_items = []
+        Tag.refresh_counts(affected_ids) 
\ No newline at end of file
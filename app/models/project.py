@@ -28,9 +28,37 @@ class Project(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # 项目列表按状态、分类筛选，按时间倒序；后台的全部项目列表
+    __table_args__ = (
+        db.Index('ix_project_created', 'created_at'),
+        db.Index('ix_project_status_category_created', 'status', 'category', 'created_at'),
+    )
+    
+    # 列表查询截取的描述开头（见 list_options），未截取时为 None
+    _preview = db.query_expression()
+    
+    # 列表页不加载的大字段
+    LARGE_COLUMNS = ('description', 'features', 'challenges', 'lessons_learned')
+    PREVIEW_LENGTH = 300
+    
     def __repr__(self):
         return f'<Project {self.title}>'
     
+    @property
+    def preview(self):
+        """列表页显示用的描述开头，完整加载的项目返回全文"""
+        if self._preview is not None:
+            return self._preview
+        return self.description
+    
+    @classmethod
+    def list_options(cls, preview_length=PREVIEW_LENGTH):
+        """列表查询的加载选项：大字段延迟加载，描述只在数据库中截取前 preview_length 个字符（为 0 时不截取）"""
+        options = [db.defer(getattr(cls, name)) for name in cls.LARGE_COLUMNS]
+        if preview_length:
+            options.append(db.with_expression(cls._preview, db.func.substr(cls.description, 1, preview_length)))
+        return options
+    
     def get_technologies_list(self):
         """获取技术栈列表"""
         if self.technologies:
@@ -0,0 +1,23 @@
+from datetime import datetime
+from app.models.user import db
+
+
+class RelatedContent(db.Model):
+    """相关内容模型 - 预先计算的每条内容的 Top-K 相似内容"""
+    __tablename__ = 'related_content'
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_type = db.Column(db.String(20), nullable=False)  # post, project
+    content_id = db.Column(db.Integer, nullable=False)  # 源内容ID
+    related_id = db.Column(db.Integer, nullable=False, index=True)  # 相似内容ID
+    position = db.Column(db.Integer, nullable=False)  # 排名，从0开始
+    score = db.Column(db.Float, nullable=False)  # 相似度得分
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # 详情页按 (类型, 内容ID) 取前 N 条，走单次索引查询
+    __table_args__ = (
+        db.UniqueConstraint('content_type', 'content_id', 'position', name='unique_related_position'),
+    )
+
+    def __repr__(self):
+        return f'<RelatedContent {self.content_type}:{self.content_id}->{self.related_id}>'
@@ -0,0 +1,75 @@
+from .user import db
+from datetime import datetime
+
+# 文章-标签关联表
+post_tags = db.Table(
+    'post_tags',
+    db.Column('post_id', db.Integer, db.ForeignKey('post.id'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id'), primary_key=True, index=True)
+)
+
+class Tag(db.Model):
+    """标签模型"""
+    __tablename__ = 'tags'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False, unique=True)  # 标签名称
+    post_count = db.Column(db.Integer, default=0, index=True)  # 已发布文章数
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Tag {self.name}>'
+
+    @staticmethod
+    def parse_names(tags_string):
+        """解析逗号分隔的标签字符串（去空、去重、保持顺序）"""
+        names = []
+        for name in (tags_string or '').split(','):
+            name = name.strip()[:50]
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    @classmethod
+    def get_or_create_many(cls, names):
+        """批量获取标签，不存在的自动创建"""
+        if not names:
+            return []
+        existing = {tag.name: tag for tag in cls.query.filter(cls.name.in_(names)).all()}
+        tags = []
+        for name in names:
+            tag = existing.get(name)
+            if tag is None:
+                tag = cls(name=name, post_count=0)
+                db.session.add(tag)
+                existing[name] = tag
+            tags.append(tag)
+        return tags
+
+    @classmethod
+    def refresh_counts(cls, tag_ids=None):
+        """重新统计标签的已发布文章数（tag_ids 为空时刷新全部）"""
+        from .post import Post
+
+        db.session.flush()
+        published_count = db.select(db.func.count()).select_from(
+            post_tags.join(Post, Post.id == post_tags.c.post_id)
+        ).where(
+            post_tags.c.tag_id == cls.id,
+            Post.status == 'published'
+        ).scalar_subquery()
+
+        query = cls.query
+        if tag_ids is not None:
+            if not tag_ids:
+                return
+            query = query.filter(cls.id.in_(tag_ids))
+        query.update({cls.post_count: published_count}, synchronize_session=False)
+
+    @classmethod
+    def get_popular(cls, limit=10):
+        """获取热门标签，返回 (名称, 文章数) 列表"""
+        tags = cls.query.filter(cls.post_count > 0).order_by(
+            cls.post_count.desc(), cls.name.asc()
+        ).limit(limit).all()
+        return [(tag.name, tag.post_count) for tag in tags]
@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+from app.models.user import db
+
+
+class UploadJob(db.Model):
+    """上传后处理任务模型 - 图片校验、重新编码、生成缩略图在后台进程中完成"""
+    __tablename__ = 'upload_jobs'
+
+    STATUS_QUEUED = 'queued'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    id = db.Column(db.String(32), primary_key=True)  # 任务ID（随机十六进制串）
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # image, avatar
+    status = db.Column(db.String(20), nullable=False, default=STATUS_QUEUED)
+    source_path = db.Column(db.String(500), nullable=False)  # 暂存的原始文件
+    extension = db.Column(db.String(10), nullable=True)  # 原始文件扩展名
+    original_name = db.Column(db.String(200), nullable=True)  # 原始文件名（不含扩展名）
+    attempts = db.Column(db.Integer, nullable=False, default=0)  # 已执行次数
+    owner = db.Column(db.String(100), nullable=True)  # 领取任务的进程（主机名:进程号）
+    result = db.Column(db.Text, nullable=True)  # 处理结果（JSON）
+    error = db.Column(db.String(500), nullable=True)  # 失败原因
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # 调度线程按状态和创建时间领取任务
+    __table_args__ = (
+        db.Index('ix_upload_jobs_status_created', 'status', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<UploadJob {self.id} {self.kind} {self.status}>'
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    def get_result(self):
+        return json.loads(self.result) if self.result else None
+
+    def to_dict(self):
+        """转换为字典格式（完成后包含处理结果）"""
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'result': self.get_result(),
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
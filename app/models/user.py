@@ -39,6 +39,13 @@ class User(UserMixin, db.Model):
     profile_public = db.Column(db.Boolean, default=True)  # 个人资料是否公开
     show_email = db.Column(db.Boolean, default=False)  # 是否显示邮箱
     show_phone = db.Column(db.Boolean, default=False)  # 是否显示电话
+    
+    # 按令牌查找用户；绝大多数用户没有令牌，只索引非空值（全部索引时统计信息会让查询规划器放弃使用索引）
+    __table_args__ = (
+        db.Index('ix_user_reset_password_token', 'reset_password_token',
+                 sqlite_where=db.text('reset_password_token IS NOT NULL'),
+                 postgresql_where=db.text('reset_password_token IS NOT NULL')),
+    )
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -3,6 +3,9 @@ from flask_login import login_required, current_user
 from app.models import Post, Project, Message, User, AboutContent, AboutContact, Skill
 from app.models.user import db
 from app.utils import admin_required
+from app.utils.search import index_document, remove_document
+from app.utils.related import refresh_related, remove_related
+from app.utils.http_cache import make_validators
 from datetime import datetime
 
 admin_bp = Blueprint('admin', __name__)
@@ -21,10 +24,10 @@ def admin():
     unread_messages = Message.query.filter_by(status='unread').count()
     
     # 最近的文章
-    recent_posts = Post.query.order_by(Post.created_at.desc()).limit(5).all()
+    recent_posts = Post.query.options(*Post.list_options(preview_length=0)).order_by(Post.created_at.desc()).limit(5).all()
     
     # 最近的项目
-    recent_projects = Project.query.order_by(Project.created_at.desc()).limit(5).all()
+    recent_projects = Project.query.options(*Project.list_options(preview_length=0)).order_by(Project.created_at.desc()).limit(5).all()
     
     # 最近的消息
     recent_messages = Message.query.order_by(Message.created_at.desc()).limit(5).all()
@@ -50,8 +53,8 @@ def admin_posts():
     status_filter = request.args.get('status', '')
     search_query = request.args.get('search', '')
     
-    # 构建查询
-    query = Post.query
+    # 构建查询（列表不加载正文）
+    query = Post.query.options(*Post.list_options(preview_length=0))
     
     # 状态筛选
     if status_filter:
@@ -120,6 +123,15 @@ def new_post():
             else:
                 post.slug = post.generate_slug()
             
+            # 同步标签关联与标签文章数
+            post.sync_tags()
+            
+            # 同步全文搜索索引
+            index_document('post', post)
+            
+            # 刷新相关内容推荐
+            refresh_related('post', post)
+            
             db.session.commit()
             
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -175,6 +187,15 @@ def edit_post(post_id):
             else:
                 post.slug = post.generate_slug()
             
+            # 同步标签关联与标签文章数
+            post.sync_tags()
+            
+            # 同步全文搜索索引
+            index_document('post', post)
+            
+            # 刷新相关内容推荐
+            refresh_related('post', post)
+            
             db.session.commit()
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return jsonify({'success': True, 'message': '文章更新成功！'})
@@ -198,6 +219,9 @@ def delete_post(post_id):
     post = Post.query.get_or_404(post_id)
     
     try:
+        remove_document('post', post.id)
+        remove_related('post', post.id)
+        post.clear_tags()
         db.session.delete(post)
         db.session.commit()
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -222,8 +246,8 @@ def admin_projects():
     status_filter = request.args.get('status', '')
     search_query = request.args.get('search', '')
     
-    # 构建查询
-    query = Project.query
+    # 构建查询（列表不加载描述等大字段）
+    query = Project.query.options(*Project.list_options(preview_length=0))
     
     # 状态筛选
     if status_filter:
@@ -299,6 +323,14 @@ def new_project():
             )
             
             db.session.add(project)
+            db.session.flush()  # 获取ID但不提交
+            
+            # 同步全文搜索索引
+            index_document('project', project)
+            
+            # 刷新相关内容推荐
+            refresh_related('project', project)
+            
             db.session.commit()
             
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -362,6 +394,12 @@ def edit_project(project_id):
             project.featured = featured
             project.updated_at = datetime.utcnow()
             
+            # 同步全文搜索索引
+            index_document('project', project)
+            
+            # 刷新相关内容推荐
+            refresh_related('project', project)
+            
             db.session.commit()
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return jsonify({'success': True, 'message': '项目更新成功！'})
@@ -384,6 +422,8 @@ def delete_project(project_id):
     project = Project.query.get_or_404(project_id)
     
     try:
+        remove_document('project', project.id)
+        remove_related('project', project.id)
         db.session.delete(project)
         db.session.commit()
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -999,8 +1039,23 @@ def delete_skill(skill_id):
 def api_skills():
     """API: 获取技能列表"""
     category = request.args.get('category')
+    
+    # 以记录数、最近更新时间和ID之和作为版本戳，新增、修改、删除都会改变
+    stamp_query = db.session.query(
+        db.func.count(Skill.id), db.func.max(Skill.updated_at), db.func.sum(Skill.id)
+    ).filter(Skill.is_active == True)
+    if category:
+        stamp_query = stamp_query.filter(Skill.category == category)
+    count, last_updated, id_sum = stamp_query.one()
+    validators = make_validators(
+        'skills', category, count, last_updated, id_sum, last_modified=last_updated, max_age=60, per_user=False
+    )
+    not_modified = validators.not_modified()
+    if not_modified:
+        return not_modified
+    
     skills = Skill.get_active_skills(category=category)
-    return jsonify([skill.to_dict() for skill in skills])
+    return validators.apply(jsonify([skill.to_dict() for skill in skills]))
 
 
 @admin_bp.route('/api/skills/categories')
@@ -1013,6 +1068,20 @@ def api_skill_categories():
     return jsonify([cat[0] for cat in categories if cat[0]])
 
 
+@admin_bp.route('/api/admin/cache-stats')
+@login_required
+@admin_required
+def api_cache_stats():
+    """API: 获取当前进程的缓存统计"""
+    from app.utils.filters import markdown_cache
+    from app.utils.page_cache import page_cache
+    return jsonify({
+        'success': True,
+        'markdown': markdown_cache.stats(),
+        'page': page_cache.stats()
+    })
+
+
 @admin_bp.route('/admin/messages/mark-all-read', methods=['POST'])
 @login_required
 @admin_required
@@ -3,8 +3,8 @@ from flask_login import login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from app.models import User
 from app.models.user import db
+from app.utils.storage import content_store
 import os
-import secrets
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -108,19 +108,8 @@ def register():
             
             # 如果有头像文件，保存头像
             if avatar_file and avatar_file.filename != '':
-                # 生成唯一文件名
-                filename = f"avatar_{user.id}_{secrets.token_hex(8)}.{avatar_file.filename.rsplit('.', 1)[1].lower()}"
-                
-                # 确保上传目录存在
-                upload_dir = os.path.join('app', 'static', 'uploads', 'avatars')
-                os.makedirs(upload_dir, exist_ok=True)
-                
-                # 保存文件
-                file_path = os.path.join(upload_dir, filename)
-                avatar_file.save(file_path)
-                
-                # 更新用户头像URL
-                user.avatar = f'/static/uploads/avatars/{filename}'
+                # 按内容摘要保存并更新用户头像URL
+                user.avatar = content_store.save(avatar_file.stream, avatar_file.filename.rsplit('.', 1)[1]).url
             
             db.session.commit()
             
@@ -3,8 +3,14 @@ import random
 from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
 from app.models.user import db
-from app.models import Post, Project, Comment, CommentReply, UserInteraction, CommentLike, Notification
-from datetime import datetime
+from app.models import Post, Project, Comment, CommentReply, RatingSummary, CommentLike, Notification, UploadJob
+from app.utils.pagination import keyset_paginate, encode_cursor
+from app.utils.page_cache import page_cache
+from app.utils.counters import toggle_interaction, toggle_comment_like, adjust_counter, set_rating, apply_rating_change
+from app.utils.interaction_index import interaction_index, TYPE_CODES
+from app.utils.images import identify, ImageProcessingError
+from app.utils.upload_queue import upload_queue, job_response
+from app.utils.notifications import coalesce_notification
 import os
 import uuid
 from werkzeug.utils import secure_filename
@@ -12,6 +18,20 @@ import pytz
 
 interaction_bp = Blueprint('interaction', __name__)
 
+# 批量查询互动状态时单次最多的内容数
+MAX_STATUS_ITEMS = 100
+
+# 评论列表中每条评论内嵌的回复数，其余回复通过回复接口分页加载
+REPLIES_PREVIEW = 3
+
+
+def _complete_image(job, result):
+    """编辑器图片处理完成：补充 alt 文本"""
+    result['alt'] = job.original_name
+
+
+upload_queue.register('image', on_complete=_complete_image)
+
 def to_china_time(utc_time):
     """将UTC时间转换为中国时区时间"""
     if utc_time is None:
@@ -27,6 +47,68 @@ def to_china_time(utc_time):
     
     return china_time.strftime('%Y-%m-%d %H:%M')
 
+
+def serialize_reply(reply):
+    """回复的 JSON 数据（评论列表中内嵌的回复与回复分页接口格式相同）"""
+    return {
+        'id': reply.id,
+        'content': reply.content,
+        'created_at': to_china_time(reply.created_at),
+        'user': {
+            'id': reply.user.id,
+            'username': reply.user.username,
+            'avatar': reply.user.avatar or f'/static/avatar/avatar{random.randint(1, 4)}.png'
+        }
+    }
+
+
+def _supports_window_functions():
+    """数据库是否支持窗口函数（SQLite 3.25+、MySQL 8+）"""
+    dialect = db.session.get_bind().dialect
+    if dialect.name == 'sqlite':
+        return dialect.dbapi.sqlite_version_info >= (3, 25)
+    if dialect.name in ('mysql', 'mariadb'):
+        return (dialect.server_version_info or (0,)) >= ((10, 2) if dialect.name == 'mariadb' else (8, 0))
+    return True
+
+
+def load_reply_previews(comment_ids, limit):
+    """获取每条评论的前 limit 条回复和已审核回复总数，返回 {评论ID: (回复列表, 回复总数)}"""
+    if not comment_ids:
+        return {}
+    
+    approved = db.and_(CommentReply.comment_id.in_(comment_ids), CommentReply.is_approved == True)
+    threads = {}
+    if _supports_window_functions():
+        # 按评论分组编号，只取每组前 limit 条，同时带出分组总数
+        ranked = db.session.query(
+            CommentReply.id,
+            db.func.row_number().over(
+                partition_by=CommentReply.comment_id,
+                order_by=(CommentReply.created_at, CommentReply.id)
+            ).label('position'),
+            db.func.count().over(partition_by=CommentReply.comment_id).label('total')
+        ).filter(approved).subquery()
+        rows = db.session.query(CommentReply, ranked.c.total).options(
+            db.joinedload(CommentReply.user)
+        ).join(ranked, ranked.c.id == CommentReply.id).filter(
+            ranked.c.position <= limit
+        ).order_by(CommentReply.created_at, CommentReply.id)
+        for reply, total in rows:
+            threads.setdefault(reply.comment_id, ([], total))[0].append(reply)
+        return threads
+    
+    # 不支持窗口函数时先统计总数，再逐条评论只取前 limit 条（一页评论数有限）
+    counts = dict(db.session.query(CommentReply.comment_id, db.func.count(CommentReply.id)).filter(
+        approved
+    ).group_by(CommentReply.comment_id))
+    for comment_id, total in counts.items():
+        replies = CommentReply.query.options(db.joinedload(CommentReply.user)).filter(
+            CommentReply.comment_id == comment_id, CommentReply.is_approved == True
+        ).order_by(CommentReply.created_at, CommentReply.id).limit(limit).all()
+        threads[comment_id] = (replies, total)
+    return threads
+
 @interaction_bp.route('/test', methods=['GET'])
 def test_api():
     """测试API是否正常工作"""
@@ -69,48 +151,25 @@ def toggle_like():
         else:
             return jsonify({'success': False, 'message': '类型错误'}), 400
         
-        # 查找或创建用户互动记录
-        interaction = UserInteraction.query.filter_by(
-            user_id=current_user.id,
-            content_id=content_id,
-            type=type_code
-        ).first()
-        
-        if interaction:
-            # 切换点赞状态
-            if interaction.like == 1:
-                interaction.like = 0
-                content.like_count = max(0, content.like_count - 1)
-                is_liked = False
-            else:
-                interaction.like = 1
-                content.like_count += 1
-                is_liked = True
-            interaction.updated_at = datetime.utcnow()
-        else:
-            # 创建新的互动记录
-            interaction = UserInteraction(
-                user_id=current_user.id,
-                content_id=content_id,
-                type=type_code,
-                like=1,
-                favorite=0,
-                rating=0
-            )
-            db.session.add(interaction)
-            content.like_count += 1
-            is_liked = True
+        # 原子切换点赞状态并增减计数
+        is_liked = toggle_interaction(current_user.id, content_id, type_code, 'like')
+        like_count = adjust_counter(type(content), content.id, 'like_count', 1 if is_liked else -1)
         
         # 创建点赞通知（如果是点赞操作且不是自己的内容）
-        if is_liked and content.author_id != current_user.id:
-            create_notification_for_like(interaction, content_type, content.title, content.author_id)
+        if is_liked:
+            create_notification_for_like(current_user, content_type, content)
         
         db.session.commit()
         
+        interaction_index.update(current_user.id, type_code, int(content_id), like=is_liked)
+        
+        # 计数变化后失效详情页的整页缓存
+        page_cache.invalidate_content(content_type, content)
+        
         return jsonify({
             'success': True,
             'is_liked': is_liked,
-            'like_count': content.like_count
+            'like_count': like_count
         })
         
     except Exception as e:
@@ -140,48 +199,25 @@ def toggle_favorite():
         else:
             return jsonify({'success': False, 'message': '类型错误'}), 400
         
-        # 查找或创建用户互动记录
-        interaction = UserInteraction.query.filter_by(
-            user_id=current_user.id,
-            content_id=content_id,
-            type=type_code
-        ).first()
-        
-        if interaction:
-            # 切换收藏状态
-            if interaction.favorite == 1:
-                interaction.favorite = 0
-                content.favorite_count = max(0, content.favorite_count - 1)
-                is_favorited = False
-            else:
-                interaction.favorite = 1
-                content.favorite_count += 1
-                is_favorited = True
-            interaction.updated_at = datetime.utcnow()
-        else:
-            # 创建新的互动记录
-            interaction = UserInteraction(
-                user_id=current_user.id,
-                content_id=content_id,
-                type=type_code,
-                like=0,
-                favorite=1,
-                rating=0
-            )
-            db.session.add(interaction)
-            content.favorite_count += 1
-            is_favorited = True
+        # 原子切换收藏状态并增减计数
+        is_favorited = toggle_interaction(current_user.id, content_id, type_code, 'favorite')
+        favorite_count = adjust_counter(type(content), content.id, 'favorite_count', 1 if is_favorited else -1)
         
         # 创建收藏通知（如果是收藏操作且不是自己的内容）
-        if is_favorited and content.author_id != current_user.id:
-            create_notification_for_favorite(interaction, content_type, content.title, content.author_id)
+        if is_favorited:
+            create_notification_for_favorite(current_user, content_type, content)
         
         db.session.commit()
         
+        interaction_index.update(current_user.id, type_code, int(content_id), favorite=is_favorited)
+        
+        # 计数变化后失效详情页的整页缓存
+        page_cache.invalidate_content(content_type, content)
+        
         return jsonify({
             'success': True,
             'is_favorited': is_favorited,
-            'favorite_count': content.favorite_count
+            'favorite_count': favorite_count
         })
         
     except Exception as e:
@@ -232,6 +268,9 @@ def add_comment():
         
         db.session.commit()
         
+        # 计数变化后失效详情页的整页缓存
+        page_cache.invalidate_content(content_type, content)
+        
         return jsonify({
             'success': True,
             'message': '评论添加成功',
@@ -248,61 +287,63 @@ def get_comments(content_id):
     """获取评论列表"""
     try:
         content_type = request.args.get('type', 'post')
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
+        cursor = request.args.get('cursor', '')
+        before = request.args.get('before', '')
+        per_page = min(max(request.args.get('per_page', 10, type=int), 1), 50)
         
         if content_type == 'post':
-            content = Post.query.get_or_404(content_id)
+            model = Post
         elif content_type == 'project':
-            content = Project.query.get_or_404(content_id)
+            model = Project
         else:
             return jsonify({'success': False, 'message': '类型错误'}), 400
         
+        # 只需要评论计数，不加载正文
+        comment_count = db.session.query(model.comment_count).filter(model.id == content_id).first_or_404()[0]
+        
         # 获取评论（只显示有内容的评论，不包括仅评分的记录）
-        comments = Comment.query.filter_by(
+        # 按 (created_at, id) 游标分页，总数直接使用内容上维护的评论计数
+        comments_query = Comment.query.options(db.joinedload(Comment.user)).filter_by(
             **{f'{content_type}_id': content_id},
             is_approved=True
-        ).filter(Comment.content != '').order_by(Comment.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+        ).filter(Comment.content != '')
+        comments = keyset_paginate(
+            comments_query, [Comment.created_at, Comment.id],
+            after=cursor, before=before, per_page=per_page,
+            total=comment_count or 0
         )
         
+        # 一次查询取出本页每条评论的前几条回复和回复总数，一次查询取出当前用户点赞过的评论
+        comment_ids = [comment.id for comment in comments.items]
+        reply_threads = load_reply_previews(comment_ids, REPLIES_PREVIEW)
+        liked_ids = set()
+        if comment_ids and current_user.is_authenticated:
+            liked_ids = {row[0] for row in db.session.query(CommentLike.comment_id).filter(
+                CommentLike.user_id == current_user.id,
+                CommentLike.comment_id.in_(comment_ids)
+            )}
+        
         comments_data = []
         for comment in comments.items:
             i = random.randint(1, 4)
             
-            # 获取评论的回复
-            replies = CommentReply.query.filter_by(comment_id=comment.id, is_approved=True).order_by(CommentReply.created_at.asc()).all()
-            replies_data = []
-            for reply in replies:
-                reply_i = random.randint(1, 4)
-                replies_data.append({
-                    'id': reply.id,
-                    'content': reply.content,
-                    'created_at': to_china_time(reply.created_at),
-                    'user': {
-                        'id': reply.user.id,
-                        'username': reply.user.username,
-                        'avatar': reply.user.avatar or f'/static/avatar/avatar{reply_i}.png'
-                    }
-                })
+            replies, replies_count = reply_threads.get(comment.id, ([], 0))
+            replies_data = [serialize_reply(reply) for reply in replies]
             
-            # 检查当前用户是否已点赞此评论
-            is_liked = False
-            if current_user.is_authenticated:
-                like = CommentLike.query.filter_by(
-                    user_id=current_user.id,
-                    comment_id=comment.id
-                ).first()
-                is_liked = like is not None
+            # 还有未显示的回复时返回游标，前端通过回复接口继续加载
+            replies_cursor = None
+            if replies_count > len(replies):
+                replies_cursor = encode_cursor([replies[-1].created_at, replies[-1].id])
             
             comments_data.append({
                 'id': comment.id,
                 'content': comment.content,
                 'created_at': to_china_time(comment.created_at),
                 'replies': replies_data,
-                'replies_count': len(replies_data),
+                'replies_count': replies_count,
+                'replies_cursor': replies_cursor,
                 'like_count': comment.like_count or 0,
-                'is_liked': is_liked,
+                'is_liked': comment.id in liked_ids,
                 'user': {
                     'id': comment.user.id,
                     'username': comment.user.username,
@@ -313,14 +354,7 @@ def get_comments(content_id):
         return jsonify({
             'success': True,
             'comments': comments_data,
-            'pagination': {
-                'page': page,
-                'pages': comments.pages,
-                'per_page': per_page,
-                'total': comments.total,
-                'has_next': comments.has_next,
-                'has_prev': comments.has_prev
-            }
+            'pagination': comments.to_dict()
         })
         
     except Exception as e:
@@ -342,31 +376,40 @@ def get_user_status(content_id):
         else:
             return jsonify({'success': False, 'message': '类型错误'}), 400
         
-        # 获取用户互动记录
-        interaction = UserInteraction.query.filter_by(
-            user_id=current_user.id,
-            content_id=content_id,
-            type=type_code
-        ).first()
-        
-        if interaction:
-            is_liked = interaction.like == 1
-            is_favorited = interaction.favorite == 1
-            user_rating = interaction.rating if interaction.rating > 0 else None
-        else:
-            is_liked = False
-            is_favorited = False
-            user_rating = None
+        # 从内存中的用户互动索引读取状态
+        status = interaction_index.get(current_user.id).status(type_code, content_id)
+        
+        return jsonify({'success': True, **status})
+        
+    except Exception as e:
+        current_app.logger.error(f"获取用户状态失败: {str(e)}")
+        return jsonify({'success': False, 'message': '获取状态失败'}), 500
+
+@interaction_bp.route('/user-status')
+@login_required
+def get_user_statuses():
+    """批量获取用户对多条内容的交互状态
+    
+    参数 items 为逗号分隔的 类型:ID 列表，如 post:1,post:2,project:3
+    """
+    try:
+        items = []
+        for item in filter(None, (part.strip() for part in request.args.get('items', '').split(','))):
+            content_type, _, content_id = item.partition(':')
+            if content_type not in TYPE_CODES or not content_id.isdigit():
+                return jsonify({'success': False, 'message': f'参数错误: {item}'}), 400
+            items.append((content_type, int(content_id)))
+        
+        if len(items) > MAX_STATUS_ITEMS:
+            return jsonify({'success': False, 'message': f'一次最多查询{MAX_STATUS_ITEMS}条内容'}), 400
         
         return jsonify({
             'success': True,
-            'is_liked': is_liked,
-            'is_favorited': is_favorited,
-            'user_rating': user_rating
+            'statuses': interaction_index.statuses(current_user.id, items)
         })
         
     except Exception as e:
-        current_app.logger.error(f"获取用户状态失败: {str(e)}")
+        current_app.logger.error(f"批量获取用户状态失败: {str(e)}")
         return jsonify({'success': False, 'message': '获取状态失败'}), 500
 
 @interaction_bp.route('/rating', methods=['POST'])
@@ -394,50 +437,29 @@ def save_rating():
         else:
             return jsonify({'success': False, 'message': '类型错误'}), 400
 
-        # 查找或创建用户互动记录
-        interaction = UserInteraction.query.filter_by(
-            user_id=current_user.id,
-            content_id=content_id,
-            type=type_code
-        ).first()
-
-        if interaction:
-            # 更新现有评分
-            interaction.rating = rating
-            interaction.updated_at = datetime.utcnow()
-        else:
-            # 创建新的互动记录
-            interaction = UserInteraction(
-                user_id=current_user.id,
-                content_id=content_id,
-                type=type_code,
-                like=0,
-                favorite=0,
-                rating=rating
-            )
-            db.session.add(interaction)
+        # 原子写入评分，取得写入前的评分
+        old_rating = set_rating(current_user.id, content_id, type_code, rating)
 
-        # 更新平均评分
-        interactions_with_rating = UserInteraction.query.filter_by(
-            content_id=content_id,
-            type=type_code
-        ).filter(UserInteraction.rating > 0).all()
-        
-        if interactions_with_rating:
-            total_rating = sum(i.rating for i in interactions_with_rating)
-            content.average_rating = round(total_rating / len(interactions_with_rating), 1)
-        else:
-            content.average_rating = 0.0
+        # 按评分差值增量更新评分汇总和平均评分
+        summary = apply_rating_change(type_code, content_id, old_rating, rating)
+        content.average_rating = summary.average
 
         # 创建评分通知（如果不是自己的内容）
-        if content.author_id != current_user.id:
-            create_notification_for_rating(interaction, content_type, content.title, content.author_id)
+        create_notification_for_rating(current_user, content_type, content, rating)
 
         db.session.commit()
+        
+        interaction_index.update(current_user.id, type_code, int(content_id), rating=rating)
+        
+        # 计数变化后失效详情页的整页缓存
+        page_cache.invalidate_content(content_type, content)
+        
         return jsonify({
             'success': True,
             'message': '评分保存成功',
-            'average_rating': content.average_rating
+            'average_rating': content.average_rating,
+            'rating_count': summary.rating_count,
+            'histogram': summary.histogram
         })
 
     except Exception as e:
@@ -445,6 +467,26 @@ def save_rating():
         current_app.logger.error(f"评分保存失败: {e}")
         return jsonify({'success': False, 'message': '服务器错误'}), 500
 
+@interaction_bp.route('/rating/<int:content_id>')
+def get_rating_summary(content_id):
+    """获取内容的评分汇总（平均分、评分人数和分布）"""
+    try:
+        content_type = request.args.get('type', 'post')
+        
+        if content_type == 'post':
+            type_code = 1  # 1-博客
+        elif content_type == 'project':
+            type_code = 2  # 2-项目
+        else:
+            return jsonify({'success': False, 'message': '类型错误'}), 400
+        
+        summary = RatingSummary.get_or_empty(type_code, content_id)
+        return jsonify({'success': True, **summary.to_dict()})
+        
+    except Exception as e:
+        current_app.logger.error(f"获取评分汇总失败: {str(e)}")
+        return jsonify({'success': False, 'message': '获取评分失败'}), 500
+
 # 评论编辑功能已移除 - 评论不可修改
 
 @interaction_bp.route('/comment/<int:comment_id>', methods=['DELETE'])
@@ -483,6 +525,9 @@ def delete_comment(comment_id):
 
         db.session.commit()
         
+        # 计数变化后失效详情页的整页缓存
+        page_cache.invalidate_content(content_type, content)
+        
         return jsonify({
             'success': True,
             'message': '评论删除成功',
@@ -551,63 +596,55 @@ def upload_image():
             ext = mime_to_ext.get(file.content_type, '.jpg')
             filename = f"{filename}{ext}"
         
-        # 添加时间戳避免重名
-        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
         name, ext = os.path.splitext(filename)
-        filename = f"{name}_{timestamp}{ext}"
         
-        # 确保上传目录存在
-        upload_dir = os.path.join(current_app.static_folder, 'uploads', 'images')
-        os.makedirs(upload_dir, exist_ok=True)
+        # 只检查文件头，去除 EXIF、重新编码和生成缩略图在后台进程中完成
+        try:
+            identify(file.stream)
+        except ImageProcessingError as e:
+            current_app.logger.warning(f"图片识别失败: {e}")
+            return jsonify({'success': False, 'message': '无法识别的图片文件'}), 400
         
-        # 保存文件
-        file_path = os.path.join(upload_dir, filename)
-        current_app.logger.info(f"保存文件到: {file_path}")
-        file.save(file_path)
+        job = upload_queue.enqueue('image', file, current_user.id, name, ext)
+        current_app.logger.info(f"图片上传任务 {job.id}: {file_size} 字节，状态 {job.status}")
         
-        # 返回图片URL
-        image_url = f"/static/uploads/images/{filename}"
-        current_app.logger.info(f"图片上传成功: {image_url}")
-        
-        return jsonify({
-            'success': True,
-            'message': '图片上传成功',
-            'url': image_url,
-            'alt': name
-        })
+        # 处理完成后返回主图URL和 srcset，否则返回任务ID
+        payload, status_code = job_response(job, '图片上传成功')
+        return jsonify(payload), status_code
         
     except Exception as e:
         current_app.logger.error(f"图片上传失败: {e}", exc_info=True)
         return jsonify({'success': False, 'message': f'上传失败: {str(e)}'}), 500
 
+@interaction_bp.route('/upload-jobs/<job_id>', methods=['GET'])
+@login_required
+def upload_job_status(job_id):
+    """查询上传处理任务的状态，完成后 result 中包含图片URL"""
+    job = db.session.get(UploadJob, job_id)
+    if job is None or (job.user_id != current_user.id and not current_user.is_admin):
+        return jsonify({'success': False, 'message': '任务不存在'}), 404
+    return jsonify({'success': True, **job.to_dict()})
+
 @interaction_bp.route('/comments/<int:comment_id>/replies', methods=['GET'])
 def get_comment_replies(comment_id):
-    """获取评论的回复列表"""
+    """获取评论的回复列表（按时间正序游标分页，cursor 为上一页返回的 next_cursor）"""
     try:
-        comment = Comment.query.get_or_404(comment_id)
-        replies = CommentReply.query.filter_by(comment_id=comment_id, is_approved=True).order_by(CommentReply.created_at.asc()).all()
-        
-        replies_data = []
-        for reply in replies:
-            # 获取用户头像
-            avatar_url = '/static/images/default-avatar.png'
-            if reply.user.avatar:
-                avatar_url = f'/static/uploads/avatars/{reply.user.avatar}'
-            
-            replies_data.append({
-                'id': reply.id,
-                'content': reply.content,
-                'created_at': to_china_time(reply.created_at),
-                'user': {
-                    'id': reply.user.id,
-                    'username': reply.user.username,
-                    'avatar': avatar_url
-                }
-            })
+        cursor = request.args.get('cursor', '')
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 50)
+        
+        Comment.query.get_or_404(comment_id)
+        replies_query = CommentReply.query.options(db.joinedload(CommentReply.user)).filter_by(
+            comment_id=comment_id, is_approved=True
+        )
+        replies = keyset_paginate(
+            replies_query, [CommentReply.created_at, CommentReply.id],
+            after=cursor, per_page=per_page, descending=False
+        )
         
         return jsonify({
             'success': True,
-            'replies': replies_data
+            'replies': [serialize_reply(reply) for reply in replies.items],
+            'pagination': replies.to_dict()
         })
         
     except Exception as e:
@@ -648,11 +685,6 @@ def add_comment_reply(comment_id):
         
         db.session.commit()
         
-        # 获取用户头像
-        avatar_url = '/static/images/default-avatar.png'
-        if current_user.avatar:
-            avatar_url = f'/static/uploads/avatars/{current_user.avatar}'
-        
         return jsonify({
             'success': True,
             'message': '回复成功',
@@ -663,7 +695,7 @@ def add_comment_reply(comment_id):
                 'user': {
                     'id': current_user.id,
                     'username': current_user.username,
-                    'avatar': avatar_url
+                    'avatar': current_user.get_avatar_url()
                 }
             }
         })
@@ -715,29 +747,14 @@ def comment_like():
         if not comment:
             return jsonify({'success': False, 'message': '评论不存在'}), 404
         
-        # 检查是否已经点赞
-        existing_like = CommentLike.query.filter_by(
-            user_id=current_user.id,
-            comment_id=comment_id
-        ).first()
-        
-        if existing_like:
-            # 取消点赞
-            db.session.delete(existing_like)
-            comment.like_count = max(0, comment.like_count - 1)
-            liked = False
-            message = '取消点赞成功'
-        else:
-            # 添加点赞
-            like = CommentLike(
-                user_id=current_user.id,
-                comment_id=comment_id
-            )
-            db.session.add(like)
-            comment.like_count += 1
-            liked = True
-            message = '点赞成功'
-            
+        # 原子切换点赞记录并增减计数（并发重复点赞时记录不变，计数也不变）
+        liked, changed = toggle_comment_like(current_user.id, comment_id)
+        like_count = comment.like_count or 0
+        if changed:
+            like_count = adjust_counter(Comment, comment_id, 'like_count', 1 if liked else -1)
+        message = '点赞成功' if liked else '取消点赞成功'
+        
+        if liked and changed:
             # 创建点赞通知（如果不是自己的评论）
             if comment.user_id != current_user.id:
                 # 获取评论所属的文章或项目
@@ -764,7 +781,7 @@ def comment_like():
             'success': True,
             'message': message,
             'liked': liked,
-            'like_count': comment.like_count
+            'like_count': like_count
         })
         
     except Exception as e:
@@ -801,43 +818,33 @@ def create_notification_for_reply(reply, comment, content_type, content_title, c
         current_app.logger.error(f"创建回复通知失败: {e}")
 
 
-def create_notification_for_like(interaction, content_type, content_title, content_author_id):
-    """为点赞创建通知"""
+def create_notification_for_like(actor, content_type, content):
+    """为点赞创建通知（同一内容的点赞在合并窗口内合并为一条）"""
     try:
         # 如果不是自己的内容，创建通知
-        if content_author_id != interaction.user_id:
-            notification = Notification.create_like_notification(
-                content_author_id, interaction.user.username, content_type,
-                interaction.content_id, content_title
-            )
-            db.session.add(notification)
+        if content.author_id != actor.id:
+            coalesce_notification(content.author_id, 'like', content_type, content.id, content.title, actor)
     except Exception as e:
         current_app.logger.error(f"创建点赞通知失败: {e}")
 
 
-def create_notification_for_favorite(interaction, content_type, content_title, content_author_id):
-    """为收藏创建通知"""
+def create_notification_for_favorite(actor, content_type, content):
+    """为收藏创建通知（同一内容的收藏在合并窗口内合并为一条）"""
     try:
         # 如果不是自己的内容，创建通知
-        if content_author_id != interaction.user_id:
-            notification = Notification.create_favorite_notification(
-                content_author_id, interaction.user.username, content_type,
-                interaction.content_id, content_title
-            )
-            db.session.add(notification)
+        if content.author_id != actor.id:
+            coalesce_notification(content.author_id, 'favorite', content_type, content.id, content.title, actor)
     except Exception as e:
         current_app.logger.error(f"创建收藏通知失败: {e}")
 
 
-def create_notification_for_rating(interaction, content_type, content_title, content_author_id):
-    """为评分创建通知"""
+def create_notification_for_rating(actor, content_type, content, rating):
+    """为评分创建通知（同一内容的评分在合并窗口内合并为一条）"""
     try:
         # 如果不是自己的内容，创建通知
-        if content_author_id != interaction.user_id:
-            notification = Notification.create_rating_notification(
-                content_author_id, interaction.user.username, interaction.rating,
-                content_type, interaction.content_id, content_title
+        if content.author_id != actor.id:
+            coalesce_notification(
+                content.author_id, 'rating', content_type, content.id, content.title, actor, rating=rating
             )
-            db.session.add(notification)
     except Exception as e:
         current_app.logger.error(f"创建评分通知失败: {e}")
@@ -1,14 +1,23 @@
 from flask import Blueprint, render_template, request, redirect, url_for, jsonify, make_response
 from flask_login import login_required, current_user
-from app.models import Post, Project, Message, AboutContent, AboutContact, Version, Skill
+from app.models import Post, Project, Message, AboutContent, AboutContact, Version, Skill, Tag
+from app.models.tag import post_tags
 from app.models.user import db
 from app.utils.pdf_generator import generate_about_pdf
+from app.utils.search import apply_search, search_rank
+from app.utils.pagination import keyset_paginate, count_cache
+from app.utils.related import get_related
+from app.utils.view_counter import view_counter
+from app.utils.http_cache import make_validators
 import re
 import urllib.parse
 from datetime import datetime
 
 main_bp = Blueprint('main', __name__)
 
+# 搜索结果高亮片段所用的正文预览长度
+SEARCH_PREVIEW_LENGTH = 2000
+
 @main_bp.route('/')
 def index():
     """首页"""
@@ -26,10 +35,22 @@ def about():
     # 获取关于页面主内容
     about_content = AboutContent.query.filter_by(section='main_content', is_active=True).first()
     
+    # 内容未变化时直接返回 304
+    validators = make_validators(
+        'about',
+        about_content.id if about_content else None,
+        about_content.updated_at if about_content else None,
+        last_modified=about_content.updated_at if about_content else None,
+        max_age=300
+    )
+    not_modified = validators.not_modified()
+    if not_modified:
+        return not_modified
+    
     page_title = about_content.title if about_content else '关于我'
     page_content = about_content.content if about_content else ''
     
-    return render_template('frontend/about.html', page_title=page_title, page_content=page_content)
+    return validators.apply(render_template('frontend/about.html', page_title=page_title, page_content=page_content))
 
 @main_bp.route('/about/pdf')
 def about_pdf():
@@ -45,6 +66,15 @@ def about_pdf():
         if not page_content:
             return jsonify({'error': '暂无内容可生成PDF'}), 404
         
+        # 内容未变化时直接返回 304，跳过PDF生成
+        validators = make_validators(
+            'about-pdf', about_content.id, about_content.updated_at,
+            last_modified=about_content.updated_at, max_age=3600, per_user=False
+        )
+        not_modified = validators.not_modified()
+        if not_modified:
+            return not_modified
+        
         # 生成PDF
         pdf_bytes = generate_about_pdf(
             page_title=page_title,
@@ -68,7 +98,7 @@ def about_pdf():
         response.headers['Content-Disposition'] = f'attachment; filename="{filename}"; filename*=UTF-8\'\'{encoded_filename}'
         response.headers['Content-Length'] = len(pdf_bytes)
         
-        return response
+        return validators.apply(response)
         
     except Exception as e:
         print(f"生成PDF错误: {e}")
@@ -88,15 +118,9 @@ def projects():
         query = query.filter_by(category=category)
     
     if search:
-        query = query.filter(
-            db.or_(
-                Project.title.contains(search),
-                Project.description.contains(search),
-                Project.short_description.contains(search)
-            )
-        )
+        query = apply_search(query, 'project', search)
     
-    projects = query.order_by(Project.created_at.desc()).all()
+    projects = query.options(*Project.list_options()).order_by(Project.created_at.desc()).all()
     
     # 获取所有分类
     categories = db.session.query(Project.category).filter(
@@ -113,24 +137,30 @@ def project_detail(project_id):
     """项目详情页面"""
     project = Project.query.get_or_404(project_id)
     
-    # 增加浏览次数
-    project.view_count += 1
-    db.session.commit()
+    # 增加浏览次数（缓冲后批量写回）
+    view_counter.record('project', project.id)
     
-    # 获取相关项目
-    related_projects = Project.query.filter(
-        Project.category == project.category,
-        Project.id != project.id,
-        Project.status == 'active'
-    ).order_by(Project.created_at.desc()).limit(3).all()
+    # 内容未变化时直接返回 304（浏览量照常记录）
+    validators = make_validators(
+        'project', project.id, project.updated_at, project.like_count, project.favorite_count,
+        project.comment_count, project.average_rating, last_modified=project.updated_at
+    )
+    not_modified = validators.not_modified()
+    if not_modified:
+        return not_modified
+    
+    # 获取相关项目（读取预计算的相似内容）
+    related_projects = get_related('project', project, limit=3)
     
-    return render_template('frontend/project_detail.html', project=project, related_projects=related_projects)
+    return validators.apply(render_template('frontend/project_detail.html', project=project, related_projects=related_projects))
 
 @main_bp.route('/blog')
 def blog():
     """博客页面"""
-    page = request.args.get('page', 1, type=int)
+    after = request.args.get('after', '')
+    before = request.args.get('before', '')
     category = request.args.get('category', '')
+    tag = request.args.get('tag', '')
     search = request.args.get('search', '')
     
     # 构建查询
@@ -139,17 +169,19 @@ def blog():
     if category:
         query = query.filter_by(category=category)
     
+    if tag:
+        query = query.join(post_tags, post_tags.c.post_id == Post.id).join(
+            Tag, Tag.id == post_tags.c.tag_id
+        ).filter(Tag.name == tag)
+    
     if search:
-        query = query.filter(
-            db.or_(
-                Post.title.contains(search),
-                Post.content.contains(search),
-                Post.excerpt.contains(search)
-            )
-        )
+        query = apply_search(query, 'post', search)
     
-    posts = query.order_by(Post.created_at.desc()).paginate(
-        page=page, per_page=10, error_out=False
+    # 游标分页（按发布时间倒序），总数走短时缓存
+    total = count_cache.get(('blog', category, tag, search), query)
+    posts = keyset_paginate(
+        query.options(*Post.list_options()), [Post.created_at, Post.id],
+        after=after, before=before, per_page=10, total=total
     )
     
     # 获取所有分类
@@ -160,20 +192,12 @@ def blog():
     categories = [cat[0] for cat in categories]
     
     # 获取热门文章（按浏览次数排序）
-    popular_posts = Post.query.filter_by(status='published').order_by(
-        Post.view_count.desc()
-    ).limit(5).all()
+    popular_posts = Post.query.filter_by(status='published').options(
+        *Post.list_options(preview_length=0, with_author=False)
+    ).order_by(Post.view_count.desc()).limit(5).all()
     
-    # 获取所有标签
-    all_tags = []
-    for post in Post.query.filter_by(status='published').all():
-        if post.tags:
-            all_tags.extend([tag.strip() for tag in post.tags.split(',')])
-    
-    # 统计标签出现次数
-    from collections import Counter
-    tag_counts = Counter(all_tags)
-    popular_tags = tag_counts.most_common(10)  # 取前10个热门标签
+    # 获取热门标签（标签表中维护了已发布文章数）
+    popular_tags = Tag.get_popular(10)
     
     return render_template('frontend/blog.html', 
                          posts=posts, 
@@ -181,6 +205,7 @@ def blog():
                          popular_posts=popular_posts,
                          popular_tags=popular_tags,
                          current_category=category, 
+                         current_tag=tag,
                          search=search)
 
 @main_bp.route('/blog/post/<slug>')
@@ -188,18 +213,22 @@ def post_detail(slug):
     """文章详情页面"""
     post = Post.query.filter_by(slug=slug, status='published').first_or_404()
     
-    # 增加浏览次数
-    post.view_count += 1
-    db.session.commit()
+    # 增加浏览次数（缓冲后批量写回）
+    view_counter.record('post', post.id)
     
-    # 获取相关文章
-    related_posts = Post.query.filter(
-        Post.category == post.category,
-        Post.id != post.id,
-        Post.status == 'published'
-    ).order_by(Post.created_at.desc()).limit(3).all()
+    # 内容未变化时直接返回 304（浏览量照常记录）
+    validators = make_validators(
+        'post', post.id, post.updated_at, post.like_count, post.favorite_count,
+        post.comment_count, post.average_rating, last_modified=post.updated_at
+    )
+    not_modified = validators.not_modified()
+    if not_modified:
+        return not_modified
+    
+    # 获取相关文章（读取预计算的相似内容）
+    related_posts = get_related('post', post, limit=3)
     
-    return render_template('frontend/post_detail.html', post=post, related_posts=related_posts)
+    return validators.apply(render_template('frontend/post_detail.html', post=post, related_posts=related_posts))
 
 @main_bp.route('/contact', methods=['GET', 'POST'])
 def contact():
@@ -281,7 +310,8 @@ def contact_message_detail(message_id):
 def search():
     """全局搜索页面"""
     query = request.args.get('q', '').strip()
-    page = request.args.get('page', 1, type=int)
+    after = request.args.get('after', '')
+    before = request.args.get('before', '')
     
     results = {
         'posts': [],
@@ -291,31 +321,24 @@ def search():
     
     if query:
         # 搜索文章
-        posts_query = Post.query.filter(
-            db.or_(
-                Post.title.contains(query),
-                Post.content.contains(query),
-                Post.excerpt.contains(query)
-            ),
-            Post.status == 'published'
-        )
+        posts_query = apply_search(Post.query.filter(Post.status == 'published'), 'post', query)
         
-        posts = posts_query.order_by(Post.created_at.desc()).paginate(
-            page=page, per_page=5, error_out=False
+        # 游标分页：有全文索引时以相关度为排序键，否则按时间倒序
+        rank = search_rank('post', query)
+        sort_keys = [rank, Post.id] if rank is not None else [Post.created_at, Post.id]
+        # 高亮片段从正文开头截取，预览取长一些以便包含关键词
+        posts = keyset_paginate(
+            posts_query.options(*Post.list_options(preview_length=SEARCH_PREVIEW_LENGTH)), sort_keys, after=after, before=before, per_page=5,
+            descending=rank is None, total=count_cache.get(('search', query), posts_query)
         )
         results['posts'] = posts
         
         # 搜索项目
-        projects_query = Project.query.filter(
-            db.or_(
-                Project.title.contains(query),
-                Project.description.contains(query),
-                Project.short_description.contains(query)
-            ),
-            Project.status == 'active'
-        )
+        projects_query = apply_search(Project.query.filter(Project.status == 'active'), 'project', query)
         
-        projects = projects_query.order_by(Project.created_at.desc()).limit(5).all()
+        projects = projects_query.options(
+            *Project.list_options(preview_length=SEARCH_PREVIEW_LENGTH)
+        ).order_by(Project.created_at.desc()).limit(5).all()
         results['projects'] = projects
         
         # 计算总结果数
@@ -323,5 +346,4 @@ def search():
     
     return render_template('frontend/search.html', 
                          query=query, 
-                         results=results,
-                         current_page=page) 
\ No newline at end of file
+                         results=results) 
\ No newline at end of file
@@ -1,11 +1,19 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for
+from functools import partial
+
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, Response, stream_with_context
 from flask_login import login_required, current_user
 from app.models.user import db
-from app.models import Notification
+from app.models import Notification, Message
 from app.utils import admin_required
+from app.utils.notifications import delete_notifications, notification_selection
+from app.utils.unread_counter import unread_counter
+from app.utils.unread_events import unread_events
 
 notification_bp = Blueprint('notification', __name__)
 
+# 批量操作一次最多指定的通知ID数
+MAX_BATCH_IDS = 500
+
 @notification_bp.route('/notifications')
 @login_required
 def notifications():
@@ -40,12 +48,75 @@ def notifications():
 @login_required
 def unread_count():
     """获取未读消息数量"""
-    count = Notification.query.filter_by(
-        user_id=current_user.id, 
-        is_read=False
-    ).count()
+    return jsonify({'count': unread_counter.get(current_user.id)})
+
+def _badge_counts(user_id, is_admin):
+    """导航栏未读数（未读通知数，管理员另有未读留言数）"""
+    counts = {'notifications': unread_counter.get(user_id)}
+    if is_admin:
+        counts['messages'] = Message.query.filter_by(status='unread').count()
+    # 推送连接保持时间较长，查询后立即归还数据库连接
+    db.session.close()
+    return counts
+
+@notification_bp.route('/api/badges')
+@login_required
+def badges():
+    """导航栏需要的全部未读数；ETag 为未读数版本号，未变化时返回 304，不查询未读数"""
+    version = unread_events.event_id(unread_events.channels_for(current_user))
+    if request.if_none_match.contains_weak(version):
+        response = Response(status=304)
+    else:
+        response = jsonify({'success': True, **_badge_counts(current_user.id, current_user.is_admin)})
+    response.set_etag(version, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@notification_bp.route('/api/events')
+@login_required
+def events():
+    """SSE 推送未读数变化（断线重连时带 Last-Event-ID，版本未变化时不重新查询）"""
+    if not unread_events.acquire_waiter():
+        # 浏览器收到非 200 响应后不再重连，改用长轮询
+        return jsonify({'success': False, 'message': '推送连接已满'}), 503
+    
+    user_id, is_admin = current_user.id, current_user.is_admin
+    channels = unread_events.channels_for(current_user)
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    db.session.close()
+    
+    response = Response(
+        stream_with_context(unread_events.stream(channels, last_id, partial(_badge_counts, user_id, is_admin))),
+        mimetype='text/event-stream'
+    )
+    response.call_on_close(unread_events.release_waiter)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # 关闭 nginx 响应缓冲
+    return response
+
+@notification_bp.route('/api/events/poll')
+@login_required
+def poll_events():
+    """长轮询（SSE 不可用时使用）：since 为上次返回的事件ID，未变化时最多等待 EVENTS_POLL_TIMEOUT 秒"""
+    user_id, is_admin = current_user.id, current_user.is_admin
+    channels = unread_events.channels_for(current_user)
+    since = request.args.get('since')
+    db.session.close()
     
-    return jsonify({'count': count})
+    current = unread_events.event_id(channels)
+    if current == since:
+        if not unread_events.acquire_waiter():
+            # 等待名额已满，由浏览器延迟后再查询
+            return jsonify({'success': True, 'id': current, 'changed': False,
+                            'retry_after': unread_events.poll_timeout})
+        try:
+            current = unread_events.wait(channels, since, unread_events.poll_timeout)
+        finally:
+            unread_events.release_waiter()
+        if current == since:
+            return jsonify({'success': True, 'id': current, 'changed': False})
+    
+    return jsonify({'success': True, 'id': current, 'changed': True, **_badge_counts(user_id, is_admin)})
 
 @notification_bp.route('/api/notifications/mark-all-read', methods=['POST'])
 @login_required
@@ -56,13 +127,116 @@ def mark_all_read():
             user_id=current_user.id, 
             is_read=False
         ).update({'is_read': True, 'read_at': db.func.now()})
+        unread_counter.reset(current_user.id)
         
         db.session.commit()
+        # 批量更新不经过会话事件，手动通知未读数变化
+        unread_events.touch(current_user.id)
         return jsonify({'success': True, 'message': '所有消息已标记为已读'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': '操作失败'})
 
+def _batch_condition(data):
+    """解析批量操作的选择条件，返回 (条件, 错误信息)
+
+    请求参数（至少指定一项，多项同时满足）：
+    ids - 通知ID列表；before - 通知ID，选择列表中排在它之后（更早）的通知；
+    types - 通知类型列表或逗号分隔的字符串（与列表页的 type 筛选相同）。
+    """
+    ids = data.get('ids')
+    before = data.get('before')
+    types = data.get('types')
+
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            return None, '请选择要操作的消息'
+        if len(ids) > MAX_BATCH_IDS:
+            return None, f'一次最多操作 {MAX_BATCH_IDS} 条消息'
+        try:
+            ids = [int(notification_id) for notification_id in ids]
+        except (TypeError, ValueError):
+            return None, '参数错误'
+
+    if isinstance(types, str):
+        types = types.split(',')
+    if types is not None:
+        if not isinstance(types, list):
+            return None, '参数错误'
+        types = [str(notification_type).strip() for notification_type in types if str(notification_type).strip()]
+
+    if before is not None:
+        try:
+            before = int(before)
+        except (TypeError, ValueError):
+            return None, '参数错误'
+        # 按列表排序 (created_at, id) 定位，之后新到的通知不受影响
+        before = db.session.query(Notification.created_at, Notification.id).filter_by(
+            id=before, user_id=current_user.id
+        ).first()
+        if before is None:
+            return None, '消息不存在'
+
+    if ids is None and before is None and not types:
+        return None, '请选择要操作的消息'
+    return notification_selection(current_user.id, ids=ids, before=before, types=types), None
+
+@notification_bp.route('/api/notifications/batch-read', methods=['POST'])
+@login_required
+def batch_mark_read():
+    """批量标记为已读（一条 UPDATE），返回标记的条数和最新未读数"""
+    condition, error = _batch_condition(request.get_json(silent=True) or {})
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    
+    try:
+        notifications = Notification.__table__
+        updated = db.session.execute(notifications.update().where(
+            condition, notifications.c.is_read == False
+        ).values(is_read=True, read_at=db.func.now())).rowcount
+        if updated:
+            unread_counter.recount(current_user.id)
+        
+        db.session.commit()
+        if updated:
+            # 批量更新不经过会话事件，手动通知未读数变化
+            unread_events.touch(current_user.id)
+        return jsonify({
+            'success': True,
+            'message': f'已将 {updated} 条消息标记为已读',
+            'updated': updated,
+            'unread_count': unread_counter.get(current_user.id)
+        })
+    except Exception:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': '操作失败'})
+
+@notification_bp.route('/api/notifications/batch-delete', methods=['POST'])
+@login_required
+def batch_delete():
+    """批量删除（一条 DELETE，连同合并通知的参与用户记录），返回删除的条数和最新未读数"""
+    condition, error = _batch_condition(request.get_json(silent=True) or {})
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    
+    try:
+        deleted = delete_notifications(condition)
+        if deleted:
+            unread_counter.recount(current_user.id)
+        
+        db.session.commit()
+        if deleted:
+            unread_events.touch(current_user.id)
+        return jsonify({
+            'success': True,
+            'message': f'已删除 {deleted} 条消息',
+            'deleted': deleted,
+            'unread_count': unread_counter.get(current_user.id)
+        })
+    except Exception:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': '删除失败'})
+
 @notification_bp.route('/api/notifications/<int:notification_id>/read', methods=['POST'])
 @login_required
 def mark_as_read(notification_id):
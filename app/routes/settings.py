@@ -1,13 +1,32 @@
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify, flash
+from flask import Blueprint, render_template, request, redirect, url_for, jsonify, flash, current_app
 from flask_login import login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from app.models.user import db, User
+from app.models import UploadJob
+from app.utils.images import identify, ImageProcessingError, AVATAR_DIMENSION
+from app.utils.upload_queue import upload_queue, job_response
 from datetime import datetime
 import os
-import secrets
 
 settings_bp = Blueprint('settings', __name__)
 
+
+def _complete_avatar(job, result):
+    """头像处理完成：更新用户头像并删除旧版目录中的旧头像（摘要存储中的文件可能被其他用户共用，不删除）"""
+    user = db.session.get(User, job.user_id)
+    if user.avatar and '/static/uploads/avatars/' in user.avatar:
+        try:
+            old_avatar_path = os.path.join(current_app.static_folder, user.avatar.split('/static/', 1)[1])
+            if os.path.exists(old_avatar_path):
+                os.remove(old_avatar_path)
+        except Exception as e:
+            print(f"删除旧头像失败: {e}")
+    user.avatar = result['url']
+    result['avatar_url'] = result['url']
+
+
+upload_queue.register('avatar', on_complete=_complete_avatar, max_dimension=AVATAR_DIMENSION, widths=())
+
 @settings_bp.route('/settings')
 @login_required
 def settings():
@@ -211,39 +230,31 @@ def upload_avatar():
 
             return redirect(url_for('settings.profile_settings'))
         
+        # 只检查文件头，缩放和重新编码在后台进程中完成
         try:
-            # 生成唯一文件名
-            filename = f"avatar_{current_user.id}_{secrets.token_hex(8)}.{file.filename.rsplit('.', 1)[1].lower()}"
-            
-            # 确保上传目录存在
-            upload_dir = os.path.join('app', 'static', 'uploads', 'avatars')
-            os.makedirs(upload_dir, exist_ok=True)
-            
-            # 保存文件
-            file_path = os.path.join(upload_dir, filename)
-            file.save(file_path)
-            
-            # 删除旧头像（如果不是默认头像）
-            if current_user.avatar and '/static/uploads/avatars/' in current_user.avatar:
-                try:
-                    old_avatar_path = os.path.join('app', current_user.avatar.lstrip('/'))
-                    if os.path.exists(old_avatar_path):
-                        os.remove(old_avatar_path)
-                except Exception as e:
-                    print(f"删除旧头像失败: {e}")
-            
-            # 更新用户头像URL
-            current_user.avatar = f'/static/uploads/avatars/{filename}'
-            db.session.commit()
+            identify(file.stream)
+        except ImageProcessingError:
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return jsonify({'success': False, 'message': '无法识别的图片文件'})
+
+            flash('无法识别的图片文件', 'error')
+            return redirect(url_for('settings.profile_settings'))
+        
+        try:
+            name, ext = os.path.splitext(file.filename)
+            job = upload_queue.enqueue('avatar', file, current_user.id, name, ext)
             
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return jsonify({
-                    'success': True, 
-                    'message': '头像上传成功！',
-                    'avatar_url': current_user.avatar
-                })
+                # 处理完成后带有 avatar_url，否则返回任务ID供前端轮询
+                payload, status_code = job_response(job, '头像上传成功！')
+                return jsonify(payload), status_code
             
-            flash('头像上传成功！', 'success')
+            if job.status == UploadJob.STATUS_FAILED:
+                flash(job.error, 'error')
+            elif job.status == UploadJob.STATUS_DONE:
+                flash('头像上传成功！', 'success')
+            else:
+                flash('头像已上传，正在处理，稍后刷新页面即可看到新头像', 'info')
             return redirect(url_for('settings.profile_settings'))
 
         except Exception as e:
@@ -3,6 +3,7 @@ from flask_login import login_required, current_user
 from app.models import Version
 from app.models.user import db
 from app.utils import admin_required
+from app.utils.http_cache import make_validators
 from datetime import datetime
 
 version_bp = Blueprint('version', __name__)
@@ -207,8 +208,19 @@ def delete_version(version_id):
 @version_bp.route('/api/versions')
 def get_versions():
     """获取版本列表API（用于首页展示）"""
+    # 以记录数、最近更新时间和ID之和作为版本戳，新增、修改、删除都会改变
+    count, last_updated, id_sum = db.session.query(
+        db.func.count(Version.id), db.func.max(Version.updated_at), db.func.sum(Version.id)
+    ).filter(Version.is_active == True).one()
+    validators = make_validators(
+        'versions', count, last_updated, id_sum, last_modified=last_updated, max_age=60, per_user=False
+    )
+    not_modified = validators.not_modified()
+    if not_modified:
+        return not_modified
+    
     versions = Version.query.filter_by(is_active=True).order_by(Version.release_date.desc()).all()
-    return jsonify({
+    return validators.apply(jsonify({
         'success': True,
         'versions': [version.to_dict() for version in versions]
-    })
+    }))
@@ -597,37 +597,48 @@ class InteractionManager {
 
     async loadUserStatus() {
         // 获取所有需要检查状态的内容
-        const contentElements = document.querySelectorAll('[data-id][data-type]');
+        const contentElements = Array.from(document.querySelectorAll('[data-id][data-type]'));
+        const items = [...new Set(contentElements.map(element => `${element.dataset.type}:${element.dataset.id}`))];
+        if (items.length === 0) return;
+        
+        // 一次请求批量获取（每批最多 100 条）
+        const statuses = {};
+        try {
+            for (let i = 0; i < items.length; i += 100) {
+                const batch = items.slice(i, i + 100).join(',');
+                const response = await fetch(`/api/user-status?items=${encodeURIComponent(batch)}`);
+                const result = await response.json();
+                if (result.success) {
+                    Object.assign(statuses, result.statuses);
+                }
+            }
+        } catch (error) {
+            console.error('获取用户状态失败:', error);
+            return;
+        }
         
         for (const element of contentElements) {
             const contentId = element.dataset.id;
             const contentType = element.dataset.type;
+            const result = statuses[`${contentType}:${contentId}`];
+            if (!result) continue;
             
-            try {
-                const response = await fetch(`/api/user-status/${contentId}?type=${contentType}`);
-                const result = await response.json();
-                
-                if (result.success) {
-                    const likeBtn = element.querySelector('.like-btn');
-                    const favoriteBtn = element.querySelector('.favorite-btn');
-                    
-                    if (likeBtn) {
-                        this.updateLikeUI(likeBtn, result.is_liked, likeBtn.querySelector('.count')?.textContent || 0);
-                    }
-                    
-                    if (favoriteBtn) {
-                        this.updateFavoriteUI(favoriteBtn, result.is_favorited, favoriteBtn.querySelector('.count')?.textContent || 0);
-                    }
-                    
-                    // 更新评分状态
-                    this.updateRatingUI(element, result.user_rating);
-                    
-                    // 更新悬浮按钮状态
-                    this.updateFloatingButtonsStatus(contentId, contentType, result);
-                }
-            } catch (error) {
-                console.error('获取用户状态失败:', error);
+            const likeBtn = element.querySelector('.like-btn');
+            const favoriteBtn = element.querySelector('.favorite-btn');
+            
+            if (likeBtn) {
+                this.updateLikeUI(likeBtn, result.is_liked, likeBtn.querySelector('.count')?.textContent || 0);
             }
+            
+            if (favoriteBtn) {
+                this.updateFavoriteUI(favoriteBtn, result.is_favorited, favoriteBtn.querySelector('.count')?.textContent || 0);
+            }
+            
+            // 更新评分状态
+            this.updateRatingUI(element, result.user_rating);
+            
+            // 更新悬浮按钮状态
+            this.updateFloatingButtonsStatus(contentId, contentType, result);
         }
     }
     
@@ -672,13 +683,19 @@ class InteractionManager {
         }
     }
 
-    async loadCommentsForContent(contentId, contentType, page = 1) {
-        try {const response = await fetch(`/api/comments/${contentId}?type=${contentType}&page=${page}`);
+    async loadCommentsForContent(contentId, contentType, cursor = null) {
+        try {
+            let url = `/api/comments/${contentId}?type=${contentType}`;
+            if (cursor) {
+                url += `&cursor=${encodeURIComponent(cursor)}`;
+            }
+            const response = await fetch(url);
             const result = await response.json();if (result.success) {
                 // 找到对应的评论容器
                 const commentsContainer = document.querySelector(`.comments-list[data-content-id="${contentId}"][data-content-type="${contentType}"]`);
                 if (commentsContainer) {
-                    this.renderComments(result.comments, result.pagination, commentsContainer);
+                    // 带游标时为"加载更多"，追加到已有评论之后
+                    this.renderComments(result.comments, result.pagination, commentsContainer, !!cursor);
                 } else {
                     console.error('未找到评论容器', { contentId, contentType });
                 }
@@ -688,7 +705,7 @@ class InteractionManager {
         }
     }
 
-    renderComments(comments, pagination, commentsContainer = null) {
+    renderComments(comments, pagination, commentsContainer = null, append = false) {
         if (!commentsContainer) {
             commentsContainer = document.querySelector('.comments-list');
         }
@@ -696,7 +713,7 @@ class InteractionManager {
 
         let html = '';
         
-        if (comments.length === 0) {
+        if (comments.length === 0 && !append) {
             html = `
                 <div class="no-comments">
                     <div class="no-comments-icon">
@@ -778,6 +795,7 @@ class InteractionManager {
                                 <div class="replies-list" data-comment-id="${comment.id}">
                                     ${this.renderReplies(comment.replies || [])}
                                 </div>
+                                ${comment.replies_cursor ? this.renderRepliesLoadMore(comment.id, comment.replies_cursor, comment.replies_count - (comment.replies || []).length) : ''}
                                 <div class="reply-form" style="display: none;" data-comment-id="${comment.id}">
                                     <div class="reply-form-header">
                                         <div class="reply-form-avatar">
@@ -809,16 +827,55 @@ class InteractionManager {
             });
         }
 
-        commentsContainer.innerHTML = html;
+        if (pagination && pagination.has_next) {
+            html += `
+                <div class="comments-load-more text-center mt-3">
+                    <button type="button" class="btn btn-outline-secondary btn-sm" data-cursor="${pagination.next_cursor}">
+                        <i class="fas fa-chevron-down"></i> 加载更多评论
+                    </button>
+                </div>
+            `;
+        }
+
+        // 追加时先在临时容器中绑定事件，避免已有评论重复绑定
+        const target = append ? document.createElement('div') : commentsContainer;
+        target.innerHTML = html;
         
         // 为所有头像添加智能加载处理
-        this.setupAvatarLoading(commentsContainer);
+        this.setupAvatarLoading(target);
         
         // 为所有评论添加操作按钮事件
-        this.setupCommentActions(commentsContainer);
+        this.setupCommentActions(target);
         
         // 为所有回复按钮添加事件
-        this.setupReplyActions(commentsContainer);
+        this.setupReplyActions(target);
+        
+        // "查看更多回复"按钮
+        this.setupRepliesLoadMore(target);
+
+        // "加载更多"按钮使用游标获取下一页
+        const loadMoreBtn = target.querySelector('.comments-load-more button');
+        if (loadMoreBtn) {
+            loadMoreBtn.addEventListener('click', (e) => {
+                e.preventDefault();
+                loadMoreBtn.disabled = true;
+                this.loadCommentsForContent(
+                    commentsContainer.dataset.contentId,
+                    commentsContainer.dataset.contentType,
+                    loadMoreBtn.dataset.cursor
+                );
+            });
+        }
+
+        if (append) {
+            const previous = commentsContainer.querySelector('.comments-load-more');
+            if (previous) {
+                previous.remove();
+            }
+            while (target.firstChild) {
+                commentsContainer.appendChild(target.firstChild);
+            }
+        }
     }
 
     setupAvatarLoading(container) {
@@ -1129,9 +1186,9 @@ class InteractionManager {
             });
             
             if (response.ok) {
-                const result = await response.json();
+                const result = await waitForUpload(await response.json());
                 if (result.success) {
-                    return result.image_url;
+                    return result.url;
                 } else {
                     console.error('图片上传失败:', result.message);
                     return null;
@@ -1249,6 +1306,63 @@ class InteractionManager {
     }
 
     // 回复相关函数
+    renderRepliesLoadMore(commentId, cursor, remaining) {
+        return `
+            <div class="replies-load-more" data-comment-id="${commentId}">
+                <button type="button" class="btn-reply-action" data-comment-id="${commentId}" data-cursor="${cursor}" data-remaining="${remaining}">
+                    <i class="fas fa-chevron-down"></i> 查看更多回复（${remaining} 条）
+                </button>
+            </div>
+        `;
+    }
+
+    setupRepliesLoadMore(container) {
+        container.querySelectorAll('.replies-load-more button').forEach(btn => {
+            btn.addEventListener('click', (e) => {
+                e.preventDefault();
+                this.loadMoreReplies(btn);
+            });
+        });
+    }
+
+    async loadMoreReplies(button) {
+        const commentId = button.dataset.commentId;
+        button.disabled = true;
+
+        try {
+            const response = await fetch(`/api/comments/${commentId}/replies?cursor=${encodeURIComponent(button.dataset.cursor)}`);
+            const result = await response.json();
+            if (!result.success) {
+                this.showMessage(result.message || '加载回复失败', 'error');
+                button.disabled = false;
+                return;
+            }
+
+            // 新加载的回复先在临时容器中绑定事件，再追加到回复列表
+            const temp = document.createElement('div');
+            temp.innerHTML = this.renderReplies(result.replies);
+            this.setupReplyActions(temp);
+            const repliesList = document.querySelector(`.replies-list[data-comment-id="${commentId}"]`);
+            while (temp.firstChild) {
+                repliesList.appendChild(temp.firstChild);
+            }
+
+            const remaining = Math.max(0, parseInt(button.dataset.remaining || '0', 10) - result.replies.length);
+            if (result.pagination.has_next) {
+                button.dataset.cursor = result.pagination.next_cursor;
+                button.dataset.remaining = remaining;
+                button.innerHTML = `<i class="fas fa-chevron-down"></i> 查看更多回复（${remaining} 条）`;
+                button.disabled = false;
+            } else {
+                button.closest('.replies-load-more').remove();
+            }
+        } catch (error) {
+            console.error('加载回复失败:', error);
+            this.showMessage('网络错误，请重试', 'error');
+            button.disabled = false;
+        }
+    }
+
     renderReplies(replies) {
         if (!replies || replies.length === 0) {
             return '';
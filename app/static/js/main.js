@@ -752,6 +752,38 @@ function throttle(func, limit) {
     };
 }
 
+// 等待上传处理完成：上传接口返回任务ID（202）时轮询任务状态，
+// 完成后返回与直接处理时相同格式的结果（url、srcset、avatar_url 等）
+async function waitForUpload(data, { interval = 500, timeout = 120000 } = {}) {
+    if (!data || !data.success || !data.status_url) {
+        return data;
+    }
+
+    const deadline = Date.now() + timeout;
+    let delay = interval;
+    while (Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, delay));
+        delay = Math.min(delay * 1.5, 3000);
+
+        const response = await fetch(data.status_url, {
+            headers: { 'X-Requested-With': 'XMLHttpRequest' }
+        });
+        const job = await response.json();
+        if (!job.success) {
+            return job;
+        }
+        if (job.status === 'done') {
+            return { success: true, message: '上传成功', job_id: job.job_id, status: job.status, ...job.result };
+        }
+        if (job.status === 'failed') {
+            return { success: false, message: job.error || '图片处理失败', job_id: job.job_id, status: job.status };
+        }
+    }
+    return { success: false, message: '图片处理超时，请稍后刷新页面查看' };
+}
+
+window.waitForUpload = waitForUpload;
+
 // 导出函数供其他模块使用
 window.utils = {
     debounce,
@@ -416,7 +416,7 @@ class SimpleCommentEditor {
             });
             
             if (response.ok) {
-                const result = await response.json();
+                const result = await waitForUpload(await response.json());
                 if (result.success) {
                     return result.url;
                 } else {
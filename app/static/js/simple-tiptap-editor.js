@@ -1261,6 +1261,7 @@ class SimpleTiptapEditor {
             body: formData
         })
         .then(response => response.json())
+        .then(waitForUpload)
         .then(data => {
             if (data.success) {
                 this.insertImageFromUrl(data.url, uploadModule, range);
@@ -0,0 +1,110 @@
+"""
+互动计数模块
+点赞、收藏、评论点赞的状态切换和计数更新全部在数据库中原子完成：
+互动记录用 INSERT ... 忽略冲突 的方式幂等创建，状态用带条件的 UPDATE 切换，
+计数用 UPDATE ... SET x = x + 1 增减，多个 worker 并发操作时不会丢失更新，
+也不会因唯一约束冲突而报错。
+"""
+
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app.models.user import db
+from app.models import CommentLike, RatingSummary, UserInteraction
+
+# 保存评分时 带原评分条件的 UPDATE 最多尝试的次数
+RATING_RETRIES = 3
+
+
+def insert_ignore_statement(model, **values):
+    """按数据库方言生成 插入并忽略唯一约束冲突 的语句"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return sqlite.insert(model).values(**values).on_conflict_do_nothing()
+    if dialect == 'postgresql':
+        return postgresql.insert(model).values(**values).on_conflict_do_nothing()
+    if dialect in ('mysql', 'mariadb'):
+        return mysql.insert(model).values(**values).prefix_with('IGNORE')
+    return insert(model).values(**values)
+
+
+def insert_ignore(model, **values):
+    """插入一条记录，违反唯一约束时忽略，返回实际插入的行数"""
+    return db.session.execute(insert_ignore_statement(model, **values)).rowcount
+
+
+def adjust_counter(model, row_id, column_name, delta):
+    """原子增减计数列（减到 0 为止），返回更新后的值"""
+    column = getattr(model, column_name)
+    current = db.func.coalesce(column, 0)
+    new_value = current + delta if delta >= 0 else db.case((current + delta < 0, 0), else_=current + delta)
+    model.query.filter(model.id == row_id).update({column: new_value}, synchronize_session=False)
+    return db.session.query(column).filter(model.id == row_id).scalar() or 0
+
+
+def toggle_interaction(user_id, content_id, type_code, field):
+    """切换用户对内容的点赞 / 收藏状态（field 为 like 或 favorite），返回切换后的状态"""
+    insert_ignore(
+        UserInteraction, user_id=user_id, content_id=content_id, type=type_code,
+        like=0, favorite=0, rating=0
+    )
+
+    column = getattr(UserInteraction, field)
+    row = UserInteraction.query.filter_by(user_id=user_id, content_id=content_id, type=type_code)
+    values = {UserInteraction.updated_at: datetime.utcnow()}
+
+    # 先尝试从 0 改为 1，没有更新到记录说明当前是 1，再改回 0
+    if row.filter(db.func.coalesce(column, 0) == 0).update({column: 1, **values}, synchronize_session=False):
+        return True
+    row.update({column: 0, **values}, synchronize_session=False)
+    return False
+
+
+def set_rating(user_id, content_id, type_code, rating):
+    """保存用户对内容的评分，返回修改前的评分（0 表示之前没有评分）
+
+    先加锁读取当前评分（SELECT ... FOR UPDATE，MySQL 可重复读隔离级别下也读到最新提交的值），
+    再用 带原评分条件的 UPDATE 写入；同一用户同时提交的多次评分各自得到准确的原评分，汇总的差值不会重复计算。
+    条件连续 RATING_RETRIES 次不成立时放弃，由调用方回滚并返回错误。
+    """
+    insert_ignore(
+        UserInteraction, user_id=user_id, content_id=content_id, type=type_code,
+        like=0, favorite=0, rating=0
+    )
+    row = UserInteraction.query.filter_by(user_id=user_id, content_id=content_id, type=type_code)
+    current = db.func.coalesce(UserInteraction.rating, 0)
+    for _ in range(RATING_RETRIES):
+        old_rating = db.session.query(current).filter(
+            UserInteraction.user_id == user_id,
+            UserInteraction.content_id == content_id,
+            UserInteraction.type == type_code
+        ).with_for_update().scalar() or 0
+        if row.filter(current == old_rating).update({
+            UserInteraction.rating: rating,
+            UserInteraction.updated_at: datetime.utcnow(),
+        }, synchronize_session=False):
+            return old_rating
+    raise RuntimeError('评分被并发修改，保存失败')
+
+
+def apply_rating_change(type_code, content_id, old_rating, new_rating):
+    """按评分变化增量更新评分汇总，返回更新后的汇总
+
+    第一次评分时幂等创建汇总记录，多个请求同时创建时不会因唯一约束冲突而报错。
+    """
+    insert_ignore(
+        RatingSummary, type=type_code, content_id=content_id, rating_sum=0, rating_count=0,
+        rating_1=0, rating_2=0, rating_3=0, rating_4=0, rating_5=0
+    )
+    return RatingSummary.apply_change(type_code, content_id, old_rating, new_rating)
+
+
+def toggle_comment_like(user_id, comment_id):
+    """切换用户对评论的点赞，返回 (是否点赞, 点赞记录是否有变化)"""
+    deleted = CommentLike.query.filter_by(user_id=user_id, comment_id=comment_id).delete(synchronize_session=False)
+    if deleted:
+        return False, True
+    inserted = insert_ignore(CommentLike, user_id=user_id, comment_id=comment_id)
+    return True, bool(inserted)
@@ -1,3 +1,8 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
 import markdown
 from markdown.extensions import codehilite, fenced_code, tables, toc
 
@@ -10,40 +15,126 @@ def nl2br_filter(text):
     text = text.replace('\n', '<br>')
     return text
 
+# Markdown 扩展配置
+MARKDOWN_EXTENSIONS = [
+    'codehilite',  # 代码高亮
+    'fenced_code',  # 围栏代码块
+    'tables',       # 表格
+    'toc',          # 目录
+    'nl2br',        # 换行转换
+    'attr_list',    # 属性列表
+    'def_list',     # 定义列表
+    'footnotes',    # 脚注
+    'md_in_html',   # HTML中的Markdown
+]
+
+MARKDOWN_EXTENSION_CONFIGS = {
+    'codehilite': {
+        'css_class': 'highlight',
+        'use_pygments': False,
+    },
+    'toc': {
+        'permalink': True,
+        'permalink_title': '永久链接',
+    }
+}
+
+
+class MarkdownCache:
+    """Markdown 渲染结果缓存（按内容哈希索引，超出内存上限时淘汰最久未使用的条目）"""
+    
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        """读取缓存，命中时移到队尾"""
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+    
+    def set(self, key, html):
+        """写入缓存并按内存上限淘汰"""
+        size = sys.getsizeof(html)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = html
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= sys.getsizeof(evicted)
+                self.evictions += 1
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self):
+        """获取缓存统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+markdown_cache = MarkdownCache()
+
+# Markdown 实例不是线程安全的，每个线程复用自己的实例
+_local = threading.local()
+
+
+def _get_converter():
+    """获取当前线程复用的 Markdown 实例"""
+    md = getattr(_local, 'markdown', None)
+    if md is None:
+        md = markdown.Markdown(
+            extensions=MARKDOWN_EXTENSIONS,
+            extension_configs=MARKDOWN_EXTENSION_CONFIGS
+        )
+        _local.markdown = md
+    return md
+
+
+def render_markdown(text):
+    """使用复用的实例渲染 Markdown（不经过缓存）"""
+    md = _get_converter()
+    md.reset()
+    return md.convert(text)
+
+
 def markdown_filter(text):
     """将Markdown文本转换为HTML（保留用于向后兼容）"""
     if text is None:
         return ''
     
-    # 配置Markdown扩展
-    extensions = [
-        'codehilite',  # 代码高亮
-        'fenced_code',  # 围栏代码块
-        'tables',       # 表格
-        'toc',          # 目录
-        'nl2br',        # 换行转换
-        'attr_list',    # 属性列表
-        'def_list',     # 定义列表
-        'footnotes',    # 脚注
-        'md_in_html',   # HTML中的Markdown
-    ]
-    
-    # 创建Markdown实例
-    md = markdown.Markdown(
-        extensions=extensions,
-        extension_configs={
-            'codehilite': {
-                'css_class': 'highlight',
-                'use_pygments': False,
-            },
-            'toc': {
-                'permalink': True,
-                'permalink_title': '永久链接',
-            }
-        }
-    )
-    
-    return md.convert(text)
+    key = hashlib.sha1(text.encode('utf-8')).hexdigest()
+    html = markdown_cache.get(key)
+    if html is None:
+        html = render_markdown(text)
+        markdown_cache.set(key, html)
+    return html
 
 def html_filter(text):
     """直接返回HTML内容（用于Tiptap编辑器）"""
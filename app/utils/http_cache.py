@@ -0,0 +1,86 @@
+"""
+HTTP 条件请求模块
+根据内容的更新时间和版本戳生成 ETag / Last-Modified，
+请求携带的 If-None-Match / If-Modified-Since 仍然有效时直接返回 304，跳过模板渲染和耗时计算。
+"""
+
+import hashlib
+from datetime import timezone
+
+from flask import current_app, make_response, request
+from flask_login import current_user
+
+
+class Validators:
+    """一次响应的验证器与缓存策略"""
+
+    def __init__(self, etag, last_modified=None, cache_control='no-cache', vary_cookie=True):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.cache_control = cache_control
+        self.vary_cookie = vary_cookie
+
+    def is_fresh(self):
+        """客户端缓存是否仍然有效（If-None-Match 优先于 If-Modified-Since）"""
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(self.etag)
+        if request.if_modified_since and self.last_modified:
+            return self.last_modified <= request.if_modified_since
+        return False
+
+    def not_modified(self):
+        """验证器仍然有效时返回 304 响应，否则返回 None"""
+        if request.method not in ('GET', 'HEAD') or not self.is_fresh():
+            return None
+        return self.apply(make_response('', 304))
+
+    def apply(self, response):
+        """为响应设置验证器和缓存策略"""
+        response = make_response(response)
+        if response.status_code not in (200, 304):
+            return response
+        response.set_etag(self.etag, weak=True)
+        if self.last_modified:
+            response.last_modified = self.last_modified
+        response.headers['Cache-Control'] = self.cache_control
+        if self.vary_cookie:
+            response.vary.add('Cookie')
+        return response
+
+
+def _to_http_date(value):
+    """数据库中的 UTC 时间转换为 HTTP 日期精度（秒）的带时区时间"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def make_validators(*version_parts, last_modified=None, max_age=0, public=True, per_user=True):
+    """根据内容版本戳生成验证器
+
+    version_parts 为决定页面内容的取值（如内容ID、updated_at、计数等），
+    per_user 为 True 时按登录用户区分 ETag（页面中有用户相关的内容）；
+    登录用户的响应只允许浏览器私有缓存。
+    """
+    parts = [current_app.config.get('CACHE_VERSION', '1')]
+    parts.extend(str(part) for part in version_parts)
+    user_scoped = per_user and current_user.is_authenticated
+    if user_scoped:
+        parts.append(f'user:{current_user.get_id()}')
+
+    etag = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:20]
+
+    directives = ['private' if user_scoped or not public else 'public']
+    if max_age:
+        directives.append(f'max-age={max_age}')
+    else:
+        directives.append('no-cache')
+
+    return Validators(
+        etag,
+        last_modified=_to_http_date(last_modified),
+        cache_control=', '.join(directives),
+        vary_cookie=per_user
+    )
@@ -0,0 +1,178 @@
+"""
+图片处理模块
+上传的图片在保存前统一处理：按 EXIF 方向旋转后去掉 EXIF 信息，限制最大边长，
+重新编码为渐进式 JPEG 或 WebP，并生成几种宽度的缩略图供 srcset 使用。
+动图、SVG 以及未安装 Pillow 时按原文件保存。
+"""
+
+import io
+import time
+
+try:
+    from PIL import Image, ImageOps, UnidentifiedImageError, features
+except ImportError:  # 兼容环境未安装 Pillow
+    Image = None
+
+# 输出图片的最大边长
+MAX_DIMENSION = 2048
+
+# 头像的最大边长
+AVATAR_DIMENSION = 512
+
+# srcset 使用的宽度（只生成小于原图宽度的尺寸）
+RESPONSIVE_WIDTHS = (480, 960, 1600)
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+# 不重新编码、按原文件保存的格式（SVG 另外按内容判断）
+PASSTHROUGH_FORMATS = {'GIF'}
+
+
+class ImageProcessingError(ValueError):
+    """上传的文件无法作为图片处理"""
+
+
+def is_available():
+    """是否可以处理图片（已安装 Pillow）"""
+    return Image is not None
+
+
+def _is_svg(data):
+    """Pillow 不能解析 SVG，按文件开头判断"""
+    head = data[:1024].lstrip().lower()
+    return head.startswith(b'<svg') or (head.startswith(b'<?xml') and b'<svg' in head)
+
+
+def identify(stream):
+    """只读取文件头判断是否为可处理的图片（不解码像素），返回格式名
+
+    上传请求中用于快速拒绝非图片文件；未安装 Pillow 时返回 None，无法识别时抛出 ImageProcessingError。
+    """
+    position = stream.tell()
+    try:
+        if _is_svg(stream.read(1024)):
+            return 'SVG'
+        if not is_available():
+            return None
+        stream.seek(position)
+        try:
+            with Image.open(stream) as image:
+                return image.format
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+            raise ImageProcessingError(f'无法识别的图片: {e}')
+    finally:
+        stream.seek(position)
+
+
+def _output_format(image, source_format, preferred):
+    """选择输出格式
+
+    优先使用配置的格式；带透明通道的图片不能存为 JPEG，
+    PNG 原图多为截图、图表，存为 JPEG 反而更大，保持 PNG。
+    """
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if preferred == 'webp' and features.check('webp'):
+        return 'WEBP'
+    if has_alpha:
+        return 'WEBP' if features.check('webp') else 'PNG'
+    if source_format == 'PNG':
+        return 'PNG'
+    return 'JPEG'
+
+
+def _encode(image, fmt):
+    """编码为字节串（不写入 EXIF）"""
+    buffer = io.BytesIO()
+    params = {}
+    if fmt == 'JPEG':
+        image = image.convert('RGB')
+        params = {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True}
+    elif fmt == 'WEBP':
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.mode or 'transparency' in image.info else 'RGB')
+        params = {'quality': WEBP_QUALITY, 'method': 4}
+    else:
+        params = {'optimize': True}
+    if image.info.get('icc_profile'):
+        params['icc_profile'] = image.info['icc_profile']
+    image.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def process_image(data, preferred_format='jpeg', max_dimension=MAX_DIMENSION, widths=RESPONSIVE_WIDTHS):
+    """处理上传的图片
+
+    data 为原始文件内容，返回 dict：
+    format（输出格式，passthrough 表示按原文件保存）、extension、width、height、
+    content（处理后的主图）、variants（[(宽度, 内容)]，从小到大）、elapsed（处理耗时，秒）。
+    无法识别为图片时抛出 ImageProcessingError。
+    """
+    start = time.perf_counter()
+    if not is_available() or _is_svg(data):
+        return {'format': 'passthrough', 'content': data, 'variants': [], 'width': None, 'height': None,
+                'extension': None, 'elapsed': 0.0}
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        source_format = image.format
+        if source_format in PASSTHROUGH_FORMATS or getattr(image, 'is_animated', False):
+            return {'format': 'passthrough', 'content': data, 'variants': [], 'width': image.width,
+                    'height': image.height, 'extension': None, 'elapsed': time.perf_counter() - start}
+
+        # 按 EXIF 方向旋转，之后重新编码时不再写入 EXIF
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise ImageProcessingError(f'无法识别的图片: {e}')
+
+    fmt = _output_format(image, source_format, preferred_format)
+    content = _encode(image, fmt)
+
+    variants = []
+    for width in sorted(widths):
+        if width >= image.width:
+            break
+        height = max(1, round(image.height * width / image.width))
+        variants.append((width, _encode(image.resize((width, height), Image.LANCZOS), fmt)))
+
+    return {
+        'format': fmt.lower(),
+        'extension': {'JPEG': '.jpg', 'WEBP': '.webp', 'PNG': '.png'}[fmt],
+        'width': image.width,
+        'height': image.height,
+        'content': content,
+        'variants': variants,
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def save_processed(result, store, original_extension):
+    """将处理结果写入文件存储，返回 [(URL, 宽度)]，第一项为主图"""
+    extension = result['extension'] or original_extension
+    files = [(result['content'], result['width'])] + [(content, width) for width, content in result['variants']]
+    return [(store.save_bytes(content, extension).url, width) for content, width in files]
+
+
+def build_srcset(urls):
+    """[(URL, 宽度)] 转换为 srcset 字符串（宽度未知的忽略）"""
+    return ', '.join(f'{url} {width}w' for url, width in sorted(urls, key=lambda item: item[1] or 0) if width)
+
+
+def process_upload(source_path, objects_root, url_prefix, extension, preferred_format='jpeg',
+                   max_dimension=MAX_DIMENSION, widths=RESPONSIVE_WIDTHS):
+    """处理暂存的上传文件并写入摘要存储（在后台进程中执行），返回可序列化为 JSON 的结果"""
+    from app.utils.storage import ContentStore
+
+    with open(source_path, 'rb') as f:
+        result = process_image(f.read(), preferred_format, max_dimension, widths)
+    urls = save_processed(result, ContentStore(objects_root, url_prefix), extension)
+    return {
+        'url': urls[0][0],
+        'width': result['width'],
+        'height': result['height'],
+        'srcset': build_srcset(urls),
+        'variants': [{'url': url, 'width': width} for url, width in urls],
+        'size': len(result['content']),
+        'elapsed': round(result['elapsed'], 3),
+    }
@@ -0,0 +1,164 @@
+"""
+用户互动状态索引模块
+每个用户的点赞、收藏状态用按内容ID置位的位图保存，评分用小字典保存，
+首次查询时从数据库一次性加载，之后的状态查询不再访问数据库。
+点赞、收藏、评分提交后递增该用户的版本号，查询时版本号与加载时不同则重新加载；
+版本号可选进程内存（单 worker）或共享 mmap 文件（多个 worker 共享，其他 worker 的写入立即可见）。
+索引超过 INTERACTION_INDEX_TTL 秒也会重新加载。
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.models.user import db
+from app.models import UserInteraction
+from app.utils.unread_events import MemorySignals, SharedSignals
+
+try:
+    import fcntl
+except ImportError:  # Windows 不支持文件锁，回退到进程内存
+    fcntl = None
+
+# 内容类型与互动记录中的类型代码
+TYPE_CODES = {'post': 1, 'project': 2}
+
+
+class UserInteractionState:
+    """单个用户的互动状态"""
+
+    __slots__ = ('liked', 'favorited', 'ratings', 'loaded_at', 'version')
+
+    def __init__(self, version=0):
+        # {类型代码: 位图}，第 content_id 位为 1 表示已点赞 / 已收藏
+        self.liked = {}
+        self.favorited = {}
+        # {(类型代码, 内容ID): 评分}
+        self.ratings = {}
+        self.loaded_at = time.monotonic()
+        # 加载前读取的用户版本号
+        self.version = version
+
+    @staticmethod
+    def _test(bitsets, type_code, content_id):
+        return bool((bitsets.get(type_code, 0) >> content_id) & 1)
+
+    @staticmethod
+    def _assign(bitsets, type_code, content_id, value):
+        mask = 1 << content_id
+        bits = bitsets.get(type_code, 0)
+        bitsets[type_code] = bits | mask if value else bits & ~mask
+
+    def update(self, type_code, content_id, like=None, favorite=None, rating=None):
+        if like is not None:
+            self._assign(self.liked, type_code, content_id, like)
+        if favorite is not None:
+            self._assign(self.favorited, type_code, content_id, favorite)
+        if rating is not None:
+            if rating > 0:
+                self.ratings[(type_code, content_id)] = rating
+            else:
+                self.ratings.pop((type_code, content_id), None)
+
+    def status(self, type_code, content_id):
+        """单条内容的互动状态（与 /api/user-status 的返回字段一致）"""
+        return {
+            'is_liked': self._test(self.liked, type_code, content_id),
+            'is_favorited': self._test(self.favorited, type_code, content_id),
+            'user_rating': self.ratings.get((type_code, content_id)),
+        }
+
+
+class InteractionIndex:
+    """按用户缓存互动状态的 LRU 索引"""
+
+    def __init__(self, ttl=60, max_users=1000):
+        self.ttl = ttl
+        self.max_users = max_users
+        self.signals = MemorySignals()
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """读取配置并创建版本号存储"""
+        self.ttl = app.config.get('INTERACTION_INDEX_TTL', 60)
+        self.max_users = app.config.get('INTERACTION_INDEX_MAX_USERS', 1000)
+
+        backend = app.config.get('INTERACTION_INDEX_BACKEND', 'memory')
+        if backend == 'mmap' and fcntl is None:
+            app.logger.warning('当前系统不支持文件锁，互动状态索引改用进程内存')
+            backend = 'memory'
+        if backend == 'mmap':
+            path = app.config.get('INTERACTION_INDEX_FILE') or os.path.join(app.instance_path, 'interaction_index.bin')
+            self.signals = SharedSignals(path)
+        else:
+            self.signals = MemorySignals()
+
+        self.clear()
+        app.extensions['interaction_index'] = self
+
+    @staticmethod
+    def _load(user_id, version):
+        """一次查询加载用户的全部点赞、收藏和评分"""
+        state = UserInteractionState(version)
+        rows = db.session.query(
+            UserInteraction.type, UserInteraction.content_id, UserInteraction.like,
+            UserInteraction.favorite, UserInteraction.rating
+        ).filter(
+            UserInteraction.user_id == user_id,
+            db.or_(UserInteraction.like == 1, UserInteraction.favorite == 1, UserInteraction.rating > 0)
+        )
+        for type_code, content_id, like, favorite, rating in rows:
+            state.update(type_code, content_id, like=like == 1, favorite=favorite == 1, rating=rating or 0)
+        return state
+
+    def get(self, user_id):
+        """获取用户的互动状态，未加载、已过期或版本号变化时从数据库加载"""
+        # 先读版本号再加载，加载期间提交的写操作会使这次的结果在下次查询时重新加载
+        version = self.signals.read(user_id)
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(user_id)
+            if state is not None and state.version == version and now - state.loaded_at < self.ttl:
+                self._states.move_to_end(user_id)
+                return state
+
+        state = self._load(user_id, version)
+        with self._lock:
+            self._states[user_id] = state
+            self._states.move_to_end(user_id)
+            while len(self._states) > self.max_users:
+                self._states.popitem(last=False)
+        return state
+
+    def update(self, user_id, type_code, content_id, **values):
+        """写操作提交后递增用户版本号，并更新本进程已加载的状态
+
+        只有递增前的版本号与状态加载时一致（其间没有其他写操作）时才直接修改，否则下次查询时重新加载。
+        """
+        with self._lock:
+            version = self.signals.read(user_id)
+            self.signals.bump(user_id)
+            state = self._states.get(user_id)
+            if state is not None and state.version == version:
+                state.update(type_code, content_id, **values)
+                state.version = version + 1
+
+    def statuses(self, user_id, items):
+        """批量获取状态，items 为 (内容类型, 内容ID) 列表，返回 {'类型:ID': 状态}"""
+        state = self.get(user_id)
+        return {
+            f'{content_type}:{content_id}': state.status(TYPE_CODES[content_type], content_id)
+            for content_type, content_id in items
+        }
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+    def __len__(self):
+        return len(self._states)
+
+
+interaction_index = InteractionIndex()
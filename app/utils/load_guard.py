@@ -0,0 +1,83 @@
+"""
+延迟加载检查模块
+列表页通过 list_options() 只加载需要的列，正文等大字段被延迟加载。
+如果模板渲染时访问了被延迟的大字段，每条记录都会额外查询一次并读取整列内容，
+这里在模板渲染期间监听这类按列补充加载的查询，按配置记录警告或直接抛出异常。
+"""
+
+import logging
+
+from flask import before_render_template, g, template_rendered
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class DeferredLoadError(RuntimeError):
+    """模板中访问了列表查询延迟加载的大字段"""
+
+
+class DeferredLoadGuard:
+    """模板渲染期间的大字段延迟加载检查"""
+
+    def __init__(self):
+        self.mode = 'off'
+        self._reported = set()
+
+    def init_app(self, app):
+        """注册模板渲染信号和数据库查询事件
+
+        DEFERRED_LOAD_GUARD 为 warn 时记录警告（每个模板和字段只记录一次），
+        为 raise 时抛出异常，为 off 时不检查。
+        """
+        self.mode = app.config.get('DEFERRED_LOAD_GUARD', 'warn')
+        if self.mode == 'off':
+            return
+
+        before_render_template.connect(self._enter_template, app)
+        template_rendered.connect(self._exit_template, app)
+        if not event.contains(Session, 'do_orm_execute', self._check_execute):
+            event.listen(Session, 'do_orm_execute', self._check_execute)
+        app.extensions['deferred_load_guard'] = self
+
+    @staticmethod
+    def _enter_template(sender, template, context, **extra):
+        g.setdefault('rendering_templates', []).append(template.name)
+
+    @staticmethod
+    def _exit_template(sender, template, context, **extra):
+        templates = g.get('rendering_templates')
+        if templates:
+            templates.pop()
+
+    def _check_execute(self, orm_execute_state):
+        """按列补充加载时检查是否读取了大字段"""
+        if not orm_execute_state.is_column_load or not g:
+            return
+        templates = g.get('rendering_templates')
+        if not templates:
+            return
+
+        mapper = orm_execute_state.bind_mapper
+        large_columns = getattr(mapper.class_, 'LARGE_COLUMNS', ()) if mapper is not None else ()
+        loaded = {getattr(column, 'key', None) for column in orm_execute_state.statement.selected_columns}
+        # 提交后过期属性的重新加载不算（那些字段原本已加载过）
+        state = getattr(orm_execute_state.load_options, '_refresh_state', None)
+        expired = state.expired_attributes if state is not None else set()
+        columns = sorted(loaded.intersection(large_columns) - expired)
+        if not columns:
+            return
+
+        template_name = templates[-1] or '<string>'
+        message = f"模板 {template_name} 访问了延迟加载的字段 {mapper.class_.__name__}.{', '.join(columns)}"
+        if self.mode == 'raise':
+            raise DeferredLoadError(message)
+
+        report_key = (template_name, mapper.class_.__name__, tuple(columns))
+        if report_key not in self._reported:
+            self._reported.add(report_key)
+            logger.warning(f"{message}，列表查询应改用预览字段或在查询中加载该列")
+
+
+deferred_load_guard = DeferredLoadGuard()
@@ -0,0 +1,166 @@
+"""
+通知合并模块
+点赞、收藏、评分这类高频事件不再每次插入一条通知：同一接收者、同一类型、同一内容的事件，
+在合并窗口内（距该通知上次更新不超过 NOTIFICATION_COALESCE_WINDOW 秒）合并为一条通知，
+有新用户参与时原地更新为“A 和其他 12 人点赞了你的文章”并重新标记为未读；
+同一用户反复取消再点赞、修改评分不会产生新的通知。
+通知表的行数随不同的事件增长，而不是随点击次数增长。
+
+超过保留期（NOTIFICATION_RETENTION_DAYS 天）的已读通知由 purge_read_notifications 分批移到归档表或直接删除，
+每批一个短事务，通知表的大小只与近期的通知量有关。
+
+批量标为已读、批量删除按 notification_selection 生成的条件执行一条 UPDATE / DELETE，不逐条加载通知。
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.models.user import db
+from app.models import Notification, NotificationActor, NotificationArchive
+from app.utils.counters import insert_ignore
+
+# 可合并的通知类型：(单人标题, 多人标题)
+COALESCED_TITLES = {
+    'like': ('{actor} 点赞了你的{content_name}', '{actor} 和其他 {others} 人点赞了你的{content_name}'),
+    'favorite': ('{actor} 收藏了你的{content_name}', '{actor} 和其他 {others} 人收藏了你的{content_name}'),
+    'rating': ('{actor} 给你的{content_name}打了{rating}分', '{actor} 和其他 {others} 人给你的{content_name}打了分'),
+}
+
+CONTENT_NAMES = {'post': '文章', 'project': '项目'}
+
+
+def content_url(content_type, content_id):
+    """通知跳转地址"""
+    return f'/blog/post/{content_id}' if content_type == 'post' else f'/projects/{content_id}'
+
+
+def coalesce_notification(recipient_id, notification_type, content_type, content_id, content_title, actor, rating=None):
+    """记录一次点赞 / 收藏 / 评分通知
+
+    合并窗口内已有同一内容的通知时原地更新，否则新建；返回该通知。
+    该用户已在这条通知中时不做任何修改，返回 None。
+    """
+    window = current_app.config.get('NOTIFICATION_COALESCE_WINDOW', 86400)
+    now = datetime.utcnow()
+
+    # 只合并记录了参与用户的通知（升级前逐条插入的旧通知保持原样）
+    notification = Notification.query.filter(
+        Notification.user_id == recipient_id,
+        Notification.type == notification_type,
+        Notification.related_type == content_type,
+        Notification.related_id == content_id,
+        Notification.created_at >= now - timedelta(seconds=window),
+        Notification.actors.any()
+    ).order_by(Notification.created_at.desc()).first()
+
+    if notification is None:
+        notification = Notification(
+            user_id=recipient_id,
+            type=notification_type,
+            title='',
+            content='',
+            related_id=content_id,
+            related_type=content_type,
+            related_url=content_url(content_type, content_id)
+        )
+        db.session.add(notification)
+        db.session.flush()
+
+    # 唯一约束保证每个用户只计一次，并发点赞时也不会重复
+    if not insert_ignore(NotificationActor, notification_id=notification.id, user_id=actor.id, created_at=now):
+        return None
+    actor_count = NotificationActor.query.filter_by(notification_id=notification.id).count()
+
+    single_title, multiple_title = COALESCED_TITLES[notification_type]
+    notification.title = (single_title if actor_count == 1 else multiple_title).format(
+        actor=actor.username,
+        others=actor_count - 1,
+        content_name=CONTENT_NAMES.get(content_type, content_type),
+        rating=rating
+    )
+    notification.content = f'"{content_title}"'
+    notification.sender_id = actor.id
+    notification.sender_name = actor.username
+    # 按最近一次参与时间排序，并重新提醒
+    notification.created_at = now
+    notification.is_read = False
+    notification.read_at = None
+    return notification
+
+
+def notification_selection(user_id, ids=None, before=None, types=None):
+    """用户通知的批量操作条件，多个条件同时满足
+
+    ids 为通知ID列表；before 为通知列表中某条通知的 (created_at, id)，只选择列表中排在它之后（更早）的通知；
+    types 为通知类型列表。
+    """
+    notifications = Notification.__table__
+    conditions = [notifications.c.user_id == user_id]
+    if ids is not None:
+        conditions.append(notifications.c.id.in_(ids))
+    if before is not None:
+        conditions.append(db.tuple_(notifications.c.created_at, notifications.c.id) < db.tuple_(*before))
+    if types:
+        conditions.append(notifications.c.type.in_(types))
+    return db.and_(*conditions)
+
+
+def delete_notifications(condition):
+    """删除满足条件的通知及其参与用户记录，返回删除的通知数
+
+    不经过会话事件，调用方需要在同一事务中调整未读计数，提交后通知未读数变化。
+    """
+    notifications = Notification.__table__
+    actors = NotificationActor.__table__
+    db.session.execute(actors.delete().where(
+        actors.c.notification_id.in_(db.select(notifications.c.id).where(condition))
+    ))
+    return db.session.execute(notifications.delete().where(condition)).rowcount
+
+
+# 归档时保留的字段
+ARCHIVED_COLUMNS = ['id', 'user_id', 'type', 'title', 'related_id', 'related_type', 'sender_id', 'created_at', 'read_at']
+
+
+def expired_notifications(cutoff):
+    """创建时间早于 cutoff 的已读通知"""
+    return Notification.query.filter(Notification.is_read == True, Notification.created_at < cutoff)
+
+
+def purge_read_notifications(cutoff, archive=True, batch_size=500, pause=0.0, progress=None):
+    """将创建时间早于 cutoff 的已读通知移到归档表（archive 为 False 时直接删除），返回处理的条数
+
+    每批按主键从上一批的最后一条之后取 batch_size 条（不再从头扫过保留的未读通知），
+    在一个事务中归档、删除参与用户记录和通知后提交，批次之间暂停 pause 秒，让出数据库写锁。
+    未读通知不受影响，未读计数无需调整。
+    """
+    notifications = Notification.__table__
+    total = 0
+    last_id = 0
+    while True:
+        ids = [row.id for row in expired_notifications(cutoff).with_entities(Notification.id).filter(
+            Notification.id > last_id).order_by(Notification.id).limit(batch_size)]
+        if not ids:
+            break
+        last_id = ids[-1]
+
+        # 条件在写入语句中再次检查：取出ID后被重新标为未读的合并通知保留
+        condition = db.and_(notifications.c.id.in_(ids), notifications.c.is_read == True,
+                            notifications.c.created_at < cutoff)
+        if archive:
+            db.session.execute(NotificationArchive.__table__.insert().from_select(
+                ARCHIVED_COLUMNS,
+                db.select(*[notifications.c[name] for name in ARCHIVED_COLUMNS]).where(condition)
+            ))
+        total += delete_notifications(condition)
+        db.session.commit()
+
+        if progress:
+            progress(total)
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return total
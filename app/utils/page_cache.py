@@ -0,0 +1,283 @@
+"""
+整页缓存模块
+未登录访客访问首页、博客列表、文章详情、项目和关于页面时直接返回缓存的完整响应，
+跳过数据库查询和模板渲染。
+缓存键为 路径 + 规范化后的查询参数；后台写操作会清空缓存，
+点赞、评论等计数变化时只失效对应的详情页。
+存储可选进程内存（单 worker）或共享磁盘目录（多个 worker 共享缓存并同步失效）。
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+
+from flask import current_app, g, request, session, url_for
+from flask_login import current_user
+
+from app.utils.view_counter import view_counter
+
+# 参与整页缓存的页面
+CACHED_ENDPOINTS = {
+    'main.index',
+    'main.blog',
+    'main.post_detail',
+    'main.projects',
+    'main.project_detail',
+    'main.about',
+}
+
+# 这些蓝图下的写请求成功后清空缓存（后台管理、版本管理）
+INVALIDATING_BLUEPRINTS = {'admin', 'version'}
+
+# 不影响页面内容的统计类查询参数
+IGNORED_PARAMS = {'fbclid', 'gclid', 'from', 'spm'}
+
+# 不随缓存保存的响应头
+SKIPPED_HEADERS = {'set-cookie', 'content-length'}
+
+
+class MemoryStore:
+    """进程内 LRU 缓存"""
+
+    def __init__(self, max_entries=500):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires, entry = item
+            if expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_path(self, path):
+        with self._lock:
+            for key in [k for k in self._entries if k.split('?', 1)[0] == path]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FileStore:
+    """磁盘目录缓存，多个 worker 进程共享
+
+    文件名为 路径摘要-完整键摘要，按路径失效时只需删除同一前缀的文件。
+    """
+
+    def __init__(self, directory, prune_every=500):
+        self.directory = directory
+        self.prune_every = prune_every
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _digest(value):
+        return hashlib.sha1(value.encode('utf-8')).hexdigest()[:16]
+
+    def _filename(self, key):
+        path = key.split('?', 1)[0]
+        return os.path.join(self.directory, f'{self._digest(path)}-{self._digest(key)}.page')
+
+    def get(self, key):
+        try:
+            with open(self._filename(key), 'rb') as f:
+                expires, entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires < time.time():
+            return None
+        return entry
+
+    def set(self, key, entry, ttl):
+        # 先写临时文件再原子替换，避免其他进程读到写了一半的文件
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((time.time() + ttl, entry), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._filename(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+
+    def _remove(self, names):
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def delete_path(self, path):
+        prefix = f'{self._digest(path)}-'
+        self._remove([name for name in os.listdir(self.directory) if name.startswith(prefix)])
+
+    def clear(self):
+        self._remove([name for name in os.listdir(self.directory) if name.endswith('.page')])
+
+    def prune(self):
+        """删除已过期的缓存文件"""
+        now = time.time()
+        expired = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.page'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), 'rb') as f:
+                    expires, _ = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                continue
+            if expires < now:
+                expired.append(name)
+        self._remove(expired)
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(self.directory) if name.endswith('.page'))
+
+
+class PageCache:
+    """未登录访客的整页缓存"""
+
+    def __init__(self):
+        self.enabled = False
+        self.ttl = 300
+        self.store = None
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """绑定应用、创建存储并注册请求钩子"""
+        self.enabled = app.config.get('PAGE_CACHE_ENABLED', True)
+        self.ttl = app.config.get('PAGE_CACHE_TTL', 300)
+
+        backend = app.config.get('PAGE_CACHE_BACKEND', 'memory')
+        if backend == 'file':
+            directory = app.config.get('PAGE_CACHE_DIR') or os.path.join(app.instance_path, 'page_cache')
+            self.store = FileStore(directory)
+        else:
+            self.store = MemoryStore(app.config.get('PAGE_CACHE_MAX_ENTRIES', 500))
+
+        app.before_request(self._serve_cached)
+        app.after_request(self._process_response)
+        app.extensions['page_cache'] = self
+
+    @staticmethod
+    def make_key(path, args):
+        """路径 + 规范化的查询参数（排序、去掉空值和统计参数）"""
+        params = sorted(
+            (name, value) for name, values in args.lists() for value in values
+            if value and name not in IGNORED_PARAMS and not name.startswith('utm_')
+        )
+        return f'{path}?{urllib.parse.urlencode(params)}'
+
+    def _cacheable_request(self):
+        """当前请求是否可以使用整页缓存"""
+        return (
+            self.enabled
+            and request.method in ('GET', 'HEAD')
+            and request.endpoint in CACHED_ENDPOINTS
+            and request.headers.get('X-Requested-With') != 'XMLHttpRequest'
+            and not session.get('_flashes')
+            and not current_user.is_authenticated
+        )
+
+    def _serve_cached(self):
+        """请求前查找缓存，命中时直接返回"""
+        if not self._cacheable_request():
+            return None
+
+        key = self.make_key(request.path, request.args)
+        entry = self.store.get(key)
+        if entry is None:
+            self.misses += 1
+            g.page_cache_key = key
+            return None
+
+        self.hits += 1
+        # 命中缓存时照常记录浏览量
+        for content_type, content_id in entry['views']:
+            view_counter.record(content_type, content_id)
+
+        response = current_app.response_class(entry['body'], status=entry['status'], headers=entry['headers'])
+        response.headers['X-Page-Cache'] = 'HIT'
+        return response.make_conditional(request)
+
+    def _process_response(self, response):
+        """请求后保存可缓存的响应；后台写操作成功后清空缓存"""
+        key = g.pop('page_cache_key', None)
+        views = g.pop('recorded_views', [])
+        if (key and request.method == 'GET' and response.status_code == 200
+                and not response.direct_passthrough and not session.modified
+                and 'Set-Cookie' not in response.headers):
+            self.store.set(key, {
+                'status': response.status_code,
+                'headers': [(name, value) for name, value in response.headers
+                            if name.lower() not in SKIPPED_HEADERS],
+                'body': response.get_data(),
+                'views': views,
+            }, self.ttl)
+            response.headers['X-Page-Cache'] = 'MISS'
+
+        if (request.method not in ('GET', 'HEAD', 'OPTIONS')
+                and request.blueprint in INVALIDATING_BLUEPRINTS
+                and response.status_code < 400):
+            self.clear()
+
+        return response
+
+    def invalidate_content(self, content_type, content):
+        """内容的计数变化后失效其详情页"""
+        if not self.enabled or content is None:
+            return
+        if content_type == 'post':
+            url = url_for('main.post_detail', slug=content.slug)
+        else:
+            url = url_for('main.project_detail', project_id=content.id)
+        path = urllib.parse.unquote(url[len(request.script_root):] if request else url)
+        self.store.delete_path(path)
+
+    def clear(self):
+        """清空全部缓存"""
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self):
+        """获取当前进程的缓存统计"""
+        total = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'backend': type(self.store).__name__ if self.store else None,
+            'entries': len(self.store) if self.store else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+page_cache = PageCache()
@@ -0,0 +1,174 @@
+"""
+游标分页模块
+按排序键（如 created_at, id）做 keyset 分页，替代 OFFSET + COUNT(*) 的分页方式：
+每页只查询 per_page + 1 条记录，翻到第 N 页与第 1 页的代价相同。
+游标是对排序键取值的不透明编码，总数统计改为可选并带短时缓存。
+"""
+
+import base64
+import binascii
+import json
+import threading
+import time
+from datetime import datetime
+
+from app.models.user import db
+
+
+def encode_cursor(values):
+    """将排序键取值编码为 URL 安全的游标字符串"""
+    items = []
+    for value in values:
+        if isinstance(value, datetime):
+            items.append(['d', value.isoformat()])
+        elif isinstance(value, float):
+            items.append(['f', value])
+        elif isinstance(value, int):
+            items.append(['i', value])
+        else:
+            items.append(['s', None if value is None else str(value)])
+    raw = json.dumps(items, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """解析游标，格式不合法时返回 None"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        items = json.loads(raw.decode('utf-8'))
+        if not isinstance(items, list) or len(items) != size:
+            return None
+        values = []
+        for kind, value in items:
+            if kind == 'd':
+                values.append(datetime.fromisoformat(value))
+            elif kind == 'f':
+                values.append(float(value))
+            elif kind == 'i':
+                values.append(int(value))
+            elif kind == 's':
+                values.append(value)
+            else:
+                return None
+        return values
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """游标分页结果"""
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    @property
+    def pages(self):
+        """总页数（未统计总数时为 None）"""
+        if self.total is None:
+            return None
+        return max(1, -(-self.total // self.per_page))
+
+    def to_dict(self):
+        """转换为 API 返回的分页信息"""
+        return {
+            'per_page': self.per_page,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'total': self.total,
+        }
+
+
+def keyset_paginate(query, sort_keys, after=None, before=None, per_page=10, descending=True, total=None):
+    """按排序键做游标分页
+
+    sort_keys 为排序列表达式列表（最后一个应为唯一键，如 id），所有键同向排序；
+    after / before 为上一次返回的 next_cursor / prev_cursor，二者都为空时返回第一页。
+    """
+    keys = [key.label(f'_keyset_{i}') for i, key in enumerate(sort_keys)]
+    row_key = db.tuple_(*sort_keys)
+
+    backward = False
+    values = decode_cursor(after, len(sort_keys))
+    if values is None:
+        values = decode_cursor(before, len(sort_keys))
+        backward = values is not None
+
+    query = query.order_by(None).add_columns(*keys)
+    if values is not None:
+        # 向后翻页取排序方向上的下一段，向前翻页则反向查询后再倒序
+        forward_cmp = row_key < db.tuple_(*values) if descending else row_key > db.tuple_(*values)
+        backward_cmp = row_key > db.tuple_(*values) if descending else row_key < db.tuple_(*values)
+        query = query.filter(backward_cmp if backward else forward_cmp)
+
+    reverse_order = descending != backward
+    query = query.order_by(*[key.desc() if reverse_order else key.asc() for key in sort_keys])
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backward:
+        rows.reverse()
+
+    items = [row[0] for row in rows]
+    first_cursor = encode_cursor(rows[0][1:]) if rows else None
+    last_cursor = encode_cursor(rows[-1][1:]) if rows else None
+
+    if backward:
+        next_cursor = last_cursor if rows else before
+        prev_cursor = first_cursor if has_more else None
+    else:
+        next_cursor = last_cursor if has_more else None
+        prev_cursor = first_cursor if values is not None and rows else None
+
+    return KeysetPage(items, per_page, next_cursor=next_cursor, prev_cursor=prev_cursor, total=total)
+
+
+class CountCache:
+    """查询总数的短时缓存，避免每次翻页都执行 COUNT(*)"""
+
+    def __init__(self, ttl=60, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, query):
+        """获取总数，缓存过期时重新统计"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                return entry[0]
+
+        total = query.order_by(None).count()
+
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (total, now + self.ttl)
+        return total
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+count_cache = CountCache()
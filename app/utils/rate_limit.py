@@ -0,0 +1,254 @@
+"""
+接口限流模块
+点赞、收藏、评论、评分、评论点赞、图片上传这些写接口按令牌桶限流：
+每个桶容量为 N 个令牌、在一个周期内匀速补满，每次请求消耗一个令牌，令牌不足时直接返回 429。
+登录用户按用户和 IP 各计一个桶（IP 的额度为用户额度的 RATE_LIMIT_IP_MULTIPLIER 倍，同一出口 IP 下可能有多个用户），
+未登录请求只按 IP 计，使用单独的桶，不占用同一 IP 下登录用户的额度。
+
+检查在 before_request 中最先执行，用户ID直接从会话 cookie 读取，被拒绝的请求不会访问数据库。
+桶状态可选进程内存（单 worker）或共享的 mmap 文件（多个 gunicorn worker 共用同一份额度）：
+文件被划分为若干组，每组 8 个槽位，键的摘要决定所在的组，读写时只锁定该组。
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from flask import jsonify, request, session
+
+try:
+    import fcntl
+except ImportError:  # Windows 不支持文件锁，回退到进程内存
+    fcntl = None
+
+# 限流的接口及使用的规则名（评论回复和评论共用一个桶）
+RATE_LIMITED_ENDPOINTS = {
+    'interaction.toggle_like': 'like',
+    'interaction.toggle_favorite': 'favorite',
+    'interaction.add_comment': 'comment',
+    'interaction.add_comment_reply': 'comment',
+    'interaction.save_rating': 'rating',
+    'interaction.comment_like': 'comment-like',
+    'interaction.upload_image': 'upload',
+}
+
+# 默认规则（单个用户）：次数/周期，可用 RATE_LIMITS 覆盖
+DEFAULT_RULES = {
+    'like': '30/minute',
+    'favorite': '30/minute',
+    'comment': '5/minute',
+    'rating': '20/minute',
+    'comment-like': '60/minute',
+    'upload': '10/minute',
+}
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# 反向代理转发的客户端地址只在请求来自本机时采用
+TRUSTED_PROXIES = {'127.0.0.1', '::1'}
+
+# 共享文件的槽位：键摘要、剩余令牌数、上次更新时间
+SLOT = struct.Struct('<Qdd')
+GROUP_SIZE = 8
+
+
+def parse_rule(rule):
+    """'30/minute' 转换为 (容量, 每秒补充的令牌数)"""
+    count, _, period = rule.strip().partition('/')
+    count = int(count)
+    seconds = PERIODS.get(period.strip() or 'second')
+    if count <= 0 or seconds is None:
+        raise ValueError(f'无效的限流规则: {rule}')
+    return count, count / seconds
+
+
+def parse_rules(value):
+    """解析 'like=30/minute,comment=5/minute' 格式的配置，与默认规则合并"""
+    rules = dict(DEFAULT_RULES)
+    if isinstance(value, dict):
+        rules.update(value)
+    elif value:
+        for item in value.split(','):
+            if '=' in item:
+                name, rule = item.split('=', 1)
+                rules[name.strip()] = rule.strip()
+    return {name: parse_rule(rule) for name, rule in rules.items()}
+
+
+def _refill(tokens, updated, now, capacity, rate):
+    """补充令牌并尝试消耗一个，返回 (剩余令牌, 需要等待的秒数)，等待 0 秒表示放行"""
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryBuckets:
+    """进程内令牌桶，超过 max_keys 时淘汰最久未使用的桶（闲置的桶本来就是满的）"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens, wait = _refill(tokens, updated, now, capacity, rate)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SharedBuckets:
+    """mmap 文件中的令牌桶，多个进程共享
+
+    组内找不到对应的键时使用空槽位，没有空槽位时覆盖最久未更新的槽位。
+    组内按 fcntl 记录锁互斥（跨进程），进程内的线程另外用线程锁互斥。
+    """
+
+    def __init__(self, path, slots=65536):
+        self.path = path
+        self.groups = max(1, slots // GROUP_SIZE)
+        self._lock = threading.Lock()
+        size = self.groups * GROUP_SIZE * SLOT.size
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        # 锁定整个文件（与其他进程按组加的锁互斥），避免多个 worker 同时初始化
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size:
+                # 槽位数变化后旧数据的位置无效，直接清空
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+    @staticmethod
+    def _digest(key):
+        # 不能用 hash()：各进程的字符串哈希随机化，结果不同；0 表示空槽位
+        return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+    def consume(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        digest = self._digest(key)
+        offset = (digest % self.groups) * GROUP_SIZE * SLOT.size
+        length = GROUP_SIZE * SLOT.size
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, length, offset)
+            try:
+                slot = None
+                victim, victim_updated = offset, math.inf
+                for index in range(GROUP_SIZE):
+                    position = offset + index * SLOT.size
+                    slot_digest, tokens, updated = SLOT.unpack_from(self._map, position)
+                    if slot_digest == digest:
+                        slot = (position, tokens, updated)
+                        break
+                    # 空槽位优先，其次是最久未更新的槽位
+                    updated = -1.0 if slot_digest == 0 else updated
+                    if updated < victim_updated:
+                        victim, victim_updated = position, updated
+                if slot is None:
+                    slot = (victim, capacity, now)
+                position, tokens, updated = slot
+                tokens, wait = _refill(tokens, updated, now, capacity, rate)
+                SLOT.pack_into(self._map, position, digest, tokens, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, length, offset)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                self._map[:] = bytes(len(self._map))
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    """写接口令牌桶限流"""
+
+    def __init__(self):
+        self.enabled = False
+        self.rules = {}
+        self.ip_multiplier = 4
+        self.buckets = None
+        self.rejected = 0
+
+    def init_app(self, app):
+        """绑定应用、创建桶存储并注册请求钩子（应在其他会访问数据库的钩子之前注册）"""
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.rules = parse_rules(app.config.get('RATE_LIMITS'))
+        self.ip_multiplier = app.config.get('RATE_LIMIT_IP_MULTIPLIER', 4)
+
+        backend = app.config.get('RATE_LIMIT_BACKEND', 'memory')
+        if backend == 'mmap' and fcntl is None:
+            app.logger.warning('当前系统不支持文件锁，接口限流改用进程内存')
+            backend = 'memory'
+        if backend == 'mmap':
+            path = app.config.get('RATE_LIMIT_FILE') or os.path.join(app.instance_path, 'rate_limit.bin')
+            self.buckets = SharedBuckets(path, app.config.get('RATE_LIMIT_SLOTS', 65536))
+        else:
+            self.buckets = MemoryBuckets()
+
+        app.before_request(self._check_request)
+        app.extensions['rate_limiter'] = self
+
+    @staticmethod
+    def client_ip():
+        """客户端地址：来自本机反向代理的请求使用 nginx 设置的 X-Real-IP"""
+        address = request.remote_addr or ''
+        if address in TRUSTED_PROXIES:
+            address = request.headers.get('X-Real-IP') or address
+        return address
+
+    def hit(self, name, user_id, ip):
+        """按规则消耗一次额度，返回需要等待的秒数（0 表示放行）
+
+        先检查 IP 桶，被拒绝时不再消耗用户桶的令牌。
+        未登录请求使用单独的 IP 桶（额度为单个用户的额度），不会按较小的容量截断登录用户共用的 IP 桶。
+        """
+        capacity, rate = self.rules[name]
+        if not user_id:
+            return self.buckets.consume(f'{name}:anon:{ip}', capacity, rate)
+        multiplier = self.ip_multiplier
+        wait = self.buckets.consume(f'{name}:ip:{ip}', capacity * multiplier, rate * multiplier)
+        if wait:
+            return wait
+        return self.buckets.consume(f'{name}:user:{user_id}', capacity, rate)
+
+    def _check_request(self):
+        if not self.enabled or request.method != 'POST':
+            return None
+        name = RATE_LIMITED_ENDPOINTS.get(request.endpoint)
+        if name is None or name not in self.rules:
+            return None
+
+        # Flask-Login 把用户ID保存在会话中，这里不加载用户对象，避免查询数据库
+        wait = self.hit(name, session.get('_user_id'), self.client_ip())
+        if not wait:
+            return None
+
+        self.rejected += 1
+        response = jsonify({'success': False, 'message': '操作过于频繁，请稍后再试'})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+        return response
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,441 @@
+"""
+相关内容推荐模块
+综合正文 TF-IDF 向量、标签和分类计算内容之间的相似度，
+离线全量（或在内容变更时增量）算出每条内容的 Top-K 相似内容写入 related_content 表，
+详情页只需一次索引查询即可取出。
+向量计算依赖 numpy / scipy，未安装时详情页退回按分类取最新内容。
+"""
+
+import math
+from array import array
+from collections import Counter, defaultdict
+from datetime import datetime
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # 旧版 Python 部署环境可以不安装
+    np = None
+    sparse = None
+
+from sqlalchemy import bindparam, text
+
+from app.models.user import db
+from app.models.related import RelatedContent
+from app.utils.search import SEARCH_TABLES, WORD_RE, is_available as search_available, segment, strip_html
+
+# 每条内容保存的相似内容数量
+TOP_K = 6
+
+# 相似度权重：正文 TF-IDF 余弦 + 标签余弦 + 同分类加分
+TEXT_WEIGHT = 0.7
+TAG_WEIGHT = 0.2
+CATEGORY_WEIGHT = 0.1
+
+# 标题词重复计入的次数
+TITLE_BOOST = 3
+
+# 出现在超过该比例文档中的词不参与计算
+MAX_DF = 0.5
+
+# 每篇文档只保留权重最高的词数，控制矩阵稀疏度
+MAX_TERMS = 32
+
+# 增量刷新时候选集的上限
+CANDIDATE_LIMIT = 200
+
+# 每类内容的 (源内容条件, 可推荐内容条件)，条件为 (字段, 值)，None 表示不限
+RELATED_RULES = {
+    'post': {'source': ('status', 'published'), 'target': ('status', 'published')},
+    'project': {'source': None, 'target': ('status', 'active')},
+}
+
+
+def is_available():
+    """是否安装了向量计算依赖"""
+    return np is not None
+
+
+def _get_model(doc_type):
+    """获取内容类型对应的模型"""
+    from app.models import Post, Project
+    return {'post': Post, 'project': Project}[doc_type]
+
+
+def _rule_filter(model, rule):
+    """将条件转换为查询表达式"""
+    if rule is None:
+        return db.true()
+    field, value = rule
+    return getattr(model, field) == value
+
+
+def _rule_matches(doc, rule):
+    """判断单条内容是否满足条件"""
+    if rule is None:
+        return True
+    field, value = rule
+    return getattr(doc, field) == value
+
+
+def _doc_terms(doc_type, doc):
+    """提取内容的词序列（与全文索引的分词方式一致）"""
+    title_field, summary_field, body_field = SEARCH_TABLES[doc_type]['fields']
+    title = WORD_RE.findall(segment(getattr(doc, title_field)))
+    summary = WORD_RE.findall(segment(strip_html(getattr(doc, summary_field))))
+    body = WORD_RE.findall(segment(strip_html(getattr(doc, body_field))))
+    return title * TITLE_BOOST + summary + body
+
+
+def _doc_tags(doc):
+    """提取内容的标签集合"""
+    from app.models import Tag
+    return [name.lower() for name in Tag.parse_names(doc.tags)]
+
+
+class _MatrixBuilder:
+    """逐篇累积词频，构造稀疏矩阵（避免一次性持有全部文档的词列表）"""
+
+    def __init__(self):
+        # 新词自动分配下一个列号
+        self.vocabulary = defaultdict()
+        self.vocabulary.default_factory = self.vocabulary.__len__
+        self.indptr = array('q', [0])
+        self.indices = array('i')
+        self.data = array('f')
+
+    def add(self, terms, binary=False):
+        counts = Counter(terms)
+        self.indices.extend(map(self.vocabulary.__getitem__, counts))
+        if binary:
+            self.data.extend([1] * len(counts))
+        else:
+            self.data.extend(counts.values())
+        self.indptr.append(len(self.indices))
+
+    def build(self):
+        shape = (len(self.indptr) - 1, max(len(self.vocabulary), 1))
+        return sparse.csr_matrix((
+            np.frombuffer(self.data, dtype=np.float32),
+            np.frombuffer(self.indices, dtype=np.int32),
+            np.frombuffer(self.indptr, dtype=np.int64),
+        ), shape=shape)
+
+    def terms(self):
+        """按列号排列的词表"""
+        terms = [None] * len(self.vocabulary)
+        for term, index in self.vocabulary.items():
+            terms[index] = term
+        return terms
+
+
+def _normalize(matrix):
+    """按行做 L2 归一化"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms) @ matrix)
+
+
+def _keep_top_terms(matrix, max_terms):
+    """每行只保留权重最高的 max_terms 个词"""
+    counts = np.diff(matrix.indptr)
+    if not len(counts) or counts.max() <= max_terms:
+        return matrix
+    rows = np.repeat(np.arange(matrix.shape[0]), counts)
+    order = np.lexsort((-matrix.data, rows))
+    rank = np.arange(len(order)) - matrix.indptr[rows[order]]
+    keep = np.sort(order[rank < max_terms])
+    return sparse.csr_matrix(
+        (matrix.data[keep], (rows[keep], matrix.indices[keep])), shape=matrix.shape
+    )
+
+
+def _tfidf(counts, df, n_docs, max_df=MAX_DF):
+    """词频矩阵转换为 TF-IDF 向量（对数词频、平滑 IDF、L2 归一化）"""
+    idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+    # 只出现在一篇文档中或过于常见的词对相似度没有贡献
+    idf[(df <= 1) | (df > max(1, max_df * n_docs))] = 0
+
+    matrix = counts.copy()
+    matrix.data = (1 + np.log(matrix.data)) * idf[matrix.indices]
+    matrix.eliminate_zeros()
+    return _normalize(_keep_top_terms(matrix, MAX_TERMS))
+
+
+def _features(text_vectors, tag_counts):
+    """拼接正文与标签向量，使向量内积等于加权后的余弦相似度之和"""
+    return sparse.hstack([
+        text_vectors * math.sqrt(TEXT_WEIGHT),
+        _normalize(tag_counts) * math.sqrt(TAG_WEIGHT),
+    ], format='csr', dtype=np.float32)
+
+
+def _category_codes(categories):
+    """分类编码为整数，无分类为 -1"""
+    codes = {}
+    return np.array(
+        [codes.setdefault(c, len(codes)) if c else -1 for c in categories], dtype=np.int32
+    )
+
+
+def _top_neighbors(features, source_ids, categories, target_rows, top_k, block_size):
+    """分块计算相似度，逐块产出 (源内容ID, [(相似内容ID, 得分), ...])"""
+    target_ids = source_ids[target_rows]
+    target_categories = categories[target_rows]
+    target_matrix = features[target_rows].T.tocsr()
+    k = min(top_k, len(target_rows))
+
+    # 源内容在目标列中的位置，用于排除自身
+    target_position = np.full(features.shape[0], -1, dtype=np.int64)
+    target_position[target_rows] = np.arange(len(target_rows))
+
+    for start in range(0, features.shape[0], block_size):
+        end = min(start + block_size, features.shape[0])
+        scores = (features[start:end] @ target_matrix).toarray()
+
+        block_categories = categories[start:end, None]
+        scores += CATEGORY_WEIGHT * (
+            (block_categories == target_categories[None, :]) & (block_categories >= 0)
+        )
+
+        own = target_position[start:end]
+        rows = np.nonzero(own >= 0)[0]
+        scores[rows, own[rows]] = -np.inf
+
+        # 每行取得分最高的 k 个，再按得分降序排列
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        for row in range(end - start):
+            yield int(source_ids[start + row]), [
+                (int(target_ids[col]), float(score))
+                for col, score in zip(top[row], top_scores[row]) if score > 0
+            ]
+
+
+def _neighbor_rows(doc_type, content_id, neighbors, now):
+    """转换为 related_content 表的插入行"""
+    return [{
+        'content_type': doc_type,
+        'content_id': content_id,
+        'related_id': related_id,
+        'position': position,
+        'score': round(score, 6),
+        'created_at': now,
+    } for position, (related_id, score) in enumerate(neighbors)]
+
+
+def rebuild_related(doc_type, top_k=TOP_K, batch_size=1000, block_size=128, progress=None):
+    """全量重新计算指定类型的相似内容，返回处理的内容数"""
+    if not is_available():
+        return 0
+
+    model = _get_model(doc_type)
+    rules = RELATED_RULES[doc_type]
+    columns = [model.id, model.category, model.tags, model.status] + [
+        getattr(model, field) for field in SEARCH_TABLES[doc_type]['fields']
+    ]
+
+    text_builder = _MatrixBuilder()
+    tag_builder = _MatrixBuilder()
+    ids = array('q')
+    categories = []
+    targets = array('q')
+
+    # 分批读取，逐篇累积词频
+    last_id = 0
+    while True:
+        rows = db.session.query(*columns).filter(
+            _rule_filter(model, rules['source']), model.id > last_id
+        ).order_by(model.id).limit(batch_size).all()
+        if not rows:
+            break
+        for row in rows:
+            if _rule_matches(row, rules['target']):
+                targets.append(len(ids))
+            ids.append(row.id)
+            categories.append(row.category)
+            text_builder.add(_doc_terms(doc_type, row))
+            tag_builder.add(_doc_tags(row), binary=True)
+        last_id = rows[-1].id
+
+    table = RelatedContent.__table__
+    db.session.execute(table.delete().where(table.c.content_type == doc_type))
+
+    total = len(ids)
+    if total and len(targets):
+        counts = text_builder.build()
+        df = np.bincount(counts.indices, minlength=counts.shape[1])
+        features = _features(_tfidf(counts, df, total), tag_builder.build())
+
+        now = datetime.utcnow()
+        pending = []
+        processed = 0
+        neighbors = _top_neighbors(
+            features, np.frombuffer(ids, dtype=np.int64), _category_codes(categories),
+            np.frombuffer(targets, dtype=np.int64), top_k, block_size
+        )
+        for content_id, items in neighbors:
+            pending.extend(_neighbor_rows(doc_type, content_id, items, now))
+            processed += 1
+            if len(pending) >= 5000:
+                db.session.execute(table.insert(), pending)
+                pending = []
+            if progress and processed % block_size == 0:
+                progress(processed)
+        if pending:
+            db.session.execute(table.insert(), pending)
+
+    db.session.commit()
+    return total
+
+
+def _global_df(doc_type, terms):
+    """从全文索引的词项统计表读取文档总数与各词的文档频率"""
+    name = SEARCH_TABLES[doc_type]['table']
+    n_docs = db.session.execute(text(f"SELECT count(*) FROM {name}")).scalar() or 0
+    df = {}
+    unique_terms = list(set(terms))
+    for i in range(0, len(unique_terms), 500):
+        rows = db.session.execute(
+            text(f"SELECT term, doc FROM {name}_vocab WHERE term IN :terms").bindparams(
+                bindparam('terms', expanding=True)
+            ),
+            {'terms': unique_terms[i:i + 500]}
+        ).all()
+        df.update(rows)
+    return n_docs, df
+
+
+def _candidate_ids(doc_type, doc, query_terms):
+    """为增量刷新召回候选内容：全文检索命中、共享标签和同分类的最新内容"""
+    model = _get_model(doc_type)
+    candidates = []
+
+    if query_terms and search_available():
+        name = SEARCH_TABLES[doc_type]['table']
+        match = ' OR '.join('"' + term.replace('"', '""') + '"' for term in query_terms)
+        candidates.extend(db.session.execute(
+            text(f"SELECT rowid FROM {name} WHERE {name} MATCH :match ORDER BY rank LIMIT :limit"),
+            {'match': match, 'limit': CANDIDATE_LIMIT}
+        ).scalars())
+
+    if doc_type == 'post' and doc.tag_items:
+        from app.models.tag import post_tags
+        candidates.extend(db.session.execute(
+            db.select(post_tags.c.post_id).where(
+                post_tags.c.tag_id.in_([tag.id for tag in doc.tag_items])
+            ).order_by(post_tags.c.post_id.desc()).limit(CANDIDATE_LIMIT)
+        ).scalars())
+
+    if doc.category:
+        candidates.extend(db.session.execute(
+            db.select(model.id).where(model.category == doc.category).order_by(
+                model.created_at.desc()
+            ).limit(50)
+        ).scalars())
+
+    return list(dict.fromkeys(cid for cid in candidates if cid != doc.id))
+
+
+def refresh_related(doc_type, doc, top_k=TOP_K):
+    """内容新增或修改后增量刷新其相似内容（在调用方事务内执行）
+
+    只重新计算该内容自身的 Top-K，其他内容列表中的旧得分在下次全量重建时更新。
+    """
+    table = RelatedContent.__table__
+    rules = RELATED_RULES[doc_type]
+    db.session.flush()
+    db.session.execute(table.delete().where(
+        table.c.content_type == doc_type, table.c.content_id == doc.id
+    ))
+
+    # 不再可见的内容从其他内容的推荐中移除
+    if not _rule_matches(doc, rules['target']):
+        db.session.execute(table.delete().where(
+            table.c.content_type == doc_type, table.c.related_id == doc.id
+        ))
+
+    if not is_available() or not _rule_matches(doc, rules['source']):
+        return
+
+    doc_terms = _doc_terms(doc_type, doc)
+    n_docs, global_df = _global_df(doc_type, doc_terms) if search_available() else (0, {})
+
+    # 先按全局 IDF 选出本文最具区分度的词，用于召回候选
+    weights = {}
+    for term, count in Counter(doc_terms).items():
+        df = global_df.get(term, 1)
+        if 1 < df <= max(1, MAX_DF * n_docs):
+            weights[term] = (1 + math.log(count)) * (math.log((1 + n_docs) / (1 + df)) + 1)
+    query_terms = sorted(weights, key=weights.get, reverse=True)[:16]
+
+    model = _get_model(doc_type)
+    candidate_ids = _candidate_ids(doc_type, doc, query_terms)
+    if not candidate_ids:
+        return
+    candidates = model.query.filter(
+        model.id.in_(candidate_ids), _rule_filter(model, rules['target'])
+    ).all()
+    if not candidates:
+        return
+
+    text_builder = _MatrixBuilder()
+    tag_builder = _MatrixBuilder()
+    for item in [doc] + candidates:
+        text_builder.add(doc_terms if item is doc else _doc_terms(doc_type, item))
+        tag_builder.add(_doc_tags(item), binary=True)
+    counts = text_builder.build()
+
+    if global_df:
+        df = np.array([global_df.get(term, 1) for term in text_builder.terms()])
+        vectors = _tfidf(counts, df, n_docs)
+    else:
+        # 没有全文索引时，以候选集估算文档频率
+        df = np.bincount(counts.indices, minlength=counts.shape[1])
+        vectors = _tfidf(counts, df, counts.shape[0], max_df=1.0)
+    features = _features(vectors, tag_builder.build())
+
+    scores = (features[1:] @ features[0].T).toarray().ravel()
+    if doc.category:
+        scores += CATEGORY_WEIGHT * np.array([item.category == doc.category for item in candidates])
+
+    order = np.argsort(-scores, kind='stable')[:top_k]
+    neighbors = [(candidates[i].id, float(scores[i])) for i in order if scores[i] > 0]
+    if neighbors:
+        db.session.execute(table.insert(), _neighbor_rows(doc_type, doc.id, neighbors, datetime.utcnow()))
+
+
+def remove_related(doc_type, doc_id):
+    """删除内容时清理相关推荐（在调用方事务内执行）"""
+    table = RelatedContent.__table__
+    db.session.execute(table.delete().where(
+        table.c.content_type == doc_type,
+        db.or_(table.c.content_id == doc_id, table.c.related_id == doc_id)
+    ))
+
+
+def get_related(doc_type, doc, limit=3):
+    """获取详情页的相关内容：优先读取预计算结果，不足时用同分类最新内容补齐"""
+    model = _get_model(doc_type)
+    target_filter = _rule_filter(model, RELATED_RULES[doc_type]['target'])
+
+    options = model.list_options(preview_length=0)
+    items = model.query.options(*options).join(RelatedContent, RelatedContent.related_id == model.id).filter(
+        RelatedContent.content_type == doc_type,
+        RelatedContent.content_id == doc.id,
+        target_filter
+    ).order_by(RelatedContent.position).limit(limit).all()
+
+    if len(items) < limit:
+        exclude = [doc.id] + [item.id for item in items]
+        items += model.query.options(*options).filter(
+            model.category == doc.category,
+            model.id.notin_(exclude),
+            target_filter
+        ).order_by(model.created_at.desc()).limit(limit - len(items)).all()
+
+    return items
@@ -0,0 +1,296 @@
+"""
+全文搜索模块
+基于 SQLite FTS5 影子表的文章/项目全文检索：
+中文按二元分词（bigram）写入索引，查询结果按 BM25 相关度排序，并生成高亮摘要。
+数据库不支持 FTS5 时自动回退到 LIKE 模糊查询。
+"""
+
+import html
+import re
+
+from flask import current_app
+from markupsafe import Markup, escape
+from sqlalchemy import column, literal_column, table, text
+from sqlalchemy.exc import OperationalError
+
+from app.models.user import db
+
+# 中日韩统一表意文字（含扩展A区与兼容区）
+CJK_RUN_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+WORD_RE = re.compile(r'\w+')
+
+# 每类内容对应的影子表及参与索引的字段（依次为 标题、摘要、正文）
+SEARCH_TABLES = {
+    'post': {'table': 'post_fts', 'fields': ('title', 'excerpt', 'content')},
+    'project': {'table': 'project_fts', 'fields': ('title', 'short_description', 'description')},
+}
+
+# BM25 列权重：标题 > 摘要 > 正文
+RANK_FUNCTION = 'bm25(10.0, 4.0, 1.0)'
+
+# 影子表的查询构造对象（连接与排序需引用同一对象，否则会重复出现在 FROM 中）
+FTS_TABLES = {
+    doc_type: table(config['table'], column('rowid'), column('rank'))
+    for doc_type, config in SEARCH_TABLES.items()
+}
+
+# 按数据库地址缓存 FTS5 是否可用
+_availability = {}
+
+
+def _get_model(doc_type):
+    """获取内容类型对应的模型"""
+    from app.models import Post, Project
+    return {'post': Post, 'project': Project}[doc_type]
+
+
+def strip_html(value):
+    """去除HTML标签并还原实体，得到纯文本"""
+    if not value:
+        return ''
+    return html.unescape(HTML_TAG_RE.sub(' ', value))
+
+
+def segment(value):
+    """将文本切分为索引用的词序列
+
+    中文连续片段拆成重叠的二元组，并在片段末尾补上最后一个单字，
+    这样任意单字都能以前缀形式命中；其他文字交给 unicode61 分词器处理。
+    """
+    if not value:
+        return ''
+
+    def split_run(match):
+        run = match.group(0)
+        if len(run) == 1:
+            return f' {run} '
+        bigrams = [run[i:i + 2] for i in range(len(run) - 1)]
+        return ' ' + ' '.join(bigrams) + f' {run[-1]} '
+
+    return CJK_RUN_RE.sub(split_run, value.lower())
+
+
+def _query_tokens(term):
+    """将单个查询词切分为 FTS5 短语，返回 (词元列表, 是否前缀匹配)"""
+    tokens = []
+    prefix = False
+    position = 0
+    for match in CJK_RUN_RE.finditer(term):
+        tokens.extend(WORD_RE.findall(term[position:match.start()]))
+        run = match.group(0)
+        if len(run) == 1:
+            tokens.append(run)
+            prefix = True
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            prefix = False
+        position = match.end()
+    tail = WORD_RE.findall(term[position:])
+    if tail:
+        tokens.extend(tail)
+        prefix = True
+    return tokens, prefix
+
+
+def build_match_query(keyword):
+    """将用户输入转换为 FTS5 MATCH 表达式，无有效词时返回 None"""
+    if not keyword:
+        return None
+
+    phrases = []
+    for term in keyword.lower().split():
+        tokens, prefix = _query_tokens(term)
+        if not tokens:
+            continue
+        phrase = '"' + ' '.join(token.replace('"', '""') for token in tokens) + '"'
+        if prefix:
+            phrase += '*'
+        phrases.append(phrase)
+
+    return ' AND '.join(phrases) if phrases else None
+
+
+def is_available():
+    """检查当前数据库是否支持 FTS5，首次调用时创建影子表"""
+    url = str(db.engine.url)
+    if url not in _availability:
+        if db.engine.dialect.name != 'sqlite':
+            _availability[url] = False
+        else:
+            try:
+                created = ensure_search_tables()
+                _availability[url] = True
+            except OperationalError as e:
+                # 仅在缺少 FTS5 模块时永久回退，其他错误（如数据库被锁）下次重试
+                if 'fts5' not in str(e):
+                    return False
+                _availability[url] = False
+            else:
+                _fill_search_tables(created)
+    return _availability[url]
+
+
+def _fill_search_tables(created):
+    """为新建的影子表写入已有内容（升级后首次启动），已有影子表为空而内容不为空时提示重建"""
+    inspector = db.inspect(db.engine)
+    for doc_type, config in SEARCH_TABLES.items():
+        model = _get_model(doc_type)
+        # 新建数据库时内容表可能尚未创建，之后新增的内容会随保存写入索引
+        if not inspector.has_table(model.__tablename__):
+            continue
+        if doc_type in created:
+            total = rebuild_index(doc_type)
+            if total:
+                current_app.logger.info(f"已为 {total} 条 {doc_type} 建立全文搜索索引")
+        elif db.session.query(model.id).first() is not None and not db.session.execute(
+            text(f"SELECT 1 FROM {config['table']} LIMIT 1")
+        ).first():
+            current_app.logger.warning(
+                f"{doc_type} 全文搜索索引为空，请执行 python maintenance.py rebuild-search --type {doc_type}"
+            )
+    db.session.remove()
+
+
+def ensure_search_tables():
+    """创建 FTS5 影子表、词项统计表并设置默认排序函数，返回本次新建影子表的内容类型"""
+    created = []
+    with db.engine.begin() as conn:
+        for doc_type, config in SEARCH_TABLES.items():
+            name = config['table']
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': name}
+            ).first()
+            if not exists:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5("
+                    f"title, summary, body, tokenize = 'unicode61 remove_diacritics 2')"
+                ))
+                conn.execute(
+                    text(f"INSERT INTO {name}({name}, rank) VALUES ('rank', :rank)"),
+                    {'rank': RANK_FUNCTION}
+                )
+                created.append(doc_type)
+            # 词项统计表，供相关内容推荐读取全局文档频率
+            conn.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {name}_vocab USING fts5vocab({name}, 'row')"))
+    return created
+
+
+def _document_values(doc_type, doc):
+    """提取待索引的字段值并分词"""
+    title_field, summary_field, body_field = SEARCH_TABLES[doc_type]['fields']
+    return {
+        'rowid': doc.id,
+        'title': segment(getattr(doc, title_field)),
+        'summary': segment(strip_html(getattr(doc, summary_field))),
+        'body': segment(strip_html(getattr(doc, body_field))),
+    }
+
+
+def index_document(doc_type, doc):
+    """写入或更新单条内容的索引（在调用方事务内执行）"""
+    if not is_available():
+        return
+    name = SEARCH_TABLES[doc_type]['table']
+    db.session.execute(text(f"DELETE FROM {name} WHERE rowid = :rowid"), {'rowid': doc.id})
+    db.session.execute(
+        text(f"INSERT INTO {name}(rowid, title, summary, body) VALUES (:rowid, :title, :summary, :body)"),
+        _document_values(doc_type, doc)
+    )
+
+
+def remove_document(doc_type, doc_id):
+    """删除单条内容的索引（在调用方事务内执行）"""
+    if not is_available():
+        return
+    name = SEARCH_TABLES[doc_type]['table']
+    db.session.execute(text(f"DELETE FROM {name} WHERE rowid = :rowid"), {'rowid': doc_id})
+
+
+def rebuild_index(doc_type, batch_size=1000, progress=None):
+    """重建指定类型的全部索引，返回写入的记录数"""
+    if not is_available():
+        return 0
+
+    model = _get_model(doc_type)
+    config = SEARCH_TABLES[doc_type]
+    name = config['table']
+    columns = [model.id] + [getattr(model, field) for field in config['fields']]
+
+    db.session.execute(text(f"DELETE FROM {name}"))
+    total = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(*columns).filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+        if not rows:
+            break
+        db.session.execute(
+            text(f"INSERT INTO {name}(rowid, title, summary, body) VALUES (:rowid, :title, :summary, :body)"),
+            [_document_values(doc_type, row) for row in rows]
+        )
+        total += len(rows)
+        last_id = rows[-1].id
+        if progress:
+            progress(total)
+
+    db.session.execute(text(f"INSERT INTO {name}({name}) VALUES ('optimize')"))
+    db.session.commit()
+    return total
+
+
+def like_filter(query, doc_type, keyword):
+    """LIKE 模糊查询（FTS5 不可用时的回退路径）"""
+    model = _get_model(doc_type)
+    return query.filter(db.or_(*[
+        getattr(model, field).contains(keyword) for field in SEARCH_TABLES[doc_type]['fields']
+    ]))
+
+
+def apply_search(query, doc_type, keyword):
+    """为查询附加全文检索条件，有索引时按相关度排序"""
+    match = build_match_query(keyword)
+    if not match or not is_available():
+        return like_filter(query, doc_type, keyword)
+
+    model = _get_model(doc_type)
+    name = SEARCH_TABLES[doc_type]['table']
+    fts = FTS_TABLES[doc_type]
+    return query.join(fts, fts.c.rowid == model.id).filter(
+        literal_column(name).op('MATCH')(match)
+    ).order_by(fts.c.rank)
+
+
+def search_rank(doc_type, keyword):
+    """获取相关度排序列（用作游标分页的排序键），未使用全文索引时返回 None"""
+    if not build_match_query(keyword) or not is_available():
+        return None
+    return FTS_TABLES[doc_type].c.rank
+
+
+def highlight_snippet(value, keyword, length=160):
+    """截取包含关键词的片段并用<mark>高亮"""
+    plain = ' '.join(strip_html(value).split())
+    terms = [term for term in (keyword or '').split() if term]
+    if not terms:
+        return Markup(escape(plain[:length]))
+
+    pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    first = pattern.search(plain)
+    start = max(0, first.start() - length // 3) if first else 0
+    window = plain[start:start + length]
+
+    parts = []
+    position = 0
+    for match in pattern.finditer(window):
+        parts.append(escape(window[position:match.start()]))
+        parts.append(Markup('<mark>%s</mark>') % match.group(0))
+        position = match.end()
+    parts.append(escape(window[position:]))
+
+    snippet = Markup('').join(parts)
+    if start > 0:
+        snippet = Markup('…') + snippet
+    if start + length < len(plain):
+        snippet += Markup('…')
+    return snippet
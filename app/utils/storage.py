@@ -0,0 +1,117 @@
+"""
+上传文件存储模块
+头像、编辑器图片等上传文件按内容的 SHA-256 摘要命名，保存在两级前缀子目录中：
+    static/uploads/objects/ab/cd/abcd...ef.jpg
+写入时边读边计算摘要，相同内容只保存一份。文件名由内容决定，URL 对应的内容永远不变，
+因此响应可以设置为永久缓存（immutable）。
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+from collections import namedtuple
+
+from flask import request
+
+# 对象存储目录（相对于 static 目录）
+OBJECTS_DIR = 'uploads/objects'
+
+# 永久缓存一年
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+CHUNK_SIZE = 64 * 1024
+
+# 扩展名统一写法，同一内容不因扩展名大小写或别名保存多份
+EXTENSION_ALIASES = {'jpeg': 'jpg', 'jpe': 'jpg', 'tif': 'tiff'}
+
+StoredFile = namedtuple('StoredFile', ['digest', 'path', 'url', 'size', 'created'])
+
+
+def normalize_extension(extension):
+    """规范化扩展名，返回带点的小写扩展名（无扩展名时返回空字符串）"""
+    extension = (extension or '').lower().lstrip('.')
+    extension = EXTENSION_ALIASES.get(extension, extension)
+    return f'.{extension}' if extension else ''
+
+
+class ContentStore:
+    """按内容摘要寻址、分目录保存的文件存储"""
+
+    def __init__(self, root=None, url_prefix=None):
+        self.root = root
+        self.url_prefix = url_prefix
+
+    def init_app(self, app):
+        """绑定应用的 static 目录，并为对象 URL 设置永久缓存响应头"""
+        self.root = os.path.join(app.static_folder, *OBJECTS_DIR.split('/'))
+        self.url_prefix = f'{app.static_url_path}/{OBJECTS_DIR}/'
+        app.after_request(self._set_cache_headers)
+        app.extensions['content_store'] = self
+
+    def _set_cache_headers(self, response):
+        if (request.endpoint == 'static' and request.path.startswith(self.url_prefix)
+                and response.status_code in (200, 304)):
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    def relative_path(self, digest, extension):
+        """摘要对应的相对路径：前两级各取两位十六进制作为子目录"""
+        return f'{digest[:2]}/{digest[2:4]}/{digest}{normalize_extension(extension)}'
+
+    def path_for(self, digest, extension):
+        return os.path.join(self.root, *self.relative_path(digest, extension).split('/'))
+
+    def url_for(self, digest, extension):
+        return self.url_prefix + self.relative_path(digest, extension)
+
+    def owns_url(self, url):
+        """URL 是否指向本存储中的文件"""
+        return bool(url) and url.startswith(self.url_prefix)
+
+    def save(self, stream, extension):
+        """从文件流保存，返回 StoredFile
+
+        内容先写入同目录的临时文件并同时计算摘要，完成后原子重命名到最终位置；
+        已存在相同内容时直接丢弃临时文件（created 为 False）。
+        """
+        os.makedirs(self.root, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            return self._commit(tmp_path, hasher.hexdigest(), extension, size)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def save_bytes(self, data, extension):
+        """保存内存中的内容（如重新编码后的图片），返回 StoredFile"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, extension)
+        if os.path.exists(path):
+            return StoredFile(digest, path, self.url_for(digest, extension), len(data), False)
+        return self.save(io.BytesIO(data), extension)
+
+    def _commit(self, tmp_path, digest, extension, size):
+        """将写好的临时文件移动到摘要对应的位置"""
+        path = self.path_for(digest, extension)
+        url = self.url_for(digest, extension)
+        if os.path.exists(path):
+            return StoredFile(digest, path, url, size, False)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.chmod(tmp_path, 0o644)
+        # 并发写入同一内容时后完成的覆盖先完成的，内容相同，不影响读取
+        os.replace(tmp_path, path)
+        return StoredFile(digest, path, url, size, True)
+
+
+content_store = ContentStore()
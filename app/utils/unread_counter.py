@@ -0,0 +1,152 @@
+"""
+未读通知计数模块
+每个用户的未读通知数保存在 notification_counters 表中，通知新增、标为已读、删除时
+在同一事务中按差值增减（会话刷新后执行），查询未读数只需按主键读取一行，不再统计通知表。
+读取结果在进程内缓存 UNREAD_COUNT_CACHE_TTL 秒，并以未读数推送的频道版本号作为缓存版本，
+本进程或其他进程（推送使用 mmap 后端时）修改后立即失效。
+
+批量 UPDATE / DELETE 不经过会话事件，调用方需要在同一事务中调用 reset() 或 recount()。
+计数偏差可以用 python maintenance.py reconcile-notifications 修复。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.user import db
+from app.models import Notification, NotificationCounter
+from app.utils.counters import insert_ignore_statement
+from app.utils.unread_events import unread_events
+
+counters = NotificationCounter.__table__
+
+
+class UnreadCounter:
+    """未读通知计数的维护与缓存"""
+
+    def __init__(self, ttl=10, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """读取缓存时间并监听数据库会话刷新"""
+        self.ttl = app.config.get('UNREAD_COUNT_CACHE_TTL', 10)
+        if not event.contains(Session, 'after_flush', self._apply_changes):
+            event.listen(Session, 'after_flush', self._apply_changes)
+        app.extensions['unread_counter'] = self
+
+    # 读取
+
+    def get(self, user_id):
+        """用户的未读通知数"""
+        # 先读版本号再查询，查询期间发生的修改会使这条缓存在下次读取时失效
+        version = unread_events.signals.read(user_id)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached and cached[0] == version and cached[1] > now:
+                return cached[2]
+
+        unread = db.session.query(NotificationCounter.unread).filter_by(user_id=user_id).scalar()
+        if unread is None:
+            # 还没有计数记录（升级后尚未有通知变化），统计一次，下次写入通知时建立记录
+            unread = Notification.query.filter_by(user_id=user_id, is_read=False).count()
+
+        with self._lock:
+            self._cache[user_id] = (version, now + self.ttl, unread)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return unread
+
+    # 维护
+
+    def reset(self, user_id):
+        """用户的通知已全部标为已读（在批量更新的同一事务中调用）"""
+        self._apply(db.session.connection(), {user_id: 0}, absolute=True)
+
+    def recount(self, *user_ids):
+        """按通知表重新统计指定用户的未读数（批量删除等无法逐条计算差值时调用）"""
+        self._apply(db.session.connection(), {user_id: None for user_id in user_ids}, absolute=True)
+
+    @staticmethod
+    def _unread(state):
+        """通知刷新前是否未读，属性未加载时返回 None"""
+        if 'is_read' not in state.dict:
+            return None
+        return not state.dict['is_read']
+
+    def _apply_changes(self, session, flush_context):
+        """根据本次刷新中新增、删除和已读状态变化的通知计算每个用户的未读数差值"""
+        deltas = {}
+        recount = set()
+        for obj in session.new:
+            if isinstance(obj, Notification):
+                deltas[obj.user_id] = deltas.get(obj.user_id, 0) + int(not obj.is_read)
+        for obj in session.deleted:
+            if isinstance(obj, Notification):
+                unread = self._unread(inspect(obj))
+                if unread is None:
+                    recount.add(obj.user_id)
+                else:
+                    deltas[obj.user_id] = deltas.get(obj.user_id, 0) - int(unread)
+        for obj in session.dirty:
+            if not isinstance(obj, Notification):
+                continue
+            history = inspect(obj).attrs.is_read.history
+            if not history.has_changes():
+                continue
+            if not history.deleted:
+                # 修改前的值未加载，无法计算差值
+                recount.add(obj.user_id)
+                continue
+            deltas[obj.user_id] = deltas.get(obj.user_id, 0) + int(not history.added[0]) - int(not history.deleted[0])
+
+        deltas = {user_id: delta for user_id, delta in deltas.items() if delta and user_id not in recount}
+        if deltas:
+            self._apply(session.connection(), deltas)
+        if recount:
+            self._apply(session.connection(), {user_id: None for user_id in recount}, absolute=True)
+
+    @staticmethod
+    def _apply(connection, values, absolute=False):
+        """更新计数
+
+        absolute 为 False 时 values 为 {用户ID: 差值}，否则为 {用户ID: 新的未读数}（None 表示重新统计）。
+        没有计数记录的用户按通知表统计后新建（此时已包含本事务中刷新的修改，不再加差值）。
+        """
+        now = datetime.utcnow()
+        notifications = Notification.__table__
+        for user_id, value in values.items():
+            assign = absolute
+            if value is None or (not absolute and connection.execute(
+                    db.select(counters.c.user_id).where(counters.c.user_id == user_id)).first() is None):
+                value = connection.execute(
+                    db.select(db.func.count()).select_from(notifications).where(
+                        notifications.c.user_id == user_id, notifications.c.is_read == False
+                    )
+                ).scalar()
+                assign = True
+
+            if assign:
+                updated = connection.execute(counters.update().where(counters.c.user_id == user_id).values(
+                    unread=value, updated_at=now
+                )).rowcount
+                if not updated:
+                    connection.execute(insert_ignore_statement(
+                        NotificationCounter, user_id=user_id, unread=value, updated_at=now
+                    ))
+            else:
+                current = counters.c.unread
+                connection.execute(counters.update().where(counters.c.user_id == user_id).values(
+                    unread=db.case((current + value < 0, 0), else_=current + value), updated_at=now
+                ))
+
+
+unread_counter = UnreadCounter()
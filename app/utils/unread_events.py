@@ -0,0 +1,227 @@
+"""
+未读数推送模块
+导航栏的未读通知数、未读消息数（管理员）不再由每个页面定时轮询，而是通过 SSE 推送：
+通知被创建、标为已读或删除，留言被创建或修改状态时，提交事务后递增对应频道的版本号；
+推送连接每隔 EVENTS_CHECK_INTERVAL 秒只读取版本号（不访问数据库），版本变化时才查询一次未读数。
+
+频道：每个用户一个（键为用户ID），留言一个（键为 0，管理员订阅）。
+版本号可选进程内存（单 worker）或共享 mmap 文件（多个 worker 共享，其他 worker 的写入也能推送）。
+事件ID由存储的随机纪元和各频道版本组成，浏览器断线重连时带上 Last-Event-ID，版本未变化时不重新查询。
+
+推送连接最长保持 EVENTS_STREAM_TIMEOUT 秒后由服务器关闭、浏览器自动重连；
+每个进程同时等待的连接数不超过 EVENTS_MAX_WAITERS，超出时 SSE 返回 503，
+浏览器改用长轮询，长轮询名额也用完时立即返回，由浏览器按 retry_after 延迟后再查询，
+避免推送连接占满 worker 的请求线程。
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+try:
+    import fcntl
+except ImportError:  # Windows 不支持文件锁，回退到进程内存
+    fcntl = None
+
+# 留言频道（用户ID从 1 开始）
+MESSAGES_CHANNEL = 0
+
+# 服务器关闭推送连接后浏览器重连的等待时间（毫秒）
+RECONNECT_DELAY = 3000
+
+# 共享文件：文件头为纪元，之后每个槽位一个版本号
+COUNTER = struct.Struct('<Q')
+
+
+class MemorySignals:
+    """进程内的频道版本号"""
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def bump(self, channel):
+        with self._lock:
+            self._versions[channel] = self._versions.get(channel, 0) + 1
+
+    def read(self, channel):
+        return self._versions.get(channel, 0)
+
+
+class SharedSignals:
+    """mmap 文件中的频道版本号，多个进程共享
+
+    频道按 键 % 槽位数 映射到槽位，不同用户落在同一槽位时只会多查询一次未读数。
+    递增时用 fcntl 记录锁锁定该槽位，读取不加锁。
+    """
+
+    def __init__(self, path, slots=65536):
+        self.path = path
+        self.slots = slots
+        self._lock = threading.Lock()
+        size = (slots + 1) * COUNTER.size
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size:
+                # 新建或槽位数变化时重新初始化，并更换纪元使浏览器保存的事件ID失效
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, COUNTER.pack(int.from_bytes(os.urandom(4), 'little') or 1), 0)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        self.epoch = format(COUNTER.unpack_from(self._map, 0)[0], 'x')
+
+    def _offset(self, channel):
+        return (1 + channel % self.slots) * COUNTER.size
+
+    def bump(self, channel):
+        offset = self._offset(channel)
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, COUNTER.size, offset)
+            try:
+                COUNTER.pack_into(self._map, offset, COUNTER.unpack_from(self._map, offset)[0] + 1)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, COUNTER.size, offset)
+
+    def read(self, channel):
+        return COUNTER.unpack_from(self._map, self._offset(channel))[0]
+
+
+class UnreadEvents:
+    """未读数变化通知与推送连接管理"""
+
+    def __init__(self):
+        self.signals = MemorySignals()
+        self.heartbeat = 15
+        self.stream_timeout = 300
+        self.poll_timeout = 25
+        self.check_interval = 1.0
+        self.max_waiters = 32
+        self._waiters = threading.BoundedSemaphore(self.max_waiters)
+        self._changed = threading.Condition()
+
+    def init_app(self, app):
+        """读取配置、创建版本号存储，并监听数据库会话的提交"""
+        self.heartbeat = app.config.get('EVENTS_HEARTBEAT', 15)
+        self.stream_timeout = app.config.get('EVENTS_STREAM_TIMEOUT', 300)
+        self.poll_timeout = app.config.get('EVENTS_POLL_TIMEOUT', 25)
+        self.check_interval = app.config.get('EVENTS_CHECK_INTERVAL', 1.0)
+        self.max_waiters = app.config.get('EVENTS_MAX_WAITERS', 32)
+        self._waiters = threading.BoundedSemaphore(self.max_waiters)
+
+        backend = app.config.get('EVENTS_BACKEND', 'memory')
+        if backend == 'mmap' and fcntl is None:
+            app.logger.warning('当前系统不支持文件锁，未读数推送改用进程内存')
+            backend = 'memory'
+        if backend == 'mmap':
+            path = app.config.get('EVENTS_FILE') or os.path.join(app.instance_path, 'unread_events.bin')
+            self.signals = SharedSignals(path)
+        else:
+            self.signals = MemorySignals()
+
+        if not event.contains(Session, 'after_flush', self._collect_changes):
+            event.listen(Session, 'after_flush', self._collect_changes)
+            event.listen(Session, 'after_commit', self._publish_changes)
+            event.listen(Session, 'after_rollback', self._discard_changes)
+        app.extensions['unread_events'] = self
+
+    # 变化通知
+
+    def touch(self, *channels):
+        """频道的未读数已变化（批量 UPDATE / DELETE 不经过会话事件，提交后需要手动调用）"""
+        for channel in channels:
+            self.signals.bump(channel)
+        with self._changed:
+            self._changed.notify_all()
+
+    @staticmethod
+    def _collect_changes(session, flush_context):
+        """记录本次刷新中影响未读数的通知和留言，提交后统一通知"""
+        from app.models import Notification, Message
+
+        channels = session.info.setdefault('unread_channels', set())
+        for obj in session.new | session.deleted:
+            if isinstance(obj, Notification):
+                channels.add(obj.user_id)
+            elif isinstance(obj, Message):
+                channels.add(MESSAGES_CHANNEL)
+        for obj in session.dirty:
+            if isinstance(obj, Notification) and inspect(obj).attrs.is_read.history.has_changes():
+                channels.add(obj.user_id)
+            elif isinstance(obj, Message) and inspect(obj).attrs.status.history.has_changes():
+                channels.add(MESSAGES_CHANNEL)
+
+    def _publish_changes(self, session):
+        channels = session.info.pop('unread_channels', None)
+        if channels:
+            self.touch(*channels)
+
+    @staticmethod
+    def _discard_changes(session):
+        session.info.pop('unread_channels', None)
+
+    # 推送
+
+    @staticmethod
+    def channels_for(user):
+        return (user.id, MESSAGES_CHANNEL) if user.is_admin else (user.id,)
+
+    def event_id(self, channels):
+        """当前版本对应的事件ID：纪元-各频道版本号"""
+        return '-'.join([self.signals.epoch] + [str(self.signals.read(channel)) for channel in channels])
+
+    def wait(self, channels, last_id, timeout):
+        """等待频道版本变化，返回新的事件ID；超时仍未变化时返回 last_id
+
+        本进程的写入立即唤醒，其他进程的写入在下一次检查时发现。
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self.event_id(channels)
+            remaining = deadline - time.monotonic()
+            if current != last_id or remaining <= 0:
+                return current
+            with self._changed:
+                self._changed.wait(min(self.check_interval, remaining))
+
+    def acquire_waiter(self):
+        """占用一个等待名额，名额用完时返回 False"""
+        return self._waiters.acquire(blocking=False)
+
+    def release_waiter(self):
+        self._waiters.release()
+
+    def stream(self, channels, last_id, load_counts):
+        """SSE 响应内容
+
+        load_counts() 返回未读数字典；连接期间每 heartbeat 秒发送一次注释行保持连接，
+        stream_timeout 秒后结束，浏览器带上最后的事件ID重连。
+        调用方需已占用等待名额，并在响应关闭时释放（生成器未开始执行就断开时不会运行 finally）。
+        """
+        yield f'retry: {RECONNECT_DELAY}\n\n'
+        deadline = time.monotonic() + self.stream_timeout
+        current = self.event_id(channels)
+        while True:
+            if current != last_id:
+                last_id = current
+                yield f'id: {current}\nevent: badges\ndata: {json.dumps(load_counts())}\n\n'
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            current = self.wait(channels, last_id, min(self.heartbeat, remaining))
+            if current == last_id:
+                yield ': ping\n\n'
+
+
+unread_events = UnreadEvents()
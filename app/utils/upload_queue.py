@@ -0,0 +1,336 @@
+"""
+上传后处理队列模块
+上传请求只做大小、类型和文件头检查，把原始文件暂存到 UPLOAD_QUEUE_DIR 并写入一条任务记录后立即返回任务ID；
+解码、重新编码、生成缩略图在有界的进程池（UPLOAD_WORKERS 个进程）中执行，不占用 gunicorn 的请求线程。
+任务保存在数据库中，各 worker 的调度线程用带条件的 UPDATE 领取任务并记录所在进程，同一任务只会被一个进程处理；
+调度线程在应用创建完成时启动，重启后不必等到有请求到来就会继续处理排队中的任务。
+进程正常退出时把未完成的任务放回队列；异常退出时，同一主机上的其他进程发现领取进程已不存在后立即重新排队，
+无法判断（其他主机）时在 UPLOAD_JOB_TIMEOUT 秒后重新排队。
+UPLOAD_WORKERS 为 0 时在请求中直接处理（开发环境）。
+"""
+
+import atexit
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from functools import partial
+
+from flask import url_for
+
+from app.models.user import db
+from app.models import UploadJob
+from app.utils import images
+from app.utils.storage import content_store
+
+# 任务最多执行次数（进程崩溃、超时后重新排队）
+MAX_ATTEMPTS = 3
+
+
+class UploadQueue:
+    """基于数据库任务表和进程池的上传处理队列"""
+
+    def __init__(self):
+        self.app = None
+        self.workers = 2
+        self.directory = None
+        self.job_timeout = 300
+        # 本进程的新任务和完成回调会立即唤醒调度线程，定期检查只用于发现其他进程放回队列的任务
+        self.poll_interval = 30.0
+        self._kinds = {}
+        self._pool = None
+        self._pid = None
+        self.owner = None
+        self._inflight = set()
+        self._closing = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def init_app(self, app):
+        """绑定应用、读取配置，并在请求到来时确保当前进程的调度线程已启动（gunicorn fork 出的 worker 需要重新启动）"""
+        self.app = app
+        self.workers = app.config.get('UPLOAD_WORKERS', 2)
+        self.directory = app.config.get('UPLOAD_QUEUE_DIR') or os.path.join(app.instance_path, 'upload_queue')
+        self.job_timeout = app.config.get('UPLOAD_JOB_TIMEOUT', 300)
+        os.makedirs(self.directory, exist_ok=True)
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+        if self.workers > 0:
+            app.before_request(self._ensure_dispatcher)
+            atexit.register(self.shutdown)
+        app.extensions['upload_queue'] = self
+
+    def start(self):
+        """启动当前进程的调度线程（应在任务类型注册后调用），不必等到有请求到来"""
+        # 进程池的子进程以 spawn 方式启动时会重新导入主模块（如 run.py）并创建应用，子进程中不启动调度
+        if multiprocessing.parent_process() is not None:
+            return
+        self._ensure_dispatcher()
+
+    def register(self, kind, on_complete=None, **options):
+        """注册任务类型
+
+        options 为传给 images.process_upload 的处理参数（最大边长、缩略图宽度等），
+        on_complete(job, result) 在处理成功、提交前调用，可更新关联数据或补充结果字段。
+        """
+        self._kinds[kind] = (options, on_complete)
+
+    def enqueue(self, kind, file, user_id, original_name, extension):
+        """暂存上传文件并创建任务，返回 UploadJob（UPLOAD_WORKERS 为 0 时返回时已处理完成）"""
+        job_id = uuid.uuid4().hex
+        source_path = os.path.join(self.directory, f'{job_id}{extension}')
+        file.save(source_path)
+
+        job = UploadJob(
+            id=job_id, user_id=user_id, kind=kind, status=UploadJob.STATUS_QUEUED,
+            source_path=source_path, extension=extension, original_name=original_name[:200]
+        )
+        try:
+            db.session.add(job)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            os.remove(source_path)
+            raise
+
+        if self.workers <= 0:
+            self._run_inline(job)
+        else:
+            self._ensure_dispatcher()
+            self._wakeup.set()
+        return job
+
+    def _options(self, kind):
+        options, _ = self._kinds[kind]
+        options = dict(options)
+        options.setdefault('preferred_format', self.app.config.get('IMAGE_OUTPUT_FORMAT', 'jpeg'))
+        return options
+
+    def _process_args(self, job):
+        return (job.source_path, content_store.root, content_store.url_prefix, job.extension)
+
+    def _claim(self, job_id):
+        """领取排队中的任务，已被其他进程领取时返回 None"""
+        claimed = UploadJob.query.filter_by(id=job_id, status=UploadJob.STATUS_QUEUED).update({
+            UploadJob.status: UploadJob.STATUS_PROCESSING,
+            UploadJob.owner: self.owner,
+            UploadJob.started_at: datetime.utcnow(),
+            UploadJob.attempts: UploadJob.attempts + 1,
+        }, synchronize_session=False)
+        db.session.commit()
+        return db.session.get(UploadJob, job_id) if claimed else None
+
+    def _run_inline(self, job):
+        job = self._claim(job.id)
+        if job is None:
+            return
+        try:
+            result = images.process_upload(*self._process_args(job), **self._options(job.kind))
+        except images.ImageProcessingError as e:
+            self._finish(job, error=str(e))
+        except Exception as e:
+            self.app.logger.error(f"上传任务 {job.id} 处理失败: {e}")
+            self._finish(job, error='处理失败，请稍后重试')
+        else:
+            self._finish(job, result=result)
+
+    def _finish(self, job, result=None, error=None, retry=False):
+        """记录任务结果；retry 为 True 时在次数未用完前重新排队"""
+        db.session.refresh(job)
+        if result is not None:
+            _, on_complete = self._kinds[job.kind]
+            if on_complete is not None:
+                on_complete(job, result)
+            job.status = UploadJob.STATUS_DONE
+            job.result = json.dumps(result, ensure_ascii=False)
+            job.error = None
+        elif retry and job.attempts < MAX_ATTEMPTS:
+            job.status = UploadJob.STATUS_QUEUED
+        else:
+            job.status = UploadJob.STATUS_FAILED
+            job.error = error
+        if job.is_finished:
+            job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+        if job.is_finished and os.path.exists(job.source_path):
+            os.remove(job.source_path)
+
+    def _ensure_dispatcher(self):
+        """确保当前进程已创建进程池并启动调度线程（gunicorn fork 后需要重新创建）"""
+        if self._pid == os.getpid() or self.workers <= 0:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.owner = f'{socket.gethostname()}:{self._pid}'
+            self._inflight = set()
+            self._pool = self._create_pool()
+            thread = threading.Thread(target=self._run, name='upload-dispatcher', daemon=True)
+            thread.start()
+            # 启动后立即检查一次队列（重启前排队和处理中断的任务）
+            self._wakeup.set()
+
+    def _create_pool(self):
+        # 使用 spawn 启动子进程，避免从带有线程和数据库连接的进程 fork
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _run(self):
+        """调度循环：收到新任务、任务完成通知或每隔 poll_interval 秒检查一次队列"""
+        ready = False
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            if self._closing:
+                return
+            try:
+                with self.app.app_context():
+                    # 脚本在 create_app 之后才建表时，表建好前跳过
+                    ready = ready or db.inspect(db.engine).has_table(UploadJob.__tablename__)
+                    if not ready:
+                        continue
+                    self._requeue_stale()
+                    self._dispatch()
+            except Exception as e:
+                self.app.logger.error(f"上传任务调度失败: {e}")
+
+    @staticmethod
+    def _owner_alive(owner):
+        """领取任务的进程是否仍在运行；不在本机或无法判断时返回 None"""
+        host, _, pid = (owner or '').rpartition(':')
+        # Windows 上 os.kill 会结束目标进程，不能用来检查
+        if os.name != 'posix' or host != socket.gethostname() or not pid.isdigit():
+            return None
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _requeue_stale(self):
+        """所在进程已退出的任务重新排队，次数用完的标记为失败
+
+        领取进程仍在运行的任务不动（由该进程自己处理完成或失败），无法判断的任务超过 job_timeout 秒后才重新排队。
+        每条任务按领取时的进程和执行次数有条件地更新，多个进程同时检查时只会放回一次。
+        """
+        deadline = datetime.utcnow() - timedelta(seconds=self.job_timeout)
+        candidates = db.session.query(
+            UploadJob.id, UploadJob.owner, UploadJob.attempts, UploadJob.started_at
+        ).filter(
+            UploadJob.status == UploadJob.STATUS_PROCESSING,
+            UploadJob.id.notin_(list(self._inflight))
+        ).all()
+
+        for job_id, owner, attempts, started_at in candidates:
+            alive = self._owner_alive(owner)
+            if alive or (alive is None and started_at is not None and started_at >= deadline):
+                continue
+            if attempts >= MAX_ATTEMPTS:
+                values = {
+                    UploadJob.status: UploadJob.STATUS_FAILED,
+                    UploadJob.error: '处理超时',
+                    UploadJob.finished_at: datetime.utcnow(),
+                }
+            else:
+                values = {UploadJob.status: UploadJob.STATUS_QUEUED}
+            UploadJob.query.filter_by(
+                id=job_id, status=UploadJob.STATUS_PROCESSING, owner=owner, attempts=attempts
+            ).update(values, synchronize_session=False)
+        db.session.commit()
+
+    def _dispatch(self):
+        """按空闲名额领取任务提交到进程池（每个进程最多排队一个，超出的留在数据库中）"""
+        free = self.workers * 2 - len(self._inflight)
+        if free <= 0:
+            return
+        job_ids = [job_id for job_id, in db.session.query(UploadJob.id).filter(
+            UploadJob.status == UploadJob.STATUS_QUEUED,
+            UploadJob.kind.in_(list(self._kinds))
+        ).order_by(UploadJob.created_at).limit(free)]
+
+        for job_id in job_ids:
+            if self._closing:
+                break
+            job = self._claim(job_id)
+            if job is None:
+                continue
+            self._inflight.add(job.id)
+            pool = self._pool
+            try:
+                future = pool.submit(images.process_upload, *self._process_args(job), **self._options(job.kind))
+            except RuntimeError:
+                # 解释器退出时进程池会先于 shutdown 关闭，已领取的任务由 shutdown 放回队列
+                self._closing = True
+                return
+            future.add_done_callback(partial(self._on_done, job.id, pool))
+
+    def _on_done(self, job_id, pool, future):
+        """进程池任务完成回调（在进程池的管理线程中执行）"""
+        try:
+            with self.app.app_context():
+                job = db.session.get(UploadJob, job_id)
+                try:
+                    result = future.result()
+                except images.ImageProcessingError as e:
+                    self._finish(job, error=str(e))
+                except BrokenProcessPool:
+                    # 子进程异常退出，重建进程池后重试
+                    self.app.logger.error(f"上传处理进程异常退出，任务 {job_id} 重新排队")
+                    with self._lock:
+                        if self._pool is pool:
+                            self._pool = self._create_pool()
+                    self._finish(job, error='处理进程异常退出', retry=True)
+                except Exception as e:
+                    self.app.logger.error(f"上传任务 {job_id} 处理失败: {e}")
+                    self._finish(job, error='处理失败，请稍后重试', retry=True)
+                else:
+                    self._finish(job, result=result)
+                db.session.remove()
+        except Exception as e:
+            self.app.logger.error(f"上传任务 {job_id} 结果保存失败: {e}")
+        finally:
+            self._inflight.discard(job_id)
+            self._wakeup.set()
+
+    def shutdown(self):
+        """进程退出时把本进程未完成的任务放回队列，由其他进程或重启后继续处理"""
+        if self._pid != os.getpid():
+            return
+        # 进程池关闭后调度线程不再领取任务
+        self._closing = True
+        if not self._inflight:
+            return
+        try:
+            with self.app.app_context():
+                UploadJob.query.filter(
+                    UploadJob.id.in_(list(self._inflight)),
+                    UploadJob.status == UploadJob.STATUS_PROCESSING
+                ).update({
+                    UploadJob.status: UploadJob.STATUS_QUEUED,
+                    UploadJob.attempts: UploadJob.attempts - 1,
+                }, synchronize_session=False)
+                db.session.commit()
+        except Exception as e:
+            self.app.logger.error(f"上传任务放回队列失败: {e}")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def job_response(job, message):
+    """上传接口的返回内容：已完成时直接带上处理结果，否则返回任务ID和状态查询地址（202）"""
+    payload = {'job_id': job.id, 'status': job.status}
+    if job.status == UploadJob.STATUS_DONE:
+        return {'success': True, 'message': message, **payload, **job.get_result()}, 200
+    if job.status == UploadJob.STATUS_FAILED:
+        return {'success': False, 'message': job.error, **payload}, 400
+    payload['status_url'] = url_for('interaction.upload_job_status', job_id=job.id)
+    return {'success': True, 'message': '文件已上传，正在处理', **payload}, 202
+
+
+upload_queue = UploadQueue()
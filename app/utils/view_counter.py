@@ -0,0 +1,130 @@
+"""
+浏览量缓冲计数模块
+详情页的浏览量先累积在进程内存中，每隔 N 秒或累积 M 次后合并为增量批量写回数据库，
+避免每次页面访问都产生一次写事务。
+各 gunicorn worker 独立缓冲，写回时使用 view_count = view_count + 增量，互不覆盖；
+进程正常退出时会自动写回剩余的增量。
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context
+from sqlalchemy import bindparam, func, update
+
+from app.models.user import db
+
+
+class ViewCounter:
+    """浏览量写回缓冲区"""
+
+    def __init__(self):
+        self.app = None
+        self.flush_interval = 10
+        self.flush_threshold = 200
+        self.buffered = True
+        self._pending = Counter()
+        self._events = 0
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def init_app(self, app):
+        """绑定应用并读取配置"""
+        self.app = app
+        self.flush_interval = app.config.get('VIEW_COUNT_FLUSH_INTERVAL', 10)
+        self.flush_threshold = app.config.get('VIEW_COUNT_FLUSH_THRESHOLD', 200)
+        self.buffered = app.config.get('VIEW_COUNT_BUFFERED', True)
+        app.extensions['view_counter'] = self
+        atexit.register(self.flush)
+
+    def _tables(self):
+        """内容类型与数据表的对应关系"""
+        from app.models import Post, Project
+        return {'post': Post.__table__, 'project': Project.__table__}
+
+    def _ensure_flusher(self):
+        """确保当前进程已启动定时写回线程（gunicorn fork 后需要重新启动）"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            thread = threading.Thread(target=self._run, name='view-counter-flusher', daemon=True)
+            thread.start()
+
+    def _run(self):
+        """定时写回循环"""
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def record(self, content_type, content_id):
+        """记录一次浏览"""
+        # 记下本次请求产生的浏览，整页缓存命中时据此补记
+        if has_request_context():
+            g.setdefault('recorded_views', []).append((content_type, content_id))
+        
+        if not self.buffered:
+            self._apply({(content_type, content_id): 1})
+            return
+
+        self._ensure_flusher()
+        with self._lock:
+            self._pending[(content_type, content_id)] += 1
+            self._events += 1
+            should_flush = self._events >= self.flush_threshold
+
+        if should_flush:
+            self.flush()
+
+    def pending(self, content_type, content_id):
+        """获取尚未写回的浏览量"""
+        with self._lock:
+            return self._pending.get((content_type, content_id), 0)
+
+    def flush(self):
+        """将累积的增量写回数据库，返回写回的浏览次数"""
+        with self._lock:
+            if not self._pending:
+                return 0
+            deltas = self._pending
+            self._pending = Counter()
+            self._events = 0
+
+        try:
+            self._apply(deltas)
+        except Exception as e:
+            # 写回失败时放回缓冲区，等待下次重试
+            with self._lock:
+                self._pending.update(deltas)
+                self._events += sum(deltas.values())
+            if self.app:
+                self.app.logger.error(f"浏览量写回失败: {e}")
+            return 0
+
+        return sum(deltas.values())
+
+    def _apply(self, deltas):
+        """在独立事务中批量执行增量更新"""
+        grouped = {}
+        for (content_type, content_id), delta in deltas.items():
+            grouped.setdefault(content_type, []).append({'b_id': content_id, 'b_delta': delta})
+
+        with self.app.app_context():
+            tables = self._tables()
+            with db.engine.begin() as conn:
+                for content_type, params in grouped.items():
+                    table = tables[content_type]
+                    # 保留 updated_at，浏览量变化不算内容更新（不影响 ETag / Last-Modified）
+                    stmt = update(table).where(table.c.id == bindparam('b_id')).values(
+                        view_count=func.coalesce(table.c.view_count, 0) + bindparam('b_delta'),
+                        updated_at=table.c.updated_at
+                    )
+                    conn.execute(stmt, params)
+
+
+view_counter = ViewCounter()
@@ -0,0 +1,1489 @@
+#!/usr/bin/env python3
+"""
+性能基准测试脚本
+在临时数据库中生成模拟数据，对比优化前后的耗时
+"""
+
+import os
+import sys
+import argparse
+import io
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 模拟文章使用的词汇
+SAMPLE_WORDS = [
+    '性能', '优化', '数据库', '索引', '缓存', '并发', '分布式', '架构', '前端', '后端',
+    '搜索', '引擎', '算法', '服务器', '网络', '安全', '测试', '部署', '容器', '日志',
+    '监控', '设计', '模式', '框架', '接口', '异步', '队列', '事务', '存储', '压缩',
+    'Python', 'Flask', 'SQLite', 'Redis', 'Docker', 'Linux', 'Nginx', 'JavaScript',
+]
+
+# 用于生成填充词的常用汉字，使关键词只出现在部分文章中
+FILLER_CHARS = '的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把'
+
+
+def timed(func, repeat):
+    """多次执行函数，返回耗时中位数（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def build_vocabulary(rng, size=3000):
+    """生成词表：示例词汇加随机双字词"""
+    vocabulary = list(SAMPLE_WORDS)
+    while len(vocabulary) < size:
+        vocabulary.append(rng.choice(FILLER_CHARS) + rng.choice(FILLER_CHARS))
+    return vocabulary
+
+
+def random_text(rng, vocabulary, words):
+    """生成指定词数的随机文本"""
+    return ''.join(rng.choice(vocabulary) for _ in range(words))
+
+
+def create_temp_app():
+    """创建使用临时数据库的应用"""
+    db_file = os.path.join(tempfile.mkdtemp(prefix='blog_bench_'), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_file}'
+
+    # 导入 app 包时配置可能已被加载，直接改写数据库地址
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = os.environ['DATABASE_URL']
+
+    from app import create_app
+    from app.models.user import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    return app, db_file
+
+
+def ensure_bench_user():
+    """创建基准测试用户，返回用户ID"""
+    from app.models.user import db, User
+
+    user = User.query.filter_by(username='bench').first()
+    if not user:
+        user = User(username='bench', email='bench@example.com', password_hash='-')
+        db.session.add(user)
+        db.session.commit()
+    return user.id
+
+
+def insert_posts(count, start_id, author_id, body_words, rng, vocabulary):
+    """批量插入模拟文章"""
+    from app.models.user import db
+    from app.models import Post
+
+    base_time = datetime(2020, 1, 1)
+    batch = []
+    for i in range(start_id, start_id + count):
+        batch.append({
+            'id': i,
+            'title': random_text(rng, vocabulary, 4),
+            'content': random_text(rng, vocabulary, body_words),
+            'excerpt': random_text(rng, vocabulary, 12),
+            'slug': f'bench-post-{i}',
+            'status': 'published',
+            'category': rng.choice(['技术', '生活', '随笔']),
+            'tags': ','.join(rng.sample(SAMPLE_WORDS, 3)),
+            'view_count': rng.randint(0, 10000),
+            'author_id': author_id,
+            'created_at': base_time + timedelta(minutes=i),
+            'updated_at': base_time + timedelta(minutes=i),
+        })
+        if len(batch) >= 5000:
+            db.session.execute(Post.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Post.__table__.insert(), batch)
+    db.session.commit()
+
+
+def bench_search(args):
+    """全文搜索与 LIKE 查询延迟对比"""
+    app, db_file = create_temp_app()
+    rng = random.Random(42)
+    vocabulary = build_vocabulary(rng)
+
+    from app.models import Post
+    from app.utils.search import apply_search, like_filter, rebuild_index, is_available
+
+    with app.app_context():
+        if not is_available():
+            print("❌ 当前 SQLite 不支持 FTS5，无法对比")
+            return 1
+
+        author_id = ensure_bench_user()
+        inserted = 0
+        print(f"📁 临时数据库: {db_file}")
+        print(f"{'文章数':>10} {'关键词':<12} {'LIKE(ms)':>10} {'FTS5(ms)':>10} {'加速比':>8}")
+        print("-" * 56)
+
+        for size in sorted(args.sizes):
+            insert_posts(size - inserted, inserted + 1, author_id, args.body_words, rng, vocabulary)
+            inserted = size
+
+            start = time.perf_counter()
+            rebuild_index('post', batch_size=5000)
+            index_seconds = time.perf_counter() - start
+
+            for keyword in args.queries:
+                base = Post.query.filter(Post.status == 'published')
+
+                def run_like():
+                    like_filter(base, 'post', keyword).order_by(Post.created_at.desc()).paginate(
+                        page=1, per_page=10, error_out=False
+                    )
+
+                def run_fts():
+                    apply_search(base, 'post', keyword).order_by(Post.created_at.desc()).paginate(
+                        page=1, per_page=10, error_out=False
+                    )
+
+                like_ms = timed(run_like, args.repeat)
+                fts_ms = timed(run_fts, args.repeat)
+                print(f"{size:>10} {keyword:<12} {like_ms:>10.2f} {fts_ms:>10.2f} {like_ms / fts_ms:>7.1f}x")
+
+            print(f"{'':>10} 索引构建耗时 {index_seconds:.1f}s")
+
+    return 0
+
+
+def _views_worker(task):
+    """浏览量压测子进程：连续请求同一篇热门文章"""
+    db_url, slug, requests_per_worker, buffered = task
+    os.environ['DATABASE_URL'] = db_url
+
+    from app import create_app
+    from app.utils.view_counter import view_counter
+
+    app = create_app()
+    app.config['VIEW_COUNT_BUFFERED'] = buffered
+    view_counter.init_app(app)
+    client = app.test_client()
+    base_url = f"http://{app.config.get('SERVER_NAME') or 'localhost'}"
+
+    start = time.perf_counter()
+    for _ in range(requests_per_worker):
+        client.get(f'/blog/post/{slug}', base_url=base_url)
+    elapsed = time.perf_counter() - start
+    view_counter.flush()
+    return elapsed
+
+
+def bench_views(args):
+    """热门文章详情页吞吐量对比：逐次写库 vs 缓冲写回"""
+    import multiprocessing
+
+    app, db_file = create_temp_app()
+    rng = random.Random(42)
+    vocabulary = build_vocabulary(rng)
+
+    from app.models.user import db
+    from app.models import Post
+
+    with app.app_context():
+        author_id = ensure_bench_user()
+        insert_posts(1, 1, author_id, args.body_words, rng, vocabulary)
+        slug = db.session.get(Post, 1).slug
+
+    db_url = f'sqlite:///{db_file}'
+    total_requests = args.workers * args.requests
+    print(f"📁 临时数据库: {db_file}")
+    print(f"{'模式':<10} {'进程数':>6} {'请求数':>8} {'耗时(s)':>8} {'吞吐(req/s)':>12} {'计数正确':>8}")
+    print("-" * 60)
+
+    ctx = multiprocessing.get_context('spawn')
+    for label, buffered in [('逐次写库', False), ('缓冲写回', True)]:
+        with app.app_context():
+            before = db.session.get(Post, 1).view_count
+            db.session.remove()
+
+        # 只统计请求阶段耗时，不含进程启动
+        with ctx.Pool(args.workers) as pool:
+            elapsed = max(pool.map(_views_worker, [(db_url, slug, args.requests, buffered)] * args.workers))
+
+        with app.app_context():
+            after = db.session.get(Post, 1).view_count
+            db.session.remove()
+
+        correct = '✅' if after - before == total_requests else f'❌ {after - before}'
+        print(f"{label:<10} {args.workers:>6} {total_requests:>8} {elapsed:>8.2f} "
+              f"{total_requests / elapsed:>12.1f} {correct:>8}")
+
+    return 0
+
+
+def _counters_worker(task):
+    """互动计数压测子进程：多个用户随机切换点赞、收藏和评论点赞"""
+    db_url, user_ids, post_ids, comment_ids, requests_per_worker, seed = task
+    os.environ['DATABASE_URL'] = db_url
+
+    from app import create_app
+
+    app = create_app()
+    base_url = f"http://{app.config.get('SERVER_NAME') or 'localhost'}"
+    rng = random.Random(seed)
+    clients = {}
+    errors = 0
+
+    for _ in range(requests_per_worker):
+        user_id = rng.choice(user_ids)
+        client = clients.get(user_id)
+        if client is None:
+            client = clients[user_id] = app.test_client()
+            with client.session_transaction(base_url=base_url) as session:
+                session['_user_id'] = str(user_id)
+                session['_fresh'] = True
+
+        action = rng.choice(['like', 'favorite', 'comment-like'])
+        if action == 'comment-like':
+            payload = {'comment_id': rng.choice(comment_ids)}
+        else:
+            payload = {'type': 'post', 'id': rng.choice(post_ids)}
+        response = client.post(f'/api/{action}', json=payload, base_url=base_url)
+        if response.status_code != 200 or not response.get_json().get('success'):
+            errors += 1
+    return errors
+
+
+def bench_counters(args):
+    """互动计数并发压测：多进程随机切换点赞 / 收藏 / 评论点赞，校验计数与互动记录一致"""
+    import multiprocessing
+
+    app, db_file = create_temp_app()
+    rng = random.Random(42)
+    vocabulary = build_vocabulary(rng)
+
+    from app.models.user import db, User
+    from app.models import Comment, CommentLike, Post, UserInteraction
+
+    with app.app_context():
+        author_id = ensure_bench_user()
+        insert_posts(args.posts, 1, author_id, 20, rng, vocabulary)
+        users = [{'id': i, 'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password_hash': '-'}
+                 for i in range(author_id + 1, author_id + 1 + args.users)]
+        db.session.execute(User.__table__.insert(), users)
+        user_ids = [user['id'] for user in users]
+        post_ids = list(range(1, args.posts + 1))
+        db.session.execute(Comment.__table__.insert(), [
+            {'id': i, 'user_id': author_id, 'post_id': rng.choice(post_ids), 'content': f'评论{i}',
+             'is_approved': True, 'like_count': 0}
+            for i in range(1, args.posts + 1)
+        ])
+        comment_ids = post_ids
+        db.session.commit()
+
+    db_url = f'sqlite:///{db_file}'
+    tasks = [(db_url, user_ids, post_ids, comment_ids, args.requests, seed) for seed in range(args.workers)]
+    total_requests = args.workers * args.requests
+
+    print(f"📁 临时数据库: {db_file}")
+    ctx = multiprocessing.get_context('spawn')
+    start = time.perf_counter()
+    with ctx.Pool(args.workers) as pool:
+        errors = sum(pool.map(_counters_worker, tasks))
+    elapsed = time.perf_counter() - start
+    print(f"🚀 {args.workers} 个进程共 {total_requests} 次切换，耗时 {elapsed:.2f}s，失败 {errors} 次")
+
+    with app.app_context():
+        checks = [
+            ('文章点赞数', Post.like_count, db.session.query(db.func.count(UserInteraction.id)).filter(
+                UserInteraction.type == 1, UserInteraction.content_id == Post.id, UserInteraction.like == 1
+            ).scalar_subquery(), Post),
+            ('文章收藏数', Post.favorite_count, db.session.query(db.func.count(UserInteraction.id)).filter(
+                UserInteraction.type == 1, UserInteraction.content_id == Post.id, UserInteraction.favorite == 1
+            ).scalar_subquery(), Post),
+            ('评论点赞数', Comment.like_count, db.session.query(db.func.count(CommentLike.id)).filter(
+                CommentLike.comment_id == Comment.id
+            ).scalar_subquery(), Comment),
+        ]
+        failed = errors > 0
+        for label, counter, actual, model in checks:
+            mismatched = db.session.query(db.func.count(model.id)).filter(
+                db.func.coalesce(counter, 0) != actual
+            ).scalar()
+            total = db.session.query(db.func.sum(counter)).scalar() or 0
+            print(f"{'✅' if not mismatched else '❌'} {label}: 合计 {total}，与互动记录不一致 {mismatched} 条")
+            failed = failed or mismatched > 0
+
+    return 1 if failed else 0
+
+
+def bench_pagination(args):
+    """博客列表翻页耗时：OFFSET + COUNT 分页 vs 游标分页"""
+    app, db_file = create_temp_app()
+    rng = random.Random(42)
+    vocabulary = build_vocabulary(rng)
+
+    from app.models.user import db
+    from app.models import Post
+    from app.utils.pagination import encode_cursor, keyset_paginate
+
+    with app.app_context():
+        author_id = ensure_bench_user()
+        insert_posts(args.size, 1, author_id, args.body_words, rng, vocabulary)
+
+        per_page = 10
+        last_page = -(-args.size // per_page)
+        print(f"📁 临时数据库: {db_file}")
+        print(f"{'页码':>10} {'OFFSET(ms)':>12} {'游标(ms)':>10} {'加速比':>8}")
+        print("-" * 46)
+
+        for page in sorted({1, last_page // 10, last_page // 2, last_page} - {0}):
+            query = Post.query.filter(Post.status == 'published')
+
+            # 预先取得上一页末尾记录作为游标（相当于用户从上一页点击"下一页"）
+            cursor = None
+            if page > 1:
+                row = db.session.query(Post.created_at, Post.id).filter(Post.status == 'published').order_by(
+                    Post.created_at.desc(), Post.id.desc()
+                ).offset((page - 1) * per_page - 1).first()
+                cursor = encode_cursor(row)
+
+            def run_offset():
+                query.order_by(Post.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
+
+            def run_keyset():
+                keyset_paginate(query, [Post.created_at, Post.id], after=cursor, per_page=per_page)
+
+            offset_ms = timed(run_offset, args.repeat)
+            keyset_ms = timed(run_keyset, args.repeat)
+            print(f"{page:>10} {offset_ms:>12.2f} {keyset_ms:>10.2f} {offset_ms / keyset_ms:>7.1f}x")
+
+    return 0
+
+
+def bench_related(args):
+    """相关内容全量计算耗时与详情页读取耗时"""
+    app, db_file = create_temp_app()
+    rng = random.Random(42)
+    vocabulary = build_vocabulary(rng)
+
+    from app.models.user import db
+    from app.models import Post
+    from app.utils.related import get_related, is_available, rebuild_related
+
+    if not is_available():
+        print("❌ 未安装 numpy / scipy，无法计算相关内容")
+        return 1
+
+    with app.app_context():
+        author_id = ensure_bench_user()
+        insert_posts(args.size, 1, author_id, args.body_words, rng, vocabulary)
+        print(f"📁 临时数据库: {db_file}")
+
+        start = time.perf_counter()
+        total = rebuild_related('post', top_k=args.top_k)
+        build_seconds = time.perf_counter() - start
+        print(f"🔗 {total} 篇文章相关内容计算耗时 {build_seconds:.1f}s")
+
+        post = db.session.get(Post, args.size // 2)
+
+        def run_fallback():
+            Post.query.filter(
+                Post.category == post.category,
+                Post.id != post.id,
+                Post.status == 'published'
+            ).order_by(Post.created_at.desc()).limit(3).all()
+
+        def run_related():
+            get_related('post', post, limit=3)
+
+        print(f"{'按分类查询(ms)':>16} {'预计算读取(ms)':>16}")
+        print(f"{timed(run_fallback, args.repeat):>16.3f} {timed(run_related, args.repeat):>16.3f}")
+
+    return 0
+
+
+def bench_pages(args):
+    """未登录访客页面吞吐量：无缓存 vs 进程内存缓存 vs 磁盘共享缓存"""
+    app, db_file = create_temp_app()
+    rng = random.Random(42)
+    vocabulary = build_vocabulary(rng)
+
+    from app.models.user import db
+    from app.models import AboutContent, Post, Project
+    from app.utils.page_cache import FileStore, MemoryStore, page_cache
+
+    with app.app_context():
+        author_id = ensure_bench_user()
+        insert_posts(args.posts, 1, author_id, args.body_words, rng, vocabulary)
+        for i in range(1, 21):
+            db.session.add(Project(
+                title=random_text(rng, vocabulary, 3),
+                description=random_text(rng, vocabulary, args.body_words),
+                short_description=random_text(rng, vocabulary, 10),
+                category=rng.choice(['Web', '工具', '数据']),
+                author_id=author_id
+            ))
+        db.session.add(AboutContent(section='main_content', title='关于我', content=random_text(rng, vocabulary, 300)))
+        db.session.commit()
+        slug = db.session.get(Post, args.posts // 2).slug
+
+    urls = ['/', '/blog', f'/blog/post/{slug}', '/projects', '/projects/1', '/about']
+    client = app.test_client()
+    base_url = f"http://{app.config.get('SERVER_NAME') or 'localhost'}"
+
+    print(f"📁 临时数据库: {db_file}")
+    print(f"{'模式':<12} {'请求数':>8} {'耗时(s)':>8} {'吞吐(req/s)':>12}")
+    print("-" * 46)
+
+    modes = [
+        ('无缓存', False, None),
+        ('进程内存', True, MemoryStore()),
+        ('磁盘共享', True, FileStore(tempfile.mkdtemp(prefix='blog_page_cache_'))),
+    ]
+    for label, enabled, store in modes:
+        page_cache.enabled = enabled
+        page_cache.store = store
+        for url in urls:
+            client.get(url, base_url=base_url)
+
+        start = time.perf_counter()
+        for i in range(args.requests):
+            response = client.get(urls[i % len(urls)], base_url=base_url)
+            assert response.status_code == 200, f"{urls[i % len(urls)]} -> {response.status_code}"
+        elapsed = time.perf_counter() - start
+        print(f"{label:<12} {args.requests:>8} {elapsed:>8.2f} {args.requests / elapsed:>12.1f}")
+
+    print(f"\n📊 缓存统计: {page_cache.stats()}")
+    return 0
+
+
+def bench_comments(args):
+    """评论列表接口的 SQL 查询次数、响应大小与耗时（查询次数不应随每页评论数增长，响应大小不应随回复数增长）"""
+    app, db_file = create_temp_app()
+    rng = random.Random(42)
+    vocabulary = build_vocabulary(rng)
+
+    from sqlalchemy import event
+    from app.models.user import db, User
+    from app.models import Comment, CommentLike, CommentReply
+
+    with app.app_context():
+        author_id = ensure_bench_user()
+        insert_posts(1, 1, author_id, 50, rng, vocabulary)
+        users = [{'id': i, 'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password_hash': '-'}
+                 for i in range(author_id + 1, author_id + 1 + args.users)]
+        db.session.execute(User.__table__.insert(), users)
+        user_ids = [user['id'] for user in users]
+
+        base_time = datetime(2020, 1, 1)
+        comments, replies, likes = [], [], []
+        for i in range(1, args.comments + 1):
+            comments.append({
+                'id': i, 'user_id': rng.choice(user_ids), 'post_id': 1,
+                'content': random_text(rng, vocabulary, 20), 'is_approved': True,
+                'like_count': 0, 'created_at': base_time + timedelta(minutes=i),
+            })
+            for _ in range(args.replies):
+                replies.append({
+                    'comment_id': i, 'user_id': rng.choice(user_ids), 'is_approved': True,
+                    'content': random_text(rng, vocabulary, 10), 'created_at': base_time + timedelta(minutes=i),
+                })
+            if rng.random() < 0.5:
+                likes.append({'user_id': author_id, 'comment_id': i})
+        db.session.execute(Comment.__table__.insert(), comments)
+        db.session.execute(CommentReply.__table__.insert(), replies)
+        db.session.execute(CommentLike.__table__.insert(), likes)
+        db.session.execute(db.text('UPDATE post SET comment_count = :count WHERE id = 1'), {'count': args.comments})
+        db.session.commit()
+
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *event_args: statements.append(event_args[2]))
+
+    base_url = f"http://{app.config.get('SERVER_NAME') or 'localhost'}"
+    anonymous = app.test_client()
+    logged_in = app.test_client()
+    with logged_in.session_transaction(base_url=base_url) as session:
+        session['_user_id'] = str(author_id)
+        session['_fresh'] = True
+
+    print(f"📁 临时数据库: {db_file}")
+    print(f"{'用户':<8} {'每页评论':>8} {'SQL 查询数':>10} {'响应(KB)':>10} {'中位数(ms)':>10} {'P95(ms)':>10}")
+    print("-" * 64)
+    counts = {}
+    for label, client in [('未登录', anonymous), ('已登录', logged_in)]:
+        for per_page in args.per_page:
+            url = f'/api/comments/1?type=post&per_page={per_page}'
+
+            def request_comments():
+                response = client.get(url, base_url=base_url)
+                assert response.status_code == 200 and response.get_json()['success'], response.data
+                return len(response.data)
+
+            statements.clear()
+            size = request_comments()
+            query_count = len(statements)
+            counts.setdefault(label, set()).add(query_count)
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                request_comments()
+                samples.append((time.perf_counter() - start) * 1000)
+            p95 = sorted(samples)[max(0, int(len(samples) * 0.95) - 1)]
+            print(f"{label:<8} {per_page:>8} {query_count:>10} {size / 1024:>10.1f} "
+                  f"{statistics.median(samples):>10.2f} {p95:>10.2f}")
+
+    for label, values in counts.items():
+        if len(values) > 1:
+            print(f"❌ {label}请求的查询次数随每页评论数变化: {sorted(values)}")
+            return 1
+    print("✅ 查询次数与每页评论数无关")
+    return 0
+
+
+def bench_list_columns(args):
+    """列表页查询：加载整行 vs 只加载列表需要的列（正文截取预览）"""
+    import tracemalloc
+
+    app, db_file = create_temp_app()
+    rng = random.Random(42)
+    vocabulary = build_vocabulary(rng)
+
+    from app.models.user import db
+    from app.models import Post
+    from app.utils.pagination import keyset_paginate
+
+    with app.app_context():
+        author_id = ensure_bench_user()
+        insert_posts(args.size, 1, author_id, args.body_words, rng, vocabulary)
+
+        published = Post.query.filter(Post.status == 'published')
+        # (列表, 是否显示正文预览, 查询函数)
+        cases = [
+            ('博客列表', True, lambda options: keyset_paginate(
+                published.options(*options), [Post.created_at, Post.id], per_page=10).items),
+            ('后台文章列表', False, lambda options: Post.query.options(*options).order_by(
+                Post.created_at.desc()).paginate(page=1, per_page=20, error_out=False).items),
+            ('热门文章', False, lambda options: published.options(*options).order_by(
+                Post.view_count.desc()).limit(5).all()),
+        ]
+        variants = [
+            ('整行', lambda preview: [db.joinedload(Post.author)]),
+            ('列投影', lambda preview: Post.list_options(preview_length=Post.PREVIEW_LENGTH if preview else 0)),
+        ]
+
+        def loaded_bytes(items):
+            """统计加载到对象中的字符串字节数"""
+            return sum(
+                len(value.encode('utf-8')) for item in items
+                for value in item.__dict__.values() if isinstance(value, str)
+            )
+
+        print(f"📁 临时数据库: {db_file}")
+        print(f"{'列表':<12} {'方式':<8} {'耗时(ms)':>10} {'加载字节':>12} {'内存峰值(KB)':>14}")
+        print("-" * 64)
+        for label, preview, run in cases:
+            for variant, make_options in variants:
+                opts = make_options(preview)
+
+                def load():
+                    items = run(opts)
+                    db.session.expunge_all()
+                    return items
+
+                elapsed = timed(load, args.repeat)
+                tracemalloc.start()
+                items = run(opts)
+                size = loaded_bytes(items)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                db.session.expunge_all()
+                print(f"{label:<12} {variant:<8} {elapsed:>10.2f} {size:>12} {peak / 1024:>14.1f}")
+
+    return 0
+
+
+def build_markdown_document(target_bytes, rng, vocabulary):
+    """生成接近指定大小的 Markdown 文档"""
+    parts = []
+    size = 0
+    section = 1
+    while size < target_bytes:
+        block = (
+            f"## 第{section}节 {random_text(rng, vocabulary, 3)}\n\n"
+            f"{random_text(rng, vocabulary, 60)}[^{section}]\n\n"
+            f"| 指标 | 数值 |\n|---|---|\n| {random_text(rng, vocabulary, 2)} | {section} |\n\n"
+            f"```python\nprint({section})\n```\n\n"
+            f"[^{section}]: {random_text(rng, vocabulary, 5)}\n\n"
+        )
+        parts.append(block)
+        size += len(block.encode('utf-8'))
+        section += 1
+    return ''.join(parts)
+
+
+def bench_markdown(args):
+    """Markdown 渲染耗时：每次新建实例 vs 复用实例 vs 缓存命中"""
+    import markdown
+    from app.utils.filters import (
+        MARKDOWN_EXTENSIONS, MARKDOWN_EXTENSION_CONFIGS, markdown_cache, markdown_filter, render_markdown
+    )
+
+    rng = random.Random(42)
+    vocabulary = build_vocabulary(rng)
+    documents = [
+        ('小 (2KB)', build_markdown_document(2 * 1024, rng, vocabulary)),
+        ('中 (20KB)', build_markdown_document(20 * 1024, rng, vocabulary)),
+        ('大 (200KB)', build_markdown_document(200 * 1024, rng, vocabulary)),
+    ]
+
+    def fresh_instance(text):
+        return markdown.Markdown(
+            extensions=MARKDOWN_EXTENSIONS,
+            extension_configs=MARKDOWN_EXTENSION_CONFIGS
+        ).convert(text)
+
+    print(f"{'文档':<12} {'新建实例(ms)':>14} {'复用实例(ms)':>14} {'缓存命中(ms)':>14}")
+    print("-" * 60)
+    for label, text in documents:
+        fresh_ms = timed(lambda: fresh_instance(text), args.repeat)
+        reuse_ms = timed(lambda: render_markdown(text), args.repeat)
+        markdown_cache.clear()
+        markdown_filter(text)
+        cached_ms = timed(lambda: markdown_filter(text), args.repeat)
+        print(f"{label:<12} {fresh_ms:>14.3f} {reuse_ms:>14.3f} {cached_ms:>14.3f}")
+
+    print(f"\n📊 缓存统计: {markdown_cache.stats()}")
+    return 0
+
+
+def build_sample_images(rng):
+    """生成模拟的上传图片：大尺寸相机照片（带 EXIF 方向）、截图、带透明通道的 PNG"""
+    import io
+    from PIL import Image, ImageDraw, ImageFilter
+
+    def photo(width, height):
+        # 渐变底色加随机色块再模糊，压缩特性接近真实照片
+        image = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+        draw = ImageDraw.Draw(image)
+        for _ in range(200):
+            x, y = rng.randrange(width), rng.randrange(height)
+            size = rng.randrange(20, max(21, width // 8))
+            draw.ellipse((x, y, x + size, y + size), fill=tuple(rng.randrange(256) for _ in range(3)))
+        return image.filter(ImageFilter.GaussianBlur(3))
+
+    def screenshot(width, height):
+        image = Image.new('RGB', (width, height), 'white')
+        draw = ImageDraw.Draw(image)
+        for y in range(20, height, 24):
+            draw.rectangle((20, y, rng.randrange(100, width - 20), y + 10), fill=(60, 60, 60))
+        return image
+
+    samples = []
+    for label, image, fmt in [
+        ('相机照片 4000x3000', photo(4000, 3000), 'JPEG'),
+        ('相机照片 3000x4000', photo(3000, 4000), 'JPEG'),
+        ('网页截图 1920x1080', screenshot(1920, 1080), 'PNG'),
+        ('透明图标 1024x1024', photo(1024, 1024).convert('RGBA'), 'PNG'),
+    ]:
+        buffer = io.BytesIO()
+        if fmt == 'JPEG':
+            exif = Image.Exif()
+            exif[0x0112] = 6  # 竖拍，需要旋转
+            exif[0x010F] = 'Camera'
+            image.save(buffer, fmt, quality=95, exif=exif.tobytes())
+        else:
+            image.save(buffer, fmt)
+        samples.append((label, buffer.getvalue()))
+    return samples
+
+
+def bench_images(args):
+    """上传图片处理耗时与体积变化（原图 vs 处理后的主图和缩略图）"""
+    from app.utils import images
+
+    if not images.is_available():
+        print("❌ 未安装 Pillow，上传的图片会按原文件保存")
+        return 1
+
+    if args.dir:
+        samples = []
+        for name in sorted(os.listdir(args.dir)):
+            path = os.path.join(args.dir, name)
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    samples.append((name[:24], f.read()))
+    else:
+        samples = build_sample_images(random.Random(42))
+
+    print(f"{'图片':<24} {'格式':>6} {'处理耗时(ms)':>12} {'原图(KB)':>10} {'主图(KB)':>10} {'缩略图(KB)':>10} {'节省':>7}")
+    print("-" * 88)
+    total_original = total_processed = 0
+    for label, data in samples:
+        try:
+            result = images.process_image(data, args.format)
+        except images.ImageProcessingError:
+            print(f"{label:<24} 无法识别，跳过")
+            continue
+        elapsed_ms = timed(lambda: images.process_image(data, args.format), args.repeat)
+        main_size = len(result['content'])
+        variants_size = sum(len(content) for _, content in result['variants'])
+        total_original += len(data)
+        total_processed += main_size
+        saved = 1 - main_size / len(data)
+        print(f"{label:<24} {result['format']:>6} {elapsed_ms:>12.1f} {len(data) / 1024:>10.1f} "
+              f"{main_size / 1024:>10.1f} {variants_size / 1024:>10.1f} {saved:>7.1%}")
+
+    if total_original:
+        print(f"\n📊 主图合计 {total_original / 1024:.0f}KB -> {total_processed / 1024:.0f}KB，"
+              f"节省 {1 - total_processed / total_original:.1%}")
+    return 0
+
+
+def bench_uploads(args):
+    """图片上传接口的请求耗时（请求内处理 vs 进程池后台处理）及全部处理完成的总耗时"""
+    from app.utils import images
+
+    if not images.is_available():
+        print("❌ 未安装 Pillow，上传的图片会按原文件保存")
+        return 1
+
+    os.environ['UPLOAD_WORKERS'] = str(args.workers)
+    os.environ['UPLOAD_QUEUE_DIR'] = tempfile.mkdtemp(prefix='blog_bench_queue_')
+    app, db_file = create_temp_app()
+
+    from app.models.user import db
+    from app.models import UploadJob
+    from app.utils.rate_limit import rate_limiter
+    from app.utils.storage import content_store
+    from app.utils.upload_queue import upload_queue
+
+    content_store.root = tempfile.mkdtemp(prefix='blog_bench_objects_')
+    # 压测连续上传，不受上传频率限制
+    rate_limiter.enabled = False
+    with app.app_context():
+        author_id = ensure_bench_user()
+
+    base_url = f"http://{app.config.get('SERVER_NAME') or 'localhost'}"
+    client = app.test_client()
+    with client.session_transaction(base_url=base_url) as session:
+        session['_user_id'] = str(author_id)
+        session['_fresh'] = True
+
+    samples = [data for _, data in build_sample_images(random.Random(42))]
+
+    print(f"📁 临时数据库: {db_file}")
+    print(f"{'模式':<16} {'请求中位数(ms)':>14} {'请求P95(ms)':>12} {'全部完成(s)':>12}")
+    print("-" * 60)
+    for label, workers in [('请求内处理', 0), (f'进程池 ({args.workers} 进程)', args.workers)]:
+        upload_queue.workers = workers
+        latencies = []
+        start = time.perf_counter()
+        for i in range(args.uploads):
+            data = samples[i % len(samples)]
+            request_start = time.perf_counter()
+            response = client.post('/api/upload-image', base_url=base_url, data={
+                'image': (io.BytesIO(data), f'bench{i}.png', 'image/png')
+            })
+            latencies.append((time.perf_counter() - request_start) * 1000)
+            assert response.status_code in (200, 202), response.data
+
+        # 等待后台任务全部完成
+        with app.app_context():
+            while UploadJob.query.filter(UploadJob.status.in_(['queued', 'processing'])).count():
+                time.sleep(0.05)
+                db.session.remove()
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{label:<16} {statistics.median(latencies):>14.1f} {p95:>12.1f} {elapsed:>12.2f}")
+
+    with app.app_context():
+        failed = UploadJob.query.filter_by(status='failed').count()
+    print(f"\n📊 失败任务: {failed}")
+    return 0
+
+
+def _ratelimit_worker(task):
+    """子进程：在限定时间内反复消耗共享文件中同一个桶的令牌，返回放行次数"""
+    path, capacity, rate, start, deadline = task
+    from app.utils.rate_limit import SharedBuckets
+
+    buckets = SharedBuckets(path)
+    allowed = 0
+    time.sleep(max(0.0, start - time.time()))
+    while time.time() < deadline:
+        if not buckets.consume('bench:user:1', capacity, rate):
+            allowed += 1
+    return allowed
+
+
+def bench_ratelimit(args):
+    """接口限流：单次检查耗时、多进程共享额度是否准确、被拒绝请求的耗时与 SQL 次数"""
+    import multiprocessing
+    from app.utils.rate_limit import MemoryBuckets, SharedBuckets, fcntl
+
+    directory = tempfile.mkdtemp(prefix='blog_bench_ratelimit_')
+    path = os.path.join(directory, 'rate_limit.bin')
+    keys = [f'like:user:{i}' for i in range(args.keys)]
+    rng = random.Random(42)
+
+    print(f"{'存储':<10} {'单次检查(us)':>14}")
+    print("-" * 28)
+    backends = [('memory', MemoryBuckets())]
+    if fcntl is not None:
+        backends.append(('mmap', SharedBuckets(path)))
+    for label, buckets in backends:
+        start = time.perf_counter()
+        for _ in range(args.checks):
+            buckets.consume(rng.choice(keys), 30, 0.5)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<10} {elapsed / args.checks * 1e6:>14.2f}")
+
+    failed = False
+    if fcntl is not None:
+        capacity, rate = 30, 10.0
+        SharedBuckets(path).clear()
+        with multiprocessing.get_context('spawn').Pool(args.workers) as pool:
+            # 所有进程完成导入后同时开始
+            start = time.time() + 1
+            deadline = start + args.duration
+            tasks = [(path, capacity, rate, start, deadline)] * args.workers
+            allowed = sum(pool.map(_ratelimit_worker, tasks, chunksize=1))
+        limit = capacity + rate * (time.time() - start)
+        failed = allowed > limit
+        print(f"\n{'✅' if not failed else '❌'} {args.workers} 个进程共享一个桶 {args.duration}s：放行 {allowed} 次，"
+              f"上限 {limit:.0f} 次（容量 {capacity} + 每秒 {rate:.0f}）")
+
+    # 接口层：超出额度的请求应直接返回 429，不执行 SQL
+    app, db_file = create_temp_app()
+    from app.models.user import db
+    from app.utils.rate_limit import parse_rules, rate_limiter
+
+    rate_limiter.rules = parse_rules('like=5/minute')
+
+    rng = random.Random(42)
+    with app.app_context():
+        author_id = ensure_bench_user()
+        insert_posts(1, 1, author_id, 20, rng, build_vocabulary(rng))
+        engine = db.engine
+
+    statements = []
+    db.event.listen(engine, 'before_cursor_execute', lambda *a, **kw: statements.append(1))
+
+    base_url = f"http://{app.config.get('SERVER_NAME') or 'localhost'}"
+    client = app.test_client()
+    with client.session_transaction(base_url=base_url) as session:
+        session['_user_id'] = str(author_id)
+        session['_fresh'] = True
+
+    timings = {200: [], 429: []}
+    rejected_statements = 0
+    for _ in range(args.requests):
+        before = len(statements)
+        start = time.perf_counter()
+        response = client.post('/api/like', base_url=base_url, json={'type': 'post', 'id': 1})
+        timings.setdefault(response.status_code, []).append((time.perf_counter() - start) * 1000)
+        if response.status_code == 429:
+            rejected_statements += len(statements) - before
+
+    print(f"\n📁 临时数据库: {db_file}")
+    for status, samples in sorted(timings.items()):
+        if samples:
+            print(f"HTTP {status}: {len(samples)} 次，中位数 {statistics.median(samples):.2f}ms")
+    failed = failed or rejected_statements > 0 or not timings[429]
+    print(f"{'✅' if not rejected_statements else '❌'} 被拒绝的请求共执行 SQL {rejected_statements} 次")
+    return 1 if failed else 0
+
+
+def bench_unread(args):
+    """未读通知数查询耗时（COUNT 统计 vs 计数表主键读取 vs 进程内缓存）"""
+    app, db_file = create_temp_app()
+    rng = random.Random(42)
+
+    from app.models.user import db, User
+    from app.models import Notification, NotificationCounter
+    from app.utils.unread_counter import unread_counter
+
+    with app.app_context():
+        author_id = ensure_bench_user()
+        users = [{'id': i, 'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password_hash': '-'}
+                 for i in range(author_id + 1, author_id + 1 + args.users)]
+        db.session.execute(User.__table__.insert(), users)
+        user_ids = [author_id] + [user['id'] for user in users]
+
+        batch = []
+        for i in range(args.notifications):
+            # 第一个用户收到一半的通知
+            user_id = author_id if i % 2 == 0 else rng.choice(user_ids)
+            batch.append({'user_id': user_id, 'type': 'comment', 'title': f'通知{i}', 'content': '-',
+                          'is_read': rng.random() < 0.7, 'created_at': datetime(2024, 1, 1)})
+            if len(batch) >= 10000:
+                db.session.execute(Notification.__table__.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(Notification.__table__.insert(), batch)
+        NotificationCounter.rebuild()
+        db.session.commit()
+
+        print(f"📁 临时数据库: {db_file}")
+        print(f"📊 {args.notifications} 条通知，用户 {author_id} 收到约 {args.notifications // 2} 条\n")
+
+        def count_query():
+            Notification.query.filter_by(user_id=author_id, is_read=False).count()
+
+        def counter_lookup():
+            db.session.query(NotificationCounter.unread).filter_by(user_id=author_id).scalar()
+
+        expected = Notification.query.filter_by(user_id=author_id, is_read=False).count()
+        print(f"{'方式':<16} {'中位数(ms)':>12}")
+        print("-" * 30)
+        print(f"{'COUNT 统计':<16} {timed(count_query, args.repeat):>12.3f}")
+        print(f"{'计数表读取':<16} {timed(counter_lookup, args.repeat):>12.3f}")
+        print(f"{'进程内缓存':<16} {timed(lambda: unread_counter.get(author_id), args.repeat):>12.3f}")
+
+        actual = unread_counter.get(author_id)
+        print(f"\n{'✅' if actual == expected else '❌'} 计数 {actual}，实际未读 {expected}")
+        return 0 if actual == expected else 1
+
+
+# 查询计划检查跳过的接口：推送连接会一直等待，静态文件不访问数据库，退出登录后后续请求都变成未登录
+PLAN_SKIPPED_ENDPOINTS = {'static', 'notification.events', 'notification.poll_events', 'auth.logout'}
+
+# 允许全表扫描的表：后台维护的少量配置数据
+PLAN_SMALL_TABLES = {'about_content', 'about_contact', 'skills', 'versions'}
+
+# 额外请求的带查询参数的地址（筛选、游标翻页等分支）
+PLAN_EXTRA_URLS = [
+    '/blog?category=技术', '/blog?tag=性能', '/blog?search=优化', '/projects?category=Web',
+    '/search?q=性能', '/api/comments/1?type=project', '/notifications?type=like,favorite',
+    '/admin/posts?status=draft', '/admin/projects?status=active', '/admin/messages?status=unread',
+]
+
+
+def seed_plan_data(args, rng, vocabulary):
+    """生成查询计划检查使用的数据，返回 (管理员ID, 普通用户ID, 重置密码令牌)"""
+    from app.models.user import db, User
+    from app.models import (Comment, CommentReply, Message, Notification, NotificationCounter, Post, Project,
+                            Tag, UserInteraction)
+    from app.models.tag import post_tags
+
+    admin_id = ensure_bench_user()
+    admin = db.session.get(User, admin_id)
+    admin.is_admin = True
+    users = [{'id': i, 'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password_hash': '-'}
+             for i in range(admin_id + 1, admin_id + 1 + args.users)]
+    db.session.execute(User.__table__.insert(), users)
+    user_ids = [user['id'] for user in users]
+    user_id = user_ids[0]
+    token = db.session.get(User, user_id).generate_reset_token()
+
+    insert_posts(args.posts, 1, admin_id, 50, rng, vocabulary)
+    db.session.execute(Post.__table__.update().where(Post.__table__.c.id % 10 == 0).values(status='draft'))
+    base_time = datetime(2020, 1, 1)
+    db.session.execute(Project.__table__.insert(), [{
+        'id': i, 'title': random_text(rng, vocabulary, 3), 'description': random_text(rng, vocabulary, 50),
+        'status': rng.choice(['active', 'active', 'completed', 'archived']),
+        'category': rng.choice(['Web', '工具', '数据']), 'author_id': admin_id,
+        'created_at': base_time + timedelta(hours=i), 'updated_at': base_time + timedelta(hours=i),
+    } for i in range(1, args.posts // 10 + 1)])
+
+    tags = [Tag(name=name, post_count=0) for name in SAMPLE_WORDS]
+    db.session.add_all(tags)
+    db.session.flush()
+    db.session.execute(post_tags.insert(), [
+        {'post_id': post_id, 'tag_id': tag.id}
+        for post_id in range(1, args.posts + 1) for tag in rng.sample(tags, 2)
+    ])
+
+    comments, replies = [], []
+    for i in range(1, args.posts * 2 + 1):
+        on_post = i % 3 != 0
+        comments.append({
+            'id': i, 'user_id': rng.choice(user_ids), 'post_id': rng.randint(1, args.posts) if on_post else None,
+            'project_id': None if on_post else rng.randint(1, args.posts // 10),
+            'content': random_text(rng, vocabulary, 10), 'is_approved': rng.random() < 0.95,
+            'created_at': base_time + timedelta(minutes=i),
+        })
+        replies.append({'comment_id': i, 'user_id': rng.choice(user_ids), 'content': random_text(rng, vocabulary, 5),
+                        'is_approved': True, 'created_at': base_time + timedelta(minutes=i + 1)})
+    # 第一篇文章和第一个项目保证有评论
+    comments[0].update(post_id=1, project_id=None, is_approved=True)
+    comments[2].update(post_id=None, project_id=1, is_approved=True)
+    db.session.execute(Comment.__table__.insert(), comments)
+    db.session.execute(CommentReply.__table__.insert(), replies)
+
+    interactions = {}
+    for _ in range(args.posts * 2):
+        key = (rng.choice(user_ids), rng.randint(1, args.posts // 10), rng.choice([1, 2]))
+        interactions[key] = {'user_id': key[0], 'content_id': key[1], 'type': key[2],
+                             'like': rng.randint(0, 1), 'favorite': rng.randint(0, 1), 'rating': rng.randint(0, 5)}
+    db.session.execute(UserInteraction.__table__.insert(), list(interactions.values()))
+
+    db.session.execute(Notification.__table__.insert(), [{
+        'user_id': rng.choice([admin_id, user_id] + user_ids), 'type': rng.choice(['comment', 'reply', 'like']),
+        'title': f'通知{i}', 'content': '-', 'is_read': rng.random() < 0.7, 'related_id': 1, 'related_type': 'post',
+        'created_at': base_time + timedelta(minutes=i),
+    } for i in range(args.posts * 5)])
+    db.session.execute(Message.__table__.insert(), [{
+        'name': f'访客{i}', 'email': rng.choice(['bench{}@example.com'.format(user_id), f'guest{i}@example.com']),
+        'subject': random_text(rng, vocabulary, 3), 'message': random_text(rng, vocabulary, 20),
+        'status': rng.choice(['unread', 'read', 'replied']), 'created_at': base_time + timedelta(minutes=i),
+    } for i in range(args.posts)])
+
+    NotificationCounter.rebuild()
+    # 不执行 ANALYZE：没有统计信息时查询规划器总是使用可用的索引，检查结果只取决于索引是否覆盖查询条件，与数据量无关
+    db.session.commit()
+    return admin_id, user_id, token
+
+
+def plan_urls(app, samples):
+    """所有 GET 路由的请求地址（路径参数使用示例数据）及额外的查询参数分支"""
+    urls = []
+    for rule in app.url_map.iter_rules():
+        if 'GET' not in rule.methods or rule.endpoint in PLAN_SKIPPED_ENDPOINTS:
+            continue
+        values = {name: samples.get(name, 1) for name in rule.arguments}
+        urls.append(app.url_map.bind('localhost').build(rule.endpoint, values))
+    return sorted(set(urls)) + PLAN_EXTRA_URLS
+
+
+def bench_query_plans(args):
+    """请求全部页面和接口，对执行的每条 SQL 做 EXPLAIN QUERY PLAN，发现全表扫描时返回 1"""
+    import re
+    from sqlalchemy import event
+    from app.models.user import db
+    from app.models import Notification, Post
+    from app.utils.page_cache import page_cache
+    from app.utils.rate_limit import rate_limiter
+
+    app, db_file = create_temp_app()
+    rng = random.Random(42)
+    vocabulary = build_vocabulary(rng)
+    page_cache.enabled = False
+    rate_limiter.enabled = False
+
+    with app.app_context():
+        admin_id, user_id, token = seed_plan_data(args, rng, vocabulary)
+        samples = {
+            'slug': db.session.get(Post, 1).slug, 'token': token, 'job_id': 'missing',
+            'message_id': 1, 'notification_id': Notification.query.filter_by(user_id=user_id).first().id,
+        }
+        tables = set(db.metadata.tables)
+
+        # 记录每条语句（按 SQL 文本去重）第一次执行的参数和来源请求
+        statements = {}
+        current = {'request': None}
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().split(None, 1)[0].upper() not in ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT'):
+                return
+            if statement.lstrip().upper().startswith('INSERT') and ' SELECT ' not in statement.upper():
+                return
+            statements.setdefault(statement, (parameters[0] if executemany else parameters, current['request']))
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+
+    base_url = f"http://{app.config.get('SERVER_NAME') or 'localhost'}"
+    clients = {'未登录': app.test_client(), '用户': app.test_client(), '管理员': app.test_client()}
+    for label, login_id in [('用户', user_id), ('管理员', admin_id)]:
+        with clients[label].session_transaction(base_url=base_url) as session:
+            session['_user_id'] = str(login_id)
+            session['_fresh'] = True
+
+    # 写操作（以普通用户身份），最后批量 / 全部标记已读、删除通知
+    actions = [
+        ('/api/like', {'type': 'post', 'id': 1}),
+        ('/api/favorite', {'type': 'project', 'id': 1}),
+        ('/api/rating', {'type': 'post', 'id': 1, 'rating': 4}),
+        ('/api/comment', {'type': 'post', 'id': 1, 'content': '查询计划检查'}),
+        ('/api/comment-like', {'comment_id': 1}),
+        ('/api/comments/1/replies', {'content': '查询计划检查'}),
+        (f"/api/notifications/{samples['notification_id']}/read", None),
+        ('/api/notifications/batch-read', {'before': samples['notification_id'], 'types': ['like', 'comment']}),
+        ('/api/notifications/batch-delete', {'ids': [samples['notification_id'] + 1], 'types': 'reply'}),
+        ('/api/notifications/mark-all-read', None),
+        (f"/api/notifications/{samples['notification_id']}/delete", None),
+    ]
+
+    errors = []
+    urls = plan_urls(app, samples)
+    for label, client in clients.items():
+        for url in urls:
+            current['request'] = f'{label} GET {url}'
+            response = client.get(url, base_url=base_url)
+            if response.status_code >= 500:
+                errors.append(f'{current["request"]} -> {response.status_code}')
+    for url, payload in actions:
+        current['request'] = f'用户 POST {url}'
+        response = clients['用户'].post(url, json=payload, base_url=base_url)
+        if response.status_code >= 300 or not (response.get_json(silent=True) or {}).get('success'):
+            errors.append(f'{current["request"]} -> {response.status_code}')
+
+    scan = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+    regressions = []
+    sorts = 0
+    with app.app_context():
+        event.remove(db.engine, 'before_cursor_execute', record)
+        with db.engine.connect() as connection:
+            for statement, (parameters, source) in statements.items():
+                plan = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+                details = [row[-1] for row in plan]
+                scanned = [match.group(1) for match in map(scan.match, details)
+                           if match and match.group(1) in tables and match.group(1) not in PLAN_SMALL_TABLES]
+                sorts += any('TEMP B-TREE' in detail for detail in details)
+                if scanned:
+                    regressions.append((source, scanned, statement, details))
+
+    print(f"📁 临时数据库: {db_file}")
+    print(f"📊 请求 {len(urls) * len(clients) + len(actions)} 次，检查 SQL {len(statements)} 条，"
+          f"其中使用临时排序 {sorts} 条")
+    for error in errors:
+        print(f"⚠️  {error}")
+    for source, scanned, statement, details in regressions:
+        print(f"\n❌ {source}: 全表扫描 {', '.join(scanned)}")
+        print(f"   {' '.join(statement.split())[:300]}")
+        for detail in details:
+            print(f"     {detail}")
+    if regressions:
+        print(f"\n❌ {len(regressions)} 条 SQL 存在全表扫描")
+        return 1
+    print("✅ 没有发现全表扫描")
+    return 0
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='网站性能基准测试')
+    subparsers = parser.add_subparsers(dest='command')
+
+    search_parser = subparsers.add_parser('search', help='全文搜索与 LIKE 查询延迟对比')
+    search_parser.add_argument(
+        '--sizes',
+        type=int,
+        nargs='+',
+        default=[10000, 100000, 1000000],
+        help='文章数量规模 (默认: 10000 100000 1000000)'
+    )
+    search_parser.add_argument(
+        '--queries',
+        nargs='+',
+        default=['性能', '数据库索引', 'Python', '缓存 优化'],
+        help='测试用的搜索关键词'
+    )
+    search_parser.add_argument(
+        '--body-words',
+        type=int,
+        default=200,
+        help='每篇文章正文词数 (默认: 200)'
+    )
+    search_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='每个查询重复次数 (默认: 5)'
+    )
+    search_parser.set_defaults(func=bench_search)
+
+    views_parser = subparsers.add_parser('views', help='热门文章详情页吞吐量（逐次写库 vs 缓冲写回）')
+    views_parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='并发进程数，模拟 gunicorn worker (默认: 4)'
+    )
+    views_parser.add_argument(
+        '--requests',
+        type=int,
+        default=500,
+        help='每个进程的请求数 (默认: 500)'
+    )
+    views_parser.add_argument(
+        '--body-words',
+        type=int,
+        default=200,
+        help='文章正文词数 (默认: 200)'
+    )
+    views_parser.set_defaults(func=bench_views)
+
+    markdown_parser = subparsers.add_parser('markdown', help='Markdown 渲染耗时（新建实例 / 复用实例 / 缓存命中）')
+    markdown_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=20,
+        help='每个文档重复次数 (默认: 20)'
+    )
+    markdown_parser.set_defaults(func=bench_markdown)
+
+    counters_parser = subparsers.add_parser('counters', help='点赞 / 收藏 / 评论点赞并发压测，校验计数与互动记录一致')
+    counters_parser.add_argument(
+        '--workers',
+        type=int,
+        default=8,
+        help='并发进程数 (默认: 8)'
+    )
+    counters_parser.add_argument(
+        '--requests',
+        type=int,
+        default=500,
+        help='每个进程的请求数 (默认: 500)'
+    )
+    counters_parser.add_argument(
+        '--users',
+        type=int,
+        default=20,
+        help='参与切换的用户数 (默认: 20)'
+    )
+    counters_parser.add_argument(
+        '--posts',
+        type=int,
+        default=3,
+        help='文章数和评论数 (默认: 3)'
+    )
+    counters_parser.set_defaults(func=bench_counters)
+
+    pagination_parser = subparsers.add_parser('pagination', help='博客列表翻页耗时（OFFSET 分页 vs 游标分页）')
+    pagination_parser.add_argument(
+        '--size',
+        type=int,
+        default=1000000,
+        help='文章数量 (默认: 1000000)'
+    )
+    pagination_parser.add_argument(
+        '--body-words',
+        type=int,
+        default=20,
+        help='每篇文章正文词数 (默认: 20)'
+    )
+    pagination_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='每页重复次数 (默认: 5)'
+    )
+    pagination_parser.set_defaults(func=bench_pagination)
+
+    related_parser = subparsers.add_parser('related', help='相关内容全量计算耗时与详情页读取耗时')
+    related_parser.add_argument(
+        '--size',
+        type=int,
+        default=100000,
+        help='文章数量 (默认: 100000)'
+    )
+    related_parser.add_argument(
+        '--body-words',
+        type=int,
+        default=200,
+        help='每篇文章正文词数 (默认: 200)'
+    )
+    related_parser.add_argument(
+        '--top-k',
+        type=int,
+        default=6,
+        help='每篇文章保存的相似内容数 (默认: 6)'
+    )
+    related_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=20,
+        help='读取重复次数 (默认: 20)'
+    )
+    related_parser.set_defaults(func=bench_related)
+
+    pages_parser = subparsers.add_parser('pages', help='未登录访客页面吞吐量（无缓存 / 内存缓存 / 磁盘缓存）')
+    pages_parser.add_argument(
+        '--posts',
+        type=int,
+        default=1000,
+        help='文章数量 (默认: 1000)'
+    )
+    pages_parser.add_argument(
+        '--body-words',
+        type=int,
+        default=300,
+        help='每篇文章正文词数 (默认: 300)'
+    )
+    pages_parser.add_argument(
+        '--requests',
+        type=int,
+        default=600,
+        help='每种模式的请求数 (默认: 600)'
+    )
+    pages_parser.set_defaults(func=bench_pages)
+
+    list_parser = subparsers.add_parser('list-columns', help='列表页查询耗时与内存（加载整行 vs 列投影）')
+    list_parser.add_argument(
+        '--size',
+        type=int,
+        default=2000,
+        help='文章数量 (默认: 2000)'
+    )
+    list_parser.add_argument(
+        '--body-words',
+        type=int,
+        default=5000,
+        help='每篇文章正文词数 (默认: 5000)'
+    )
+    list_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=20,
+        help='重复次数 (默认: 20)'
+    )
+    list_parser.set_defaults(func=bench_list_columns)
+
+    comments_parser = subparsers.add_parser('comments', help='评论列表接口的 SQL 查询次数、响应大小与耗时')
+    comments_parser.add_argument(
+        '--comments',
+        type=int,
+        default=200,
+        help='评论数量 (默认: 200)'
+    )
+    comments_parser.add_argument(
+        '--replies',
+        type=int,
+        default=3,
+        help='每条评论的回复数 (默认: 3)'
+    )
+    comments_parser.add_argument(
+        '--users',
+        type=int,
+        default=50,
+        help='评论用户数 (默认: 50)'
+    )
+    comments_parser.add_argument(
+        '--per-page',
+        type=int,
+        nargs='+',
+        default=[1, 10, 50],
+        help='每页评论数 (默认: 1 10 50)'
+    )
+    comments_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=20,
+        help='重复次数 (默认: 20)'
+    )
+    comments_parser.set_defaults(func=bench_comments)
+
+    images_parser = subparsers.add_parser('images', help='上传图片处理耗时与节省的体积')
+    images_parser.add_argument(
+        '--dir',
+        help='使用目录中的图片作为样本 (默认: 生成模拟图片)'
+    )
+    images_parser.add_argument(
+        '--format',
+        choices=['jpeg', 'webp'],
+        default='jpeg',
+        help='输出格式 (默认: jpeg)'
+    )
+    images_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='每张图片重复处理次数 (默认: 3)'
+    )
+    images_parser.set_defaults(func=bench_images)
+
+    uploads_parser = subparsers.add_parser('uploads', help='图片上传接口耗时（请求内处理 vs 进程池后台处理）')
+    uploads_parser.add_argument(
+        '--uploads',
+        type=int,
+        default=16,
+        help='上传的图片数 (默认: 16)'
+    )
+    uploads_parser.add_argument(
+        '--workers',
+        type=int,
+        default=2,
+        help='后台处理进程数 (默认: 2)'
+    )
+    uploads_parser.set_defaults(func=bench_uploads)
+
+    ratelimit_parser = subparsers.add_parser('ratelimit', help='接口限流检查耗时、多进程共享额度与被拒绝请求的开销')
+    ratelimit_parser.add_argument(
+        '--checks',
+        type=int,
+        default=100000,
+        help='单次检查耗时的测试次数 (默认: 100000)'
+    )
+    ratelimit_parser.add_argument(
+        '--keys',
+        type=int,
+        default=1000,
+        help='测试使用的桶数量 (默认: 1000)'
+    )
+    ratelimit_parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='共享额度测试的进程数 (默认: 4)'
+    )
+    ratelimit_parser.add_argument(
+        '--duration',
+        type=float,
+        default=3.0,
+        help='共享额度测试时长，秒 (默认: 3)'
+    )
+    ratelimit_parser.add_argument(
+        '--requests',
+        type=int,
+        default=50,
+        help='接口层测试的点赞请求数 (默认: 50)'
+    )
+    ratelimit_parser.set_defaults(func=bench_ratelimit)
+
+    unread_parser = subparsers.add_parser('unread', help='未读通知数查询耗时（COUNT vs 计数表 vs 缓存）')
+    unread_parser.add_argument(
+        '--notifications',
+        type=int,
+        default=200000,
+        help='生成的通知数 (默认: 200000)'
+    )
+    unread_parser.add_argument(
+        '--users',
+        type=int,
+        default=100,
+        help='接收通知的用户数 (默认: 100)'
+    )
+    unread_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=50,
+        help='每种方式的查询次数 (默认: 50)'
+    )
+    unread_parser.set_defaults(func=bench_unread)
+
+    plans_parser = subparsers.add_parser('query-plans', help='检查全部页面和接口执行的 SQL 是否存在全表扫描')
+    plans_parser.add_argument(
+        '--posts',
+        type=int,
+        default=2000,
+        help='文章数，项目数为其 1/10，评论、通知、留言按比例生成 (默认: 2000)'
+    )
+    plans_parser.add_argument(
+        '--users',
+        type=int,
+        default=50,
+        help='用户数 (默认: 50)'
+    )
+    plans_parser.set_defaults(func=bench_query_plans)
+
+    args = parser.parse_args()
+
+    if not getattr(args, 'func', None):
+        parser.print_help()
+        return 1
+
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
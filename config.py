@@ -22,9 +22,75 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx'}
     
+    # 上传图片重新编码的格式（jpeg: 渐进式 JPEG；webp）
+    IMAGE_OUTPUT_FORMAT = os.environ.get('IMAGE_OUTPUT_FORMAT') or 'jpeg'
+    
+    # 上传图片后台处理（进程池大小，0 表示在请求中直接处理；原始文件暂存目录；处理中断后重新排队的超时秒数）
+    UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS') or 2)
+    UPLOAD_QUEUE_DIR = os.environ.get('UPLOAD_QUEUE_DIR')
+    UPLOAD_JOB_TIMEOUT = int(os.environ.get('UPLOAD_JOB_TIMEOUT') or 300)
+    
     # 分页配置
     POSTS_PER_PAGE = 5
     
+    # 浏览量缓冲写回配置（每隔 N 秒或累积 M 次浏览写回一次数据库）
+    VIEW_COUNT_BUFFERED = os.environ.get('VIEW_COUNT_BUFFERED', 'true').lower() in ['true', 'on', '1']
+    VIEW_COUNT_FLUSH_INTERVAL = int(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL') or 10)
+    VIEW_COUNT_FLUSH_THRESHOLD = int(os.environ.get('VIEW_COUNT_FLUSH_THRESHOLD') or 200)
+    
+    # Markdown 渲染缓存内存上限（字节）
+    MARKDOWN_CACHE_MAX_BYTES = int(os.environ.get('MARKDOWN_CACHE_MAX_BYTES') or 32 * 1024 * 1024)
+    
+    # 未登录访客整页缓存（memory: 进程内存；file: 磁盘目录，多 worker 共享）
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    PAGE_CACHE_BACKEND = os.environ.get('PAGE_CACHE_BACKEND') or 'memory'
+    PAGE_CACHE_DIR = os.environ.get('PAGE_CACHE_DIR')
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL') or 300)
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES') or 500)
+    
+    # 用户互动状态索引（每个进程缓存的用户数和重新加载间隔）
+    # 版本号存储（memory: 进程内存；mmap: 共享文件，多 worker 部署使用，其他 worker 的写入立即可见）
+    INTERACTION_INDEX_BACKEND = os.environ.get('INTERACTION_INDEX_BACKEND') or 'memory'
+    INTERACTION_INDEX_FILE = os.environ.get('INTERACTION_INDEX_FILE')
+    INTERACTION_INDEX_TTL = int(os.environ.get('INTERACTION_INDEX_TTL') or 60)
+    INTERACTION_INDEX_MAX_USERS = int(os.environ.get('INTERACTION_INDEX_MAX_USERS') or 1000)
+    
+    # 写接口令牌桶限流（memory: 进程内存；mmap: 共享文件，多个 worker 共用额度）
+    # RATE_LIMITS 覆盖单个用户的默认额度，如 like=30/minute,comment=5/minute；IP 的额度为其 RATE_LIMIT_IP_MULTIPLIER 倍
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ['true', 'on', '1']
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND') or 'memory'
+    RATE_LIMIT_FILE = os.environ.get('RATE_LIMIT_FILE')
+    RATE_LIMIT_SLOTS = int(os.environ.get('RATE_LIMIT_SLOTS') or 65536)
+    RATE_LIMITS = os.environ.get('RATE_LIMITS')
+    RATE_LIMIT_IP_MULTIPLIER = int(os.environ.get('RATE_LIMIT_IP_MULTIPLIER') or 4)
+    
+    # 点赞、收藏、评分通知的合并窗口（秒）：距上次更新不超过该时间的同一内容通知合并为一条
+    NOTIFICATION_COALESCE_WINDOW = int(os.environ.get('NOTIFICATION_COALESCE_WINDOW') or 24 * 3600)
+    
+    # 已读通知保留天数，超过后由 maintenance.py purge-notifications 移到归档表（archive）或删除（delete）
+    NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS') or 90)
+    NOTIFICATION_RETENTION_MODE = os.environ.get('NOTIFICATION_RETENTION_MODE') or 'archive'
+    
+    # 未读通知数的进程内缓存时间（秒），通知变化时立即失效
+    UNREAD_COUNT_CACHE_TTL = int(os.environ.get('UNREAD_COUNT_CACHE_TTL') or 10)
+    
+    # 导航栏未读数推送（SSE，不可用时长轮询）
+    # 版本号存储（memory: 进程内存；mmap: 共享文件，多 worker 部署使用）、心跳间隔、单个连接最长保持时间、
+    # 长轮询最长等待时间、检查版本号的间隔（秒），每个进程同时等待的连接数上限
+    EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND') or 'memory'
+    EVENTS_FILE = os.environ.get('EVENTS_FILE')
+    EVENTS_HEARTBEAT = int(os.environ.get('EVENTS_HEARTBEAT') or 15)
+    EVENTS_STREAM_TIMEOUT = int(os.environ.get('EVENTS_STREAM_TIMEOUT') or 300)
+    EVENTS_POLL_TIMEOUT = int(os.environ.get('EVENTS_POLL_TIMEOUT') or 25)
+    EVENTS_CHECK_INTERVAL = float(os.environ.get('EVENTS_CHECK_INTERVAL') or 1.0)
+    EVENTS_MAX_WAITERS = int(os.environ.get('EVENTS_MAX_WAITERS') or 32)
+    
+    # 模板访问列表查询延迟加载的大字段时的处理方式（warn: 记录警告；raise: 抛出异常；off: 不检查）
+    DEFERRED_LOAD_GUARD = os.environ.get('DEFERRED_LOAD_GUARD') or 'warn'
+    
+    # 页面版本戳（修改模板或静态资源后调整，使浏览器缓存的 ETag 全部失效）
+    CACHE_VERSION = os.environ.get('CACHE_VERSION') or '1'
+    
     # 安全配置
     SESSION_COOKIE_SECURE = False  # 生产环境设为True
     SESSION_COOKIE_HTTPONLY = True
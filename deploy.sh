@@ -94,6 +94,7 @@ cp README.md $TEMP_DIR/
 cp db_manager.py $TEMP_DIR/
 cp db_tools.py $TEMP_DIR/
 cp cleanup_logs.py $TEMP_DIR/
+cp maintenance.py $TEMP_DIR/
 cp setup_log_cleanup.sh $TEMP_DIR/
 cp ssl_redirect.py $TEMP_DIR/
 # cp HTTPS_SETUP.md $TEMP_DIR/  # 文件已删除
@@ -338,6 +339,14 @@ server {
         try_files \$uri =404;
     }
     
+    # 按内容摘要命名的上传文件，内容不会变化，永久缓存
+    location /static/uploads/objects/ {
+        root /home/website/app;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+        add_header X-Content-Type-Options nosniff;
+        try_files \$uri =404;
+    }
+    
     # 应用静态文件配置
     location /static/ {
         root /home/website/app;
@@ -389,6 +398,14 @@ server {
         try_files \$uri =404;
     }
     
+    # 按内容摘要命名的上传文件，内容不会变化，永久缓存
+    location /static/uploads/objects/ {
+        root /home/website/app;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+        add_header X-Content-Type-Options nosniff;
+        try_files \$uri =404;
+    }
+    
     # 应用静态文件配置
     location /static/ {
         root /home/website/app;
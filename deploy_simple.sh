@@ -50,6 +50,7 @@ cp README.md $TEMP_DIR/
 cp db_manager.py $TEMP_DIR/
 cp db_tools.py $TEMP_DIR/
 cp cleanup_logs.py $TEMP_DIR/
+cp maintenance.py $TEMP_DIR/
 cp setup_log_cleanup.sh $TEMP_DIR/
 cp ssl_redirect.py $TEMP_DIR/
 cp HTTPS_SETUP.md $TEMP_DIR/
@@ -276,6 +277,14 @@ server {
         try_files $uri =404;
     }
     
+    # 按内容摘要命名的上传文件，内容不会变化，永久缓存
+    location /static/uploads/objects/ {
+        root /home/website/app;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+        add_header X-Content-Type-Options nosniff;
+        try_files $uri =404;
+    }
+    
     # 应用静态文件配置
     location /static/ {
         root /home/website/app;
@@ -327,6 +336,14 @@ server {
         try_files $uri =404;
     }
     
+    # 按内容摘要命名的上传文件，内容不会变化，永久缓存
+    location /static/uploads/objects/ {
+        root /home/website/app;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+        add_header X-Content-Type-Options nosniff;
+        try_files $uri =404;
+    }
+    
     # 应用静态文件配置
     location /static/ {
         root /home/website/app;
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+性能维护脚本
+重建索引、数据迁移、修复统计数据等离线维护任务
+"""
+
+import os
+import sys
+import argparse
+import hashlib
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+
+
+def rebuild_search(args):
+    """重建全文搜索索引"""
+    from app.utils.search import is_available, rebuild_index
+
+    if not is_available():
+        print("❌ 当前数据库不支持 FTS5，搜索将使用 LIKE 模糊查询")
+        return 1
+
+    doc_types = [args.type] if args.type else ['post', 'project']
+    for doc_type in doc_types:
+        print(f"🔍 正在重建 {doc_type} 索引...")
+        total = rebuild_index(
+            doc_type,
+            batch_size=args.batch_size,
+            progress=lambda count: print(f"   已索引 {count} 条", end='\r')
+        )
+        print(f"✅ {doc_type} 索引重建完成，共 {total} 条")
+
+    return 0
+
+
+def backfill_tags(args):
+    """从文章的逗号分隔标签字段回填标签表"""
+    from app.models.user import db
+    from app.models import Post, Tag
+    from sqlalchemy.orm import load_only
+
+    db.create_all()
+
+    total = 0
+    last_id = 0
+    while True:
+        posts = Post.query.options(load_only(Post.id, Post.tags)).filter(
+            Post.id > last_id
+        ).order_by(Post.id).limit(args.batch_size).all()
+        if not posts:
+            break
+        for post in posts:
+            post.tag_items = Tag.get_or_create_many(Tag.parse_names(post.tags))
+        db.session.commit()
+        total += len(posts)
+        last_id = posts[-1].id
+        print(f"   已处理 {total} 篇文章", end='\r')
+
+    Tag.refresh_counts()
+    db.session.commit()
+    print(f"✅ 标签回填完成，共处理 {total} 篇文章，{Tag.query.count()} 个标签")
+    return 0
+
+
+def rebuild_related(args):
+    """全量重新计算相关内容推荐"""
+    from app.models.user import db
+    from app.utils.related import is_available, rebuild_related as rebuild
+
+    if not is_available():
+        print("❌ 未安装 numpy / scipy，详情页将按分类推荐相关内容")
+        return 1
+
+    db.create_all()
+
+    doc_types = [args.type] if args.type else ['post', 'project']
+    for doc_type in doc_types:
+        print(f"🔗 正在计算 {doc_type} 相关内容...")
+        total = rebuild(
+            doc_type,
+            top_k=args.top_k,
+            progress=lambda count: print(f"   已计算 {count} 条", end='\r')
+        )
+        print(f"✅ {doc_type} 相关内容计算完成，共 {total} 条")
+
+    return 0
+
+
+def reconcile_ratings(args):
+    """根据用户互动记录重新统计评分汇总和平均评分"""
+    from app.models.user import db
+    from app.models import Post, Project, RatingSummary
+
+    db.create_all()
+
+    targets = [('post', 1, Post), ('project', 2, Project)]
+    if args.type:
+        targets = [target for target in targets if target[0] == args.type]
+
+    for doc_type, type_code, model in targets:
+        drifted = RatingSummary.rebuild(type_code)
+        db.session.flush()
+
+        # 平均评分以汇总表为准
+        average = db.session.query(
+            db.func.round(1.0 * RatingSummary.rating_sum / RatingSummary.rating_count, 1)
+        ).filter(
+            RatingSummary.type == type_code,
+            RatingSummary.content_id == model.id,
+            RatingSummary.rating_count > 0
+        ).scalar_subquery()
+        new_average = db.func.coalesce(average, 0.0)
+        fixed = model.query.filter(
+            db.func.coalesce(model.average_rating, -1) != new_average
+        ).update({model.average_rating: new_average, model.updated_at: model.updated_at},
+                 synchronize_session=False)
+        db.session.commit()
+        print(f"✅ {doc_type} 评分汇总已重建：修正汇总 {drifted} 条，修正平均评分 {fixed} 条")
+
+    return 0
+
+
+def reconcile_notifications(args):
+    """根据通知表重新统计每个用户的未读通知数"""
+    from app.models.user import db
+    from app.models import NotificationCounter
+
+    db.create_all()
+
+    drifted = NotificationCounter.rebuild()
+    db.session.commit()
+    print(f"✅ 未读通知计数已重建：修正 {drifted} 个用户")
+    return 0
+
+
+def purge_notifications(args):
+    """将超过保留期的已读通知分批归档或删除（可定时执行）"""
+    import time
+    from datetime import datetime, timedelta
+    from flask import current_app
+    from app.models.user import db
+    from app.models import Notification
+    from app.utils.notifications import expired_notifications, purge_read_notifications
+
+    db.create_all()
+
+    days = args.days if args.days is not None else current_app.config.get('NOTIFICATION_RETENTION_DAYS', 90)
+    mode = args.mode or current_app.config.get('NOTIFICATION_RETENTION_MODE', 'archive')
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    pending = expired_notifications(cutoff).count()
+    action = '归档' if mode == 'archive' else '删除'
+    print(f"📦 {days} 天前的已读通知 {pending} 条（通知表共 {Notification.query.count()} 条），将{action}")
+    if args.dry_run or not pending:
+        return 0
+
+    start = time.perf_counter()
+
+    def report(count):
+        elapsed = time.perf_counter() - start
+        print(f"   已{action} {count}/{pending} 条，{count / elapsed if elapsed else 0:.0f} 条/秒", end='\r')
+
+    total = purge_read_notifications(cutoff, archive=(mode == 'archive'), batch_size=args.batch_size,
+                                     pause=args.pause, progress=report)
+    print(f"\n✅ 已{action} {total} 条通知，耗时 {time.perf_counter() - start:.1f}s，"
+          f"通知表剩余 {Notification.query.count()} 条")
+    return 0
+
+
+# 已被新的组合索引取代、迁移时删除的旧索引：{表名: [索引名]}
+OBSOLETE_INDEXES = {
+    'comment_replies': ['ix_comment_replies_thread'],
+}
+
+
+def migrate_indexes(args):
+    """为已有的表补建模型中新增的索引（db.create_all 只为新建的表创建索引），删除被取代的旧索引"""
+    import time
+    from sqlalchemy import inspect
+    from app.models.user import db
+
+    db.create_all()
+
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    missing = []
+    obsolete = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in sorted(table.indexes, key=lambda index: index.name)
+                       if index.name not in existing)
+        obsolete.extend((table.name, name) for name in OBSOLETE_INDEXES.get(table.name, []) if name in existing)
+
+    for index in missing:
+        columns = ', '.join(column.name for column in index.columns)
+        print(f"➕ {index.table.name}.{index.name} ({columns})")
+    for table_name, name in obsolete:
+        print(f"➖ {table_name}.{name}")
+    if not missing and not obsolete:
+        print("✅ 索引已是最新")
+        return 0
+    if args.dry_run:
+        return 0
+
+    # 建索引期间表被锁定，逐个创建并提交，大表上每个索引的耗时单独输出
+    with db.engine.connect() as connection:
+        for index in missing:
+            start = time.perf_counter()
+            index.create(connection, checkfirst=True)
+            connection.commit()
+            print(f"   {index.name} 已创建，耗时 {time.perf_counter() - start:.2f}s")
+        for _, name in obsolete:
+            connection.execute(db.text(f'DROP INDEX IF EXISTS {name}'))
+            connection.commit()
+        # 更新统计信息，查询规划器据此在多个可用索引中选择
+        if db.engine.dialect.name == 'sqlite':
+            connection.execute(db.text('ANALYZE'))
+            connection.commit()
+
+    print(f"✅ 新建索引 {len(missing)} 个，删除旧索引 {len(obsolete)} 个")
+    return 0
+
+
+# 需要迁移到摘要存储的旧版上传目录（相对于 static 目录）
+LEGACY_UPLOAD_DIRS = ['uploads/avatars', 'uploads/images']
+
+
+def migrate_uploads(args):
+    """将旧版目录中的上传文件迁移到按内容摘要寻址的存储，并改写数据库中的引用"""
+    import re
+    from flask import current_app
+    from app.models.user import db, User
+    from app.models import Post, Project, AboutContent, Comment, CommentReply
+    from app.utils.page_cache import page_cache
+    from app.utils.storage import content_store
+
+    static_folder = current_app.static_folder
+    static_url = current_app.static_url_path
+
+    # 第一步：逐个文件计算摘要并保存，得到 旧URL -> 新URL
+    mapping = {}
+    legacy_files = []
+    total_bytes = stored_bytes = 0
+    for directory in LEGACY_UPLOAD_DIRS:
+        base = os.path.join(static_folder, *directory.split('/'))
+        if not os.path.isdir(base):
+            continue
+        for name in sorted(os.listdir(base)):
+            path = os.path.join(base, name)
+            if not os.path.isfile(path):
+                continue
+            extension = os.path.splitext(name)[1]
+            size = os.path.getsize(path)
+            total_bytes += size
+            if args.dry_run:
+                with open(path, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+                url = content_store.url_for(digest, extension)
+                created = url not in mapping.values() and not os.path.exists(content_store.path_for(digest, extension))
+            else:
+                with open(path, 'rb') as f:
+                    stored = content_store.save(f, extension)
+                url, created = stored.url, stored.created
+            if created:
+                stored_bytes += size
+            mapping[f'{static_url}/{directory}/{name}'] = url
+            legacy_files.append(path)
+
+    print(f"📦 旧版上传文件 {len(mapping)} 个（{total_bytes / 1024:.1f}KB），"
+          f"去重后新增 {len(set(mapping.values()))} 个对象（{stored_bytes / 1024:.1f}KB）")
+    if not mapping:
+        return 0
+
+    # 第二步：改写引用这些文件的字段（头像、文章正文、项目描述、评论等）
+    pattern = re.compile('|'.join(re.escape(url) for url in sorted(mapping, key=len, reverse=True)))
+    targets = [
+        (User, ['avatar']),
+        (Post, ['content', 'excerpt', 'featured_image']),
+        (Project, ['description', 'image_url', 'features', 'challenges', 'lessons_learned']),
+        (AboutContent, ['content']),
+        (Comment, ['content']),
+        (CommentReply, ['content']),
+    ]
+    for model, names in targets:
+        columns = [getattr(model, name) for name in names]
+        rows = db.session.query(model.id, *columns).filter(
+            db.or_(*[column.like(f'%{static_url}/uploads/%') for column in columns])
+        ).all()
+        changed = 0
+        for row in rows:
+            values = {}
+            for column, value in zip(columns, row[1:]):
+                if value:
+                    new_value = pattern.sub(lambda match: mapping[match.group(0)], value)
+                    if new_value != value:
+                        values[column] = new_value
+            if not values:
+                continue
+            changed += 1
+            if not args.dry_run:
+                # 只是文件地址变化，保留原来的更新时间
+                if hasattr(model, 'updated_at'):
+                    values[model.updated_at] = model.updated_at
+                model.query.filter(model.id == row.id).update(values, synchronize_session=False)
+        print(f"   {model.__tablename__}: {changed} 条记录引用了旧文件")
+
+    if args.dry_run:
+        db.session.rollback()
+        print("ℹ️  试运行，未修改任何文件和数据")
+        return 0
+
+    db.session.commit()
+    page_cache.clear()
+
+    # 第三步：引用改写完成后删除旧文件
+    if not args.keep_originals:
+        for path in legacy_files:
+            os.remove(path)
+        print(f"🗑️  已删除旧文件 {len(legacy_files)} 个")
+    print("✅ 上传文件迁移完成")
+    return 0
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='网站性能维护工具')
+    subparsers = parser.add_subparsers(dest='command')
+
+    search_parser = subparsers.add_parser('rebuild-search', help='重建全文搜索索引')
+    search_parser.add_argument(
+        '--type',
+        choices=['post', 'project'],
+        help='只重建指定类型的索引 (默认: 全部)'
+    )
+    search_parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1000,
+        help='每批写入的记录数 (默认: 1000)'
+    )
+    search_parser.set_defaults(func=rebuild_search)
+
+    tags_parser = subparsers.add_parser('backfill-tags', help='从文章标签字段回填标签表并统计文章数')
+    tags_parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=500,
+        help='每批处理的文章数 (默认: 500)'
+    )
+    tags_parser.set_defaults(func=backfill_tags)
+
+    related_parser = subparsers.add_parser('rebuild-related', help='全量重新计算相关内容推荐')
+    related_parser.add_argument(
+        '--type',
+        choices=['post', 'project'],
+        help='只计算指定类型 (默认: 全部)'
+    )
+    related_parser.add_argument(
+        '--top-k',
+        type=int,
+        default=6,
+        help='每条内容保存的相似内容数 (默认: 6)'
+    )
+    related_parser.set_defaults(func=rebuild_related)
+
+    ratings_parser = subparsers.add_parser('reconcile-ratings', help='根据用户评分记录重建评分汇总和平均评分')
+    ratings_parser.add_argument(
+        '--type',
+        choices=['post', 'project'],
+        help='只处理指定类型 (默认: 全部)'
+    )
+    ratings_parser.set_defaults(func=reconcile_ratings)
+
+    notifications_parser = subparsers.add_parser('reconcile-notifications', help='根据通知表重建每个用户的未读通知计数')
+    notifications_parser.set_defaults(func=reconcile_notifications)
+
+    purge_parser = subparsers.add_parser('purge-notifications', help='将超过保留期的已读通知分批归档或删除')
+    purge_parser.add_argument(
+        '--days',
+        type=int,
+        help='保留天数 (默认: NOTIFICATION_RETENTION_DAYS)'
+    )
+    purge_parser.add_argument(
+        '--mode',
+        choices=['archive', 'delete'],
+        help='移到归档表或直接删除 (默认: NOTIFICATION_RETENTION_MODE)'
+    )
+    purge_parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=500,
+        help='每个事务处理的通知数 (默认: 500)'
+    )
+    purge_parser.add_argument(
+        '--pause',
+        type=float,
+        default=0.05,
+        help='批次之间暂停的秒数，让出数据库写锁 (默认: 0.05)'
+    )
+    purge_parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='只统计需要处理的通知数，不做修改'
+    )
+    purge_parser.set_defaults(func=purge_notifications)
+
+    uploads_parser = subparsers.add_parser('migrate-uploads', help='将旧版上传文件迁移到按内容摘要寻址的存储')
+    uploads_parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='只统计需要迁移的文件和引用，不做修改'
+    )
+    uploads_parser.add_argument(
+        '--keep-originals',
+        action='store_true',
+        help='迁移后保留旧文件（默认删除）'
+    )
+    uploads_parser.set_defaults(func=migrate_uploads)
+
+    indexes_parser = subparsers.add_parser('migrate-indexes', help='为已有的表补建新增的组合索引并更新统计信息')
+    indexes_parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='只列出需要新建和删除的索引，不做修改'
+    )
+    indexes_parser.set_defaults(func=migrate_indexes)
+
+    args = parser.parse_args()
+
+    if not getattr(args, 'func', None):
+        parser.print_help()
+        return 1
+
+    app = create_app()
+    with app.app_context():
+        return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())